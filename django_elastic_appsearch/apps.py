@@ -10,6 +10,7 @@ class DjangoAppSearchConfig(AppConfig):
 
     name = 'django_elastic_appsearch'
     verbose_name = 'Django Elastic App Search'
+    default_auto_field = 'django.db.models.AutoField'
 
     def __init__(self, *args, **kwargs):
         """Initialise the config."""
@@ -42,11 +43,81 @@ class DjangoAppSearchConfig(AppConfig):
         else:
             self.use_https = True
 
+        if hasattr(settings, 'APPSEARCH_CONNECTIONS_PER_NODE'):
+            self.connections_per_node = settings.APPSEARCH_CONNECTIONS_PER_NODE
+        else:
+            self.connections_per_node = None
+
         if hasattr(settings, 'APPSEARCH_CHUNK_SIZE'):
             self.chunk_size = settings.APPSEARCH_CHUNK_SIZE
         else:
             self.chunk_size = 100
 
+        if hasattr(settings, 'APPSEARCH_MAX_WORKERS'):
+            self.max_workers = settings.APPSEARCH_MAX_WORKERS
+        else:
+            self.max_workers = 1
+
+        if hasattr(settings, 'APPSEARCH_MAX_PAYLOAD_SIZE'):
+            self.max_payload_size = settings.APPSEARCH_MAX_PAYLOAD_SIZE
+        else:
+            self.max_payload_size = None
+
+        if hasattr(settings, 'APPSEARCH_MAX_RETRIES'):
+            self.max_retries = settings.APPSEARCH_MAX_RETRIES
+        else:
+            self.max_retries = 3
+
+        if hasattr(settings, 'APPSEARCH_RETRY_BACKOFF'):
+            self.retry_backoff = settings.APPSEARCH_RETRY_BACKOFF
+        else:
+            self.retry_backoff = 1
+
+        if hasattr(settings, 'APPSEARCH_RATE_LIMITS'):
+            self.rate_limits = settings.APPSEARCH_RATE_LIMITS
+        else:
+            self.rate_limits = None
+
+        if hasattr(settings, 'APPSEARCH_RATE_LIMIT_CACHE'):
+            self.rate_limit_cache = settings.APPSEARCH_RATE_LIMIT_CACHE
+        else:
+            self.rate_limit_cache = None
+
+        if hasattr(settings, 'APPSEARCH_SEARCH_CACHE'):
+            self.search_cache = settings.APPSEARCH_SEARCH_CACHE
+        else:
+            self.search_cache = None
+
+        if hasattr(settings, 'APPSEARCH_SEARCH_CACHE_TIMEOUT'):
+            self.search_cache_timeout = settings.APPSEARCH_SEARCH_CACHE_TIMEOUT
+        else:
+            self.search_cache_timeout = 60
+
+        if hasattr(settings, 'APPSEARCH_SYNC_PROCESSOR'):
+            self.sync_processor = settings.APPSEARCH_SYNC_PROCESSOR
+        else:
+            self.sync_processor = 'django_elastic_appsearch.sync.OnCommitProcessor'
+
+        if hasattr(settings, 'APPSEARCH_SYNC_LAG'):
+            self.sync_lag = settings.APPSEARCH_SYNC_LAG
+        else:
+            self.sync_lag = 60
+
+        if hasattr(settings, 'APPSEARCH_ENGINE_ALIAS_TIMEOUT'):
+            self.engine_alias_timeout = settings.APPSEARCH_ENGINE_ALIAS_TIMEOUT
+        else:
+            self.engine_alias_timeout = 5
+
+        if hasattr(settings, 'APPSEARCH_HASH_STORE'):
+            self.hash_store = settings.APPSEARCH_HASH_STORE
+        else:
+            self.hash_store = None
+
+        if hasattr(settings, 'APPSEARCH_DEBUG_QUERIES'):
+            self.debug_queries = settings.APPSEARCH_DEBUG_QUERIES
+        else:
+            self.debug_queries = False
+
         if hasattr(settings, 'APPSEARCH_INDEXING_ENABLED'):
             self.enabled = settings.APPSEARCH_INDEXING_ENABLED
         else:
@@ -58,3 +129,9 @@ class DjangoAppSearchConfig(AppConfig):
             self.enabled = False
 
         super().__init__(*args, **kwargs)
+
+    def ready(self):
+        """Connect the signal handlers for models with auto sync turned on."""
+        # pylint:disable=import-outside-toplevel
+        from django_elastic_appsearch.sync import connect_auto_sync
+        connect_auto_sync()
@@ -0,0 +1,224 @@
+"""Pack documents into batches that stay under Elastic App Search's payload size limit."""
+
+import json
+import logging
+
+from django.apps import apps
+
+from django_elastic_appsearch.hashes import record_sent
+from django_elastic_appsearch.retries import BulkResults, call_with_retries, send_documents_with_retries
+from django_elastic_appsearch.throttle import bulk_priority
+
+logger = logging.getLogger(__name__)
+
+
+def get_document_size(document):
+    """Return the size in bytes of a serialised document, encoded as the app search client sends it."""
+    return len(json.dumps(document, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8'))
+
+
+def _reject_document(document, size, max_payload_size):
+    """Report a document too large to be sent, as an app search document response."""
+    logger.warning(
+        'Document %s is %s bytes, over the %s byte payload size limit, and was not sent.',
+        document.get('id'), size, max_payload_size
+    )
+    return {
+        'id': document.get('id'),
+        'errors': ['Document is {} bytes, over the {} byte payload size limit.'.format(size, max_payload_size)],
+    }
+
+
+def _pop_hashes(hashes, documents):
+    """Take the hashes of documents out of the hashes still to be sent."""
+    return {
+        document.get('id'): hashes.pop(document.get('id')) for document in documents if document.get('id') in hashes
+    }
+
+
+class DocumentPacker:
+    """
+    Packs documents into batches under a document count and a byte budget as they come.
+
+    Documents are measured as JSON as they're added. A batch is full as soon as
+    the next document wouldn't fit, and the rest of the documents are packed
+    into the next batch, so batches of small documents are filled up to
+    `max_documents`. Documents over the byte budget on their own aren't sent,
+    they're returned with an error instead, in the same format as app search
+    reports documents it rejected.
+    """
+
+    def __init__(self, max_documents, max_payload_size=None):
+        """
+        Start with an empty batch.
+
+        Args:
+            max_documents (int): The most documents to send in a batch.
+            max_payload_size (int): The most bytes of JSON to send in a batch,
+                or None to leave the batches as they're added.
+        """
+        self.max_documents = max_documents
+        self.max_payload_size = max_payload_size
+        self.pending_hashes = {}
+        self._start_batch()
+
+    def _start_batch(self):
+        """Start a new batch."""
+        # A batch is sent as a JSON list, `[` and `]` plus a comma between documents
+        self.documents, self.size, self.rejected = [], 1, []
+
+    def _take_batch(self):
+        """Take the batch packed so far, with its hashes and rejected documents."""
+        batch = self.documents, _pop_hashes(self.pending_hashes, self.documents), self.rejected
+        self._start_batch()
+        return batch
+
+    def add(self, documents, hashes):
+        """
+        Add a batch of documents.
+
+        Args:
+            documents (list of dict): The documents.
+            hashes (dict): Their content hashes, as returned by `skip_unchanged`.
+
+        Returns:
+            list of (list of dict, dict, list of dict): The batches filled up,
+                with the documents of each, their content hashes, and errors
+                for the documents left out as too large since the previous
+                batch.
+        """
+        if self.max_payload_size is None:
+            return [(documents, hashes, [])]
+
+        batches = []
+        self.pending_hashes.update(hashes)
+        for document in documents:
+            document_size = get_document_size(document)
+            if document_size + 2 > self.max_payload_size:
+                self.pending_hashes.pop(document.get('id'), None)
+                self.rejected.append(_reject_document(document, document_size, self.max_payload_size))
+                continue
+
+            if self.documents and (
+                len(self.documents) >= self.max_documents or self.size + document_size + 1 > self.max_payload_size
+            ):
+                batches.append(self._take_batch())
+            self.documents.append(document)
+            self.size += document_size + 1
+        return batches
+
+    def flush(self):
+        """
+        Take the last batch, if it has anything in it.
+
+        Returns:
+            list of (list of dict, dict, list of dict): The batch, in the same
+                format as `add` returns them.
+        """
+        if self.documents or self.rejected:
+            return [self._take_batch()]
+        return []
+
+
+def pack_documents(batches, max_documents, max_payload_size=None):
+    """
+    Repack batches of documents to stay under a document count and a byte budget.
+
+    See `DocumentPacker`, batches of small documents are packed together.
+
+    Args:
+        batches (iterable of (list of dict, dict)): The documents and their
+            content hashes, as returned by `skip_unchanged`.
+        max_documents (int): The most documents to send in a batch.
+        max_payload_size (int): The most bytes of JSON to send in a batch, or
+            None to leave the batches as they are.
+
+    Yields:
+        (list of dict, dict, list of dict): The documents of each batch, their
+            content hashes, and errors for the documents left out as too
+            large since the previous batch.
+    """
+    packer = DocumentPacker(max_documents, max_payload_size)
+    for (documents, hashes) in batches:
+        yield from packer.add(documents, hashes)
+    yield from packer.flush()
+
+
+def send_packed_documents(send_documents, engine_name, documents, hashes=None):
+    """
+    Send documents to an engine, packed into batches under the chunk size and payload size limit.
+
+    Each batch is sent at bulk priority and retried the same as the rest of
+    the writes, see `send_documents_with_retries`, and the content hashes of
+    the documents app search accepted are recorded.
+
+    Args:
+        send_documents (callable): The client method to send the documents
+            with, eg. `index_documents` or `put_documents`.
+        engine_name (str): The engine to send the documents to.
+        documents (list of dict): The documents.
+        hashes (dict): Optional, their content hashes, as returned by
+            `skip_unchanged`.
+
+    Returns:
+        BulkResults: app search's response for each document, in order.
+    """
+    config = apps.get_app_config('django_elastic_appsearch')
+    hashes = hashes or {}
+    chunks = (
+        (chunk, {document.get('id'): hashes[document.get('id')] for document in chunk if document.get('id') in hashes})
+        for chunk in iter_chunks(documents, config.chunk_size)
+    )
+    results = BulkResults()
+    for (batch, batch_hashes, rejected) in pack_documents(chunks, config.chunk_size, config.max_payload_size):
+        if batch:
+            with bulk_priority():
+                response, retried = send_documents_with_retries(send_documents, engine_name, batch)
+            record_sent(engine_name, batch_hashes, response)
+            results.add(response, retried)
+        results.add(rejected)
+    return results
+
+
+def delete_document_chunks(client, engine_name, document_ids):
+    """
+    Delete documents from an engine, a chunk at a time.
+
+    Each chunk is sent at bulk priority and retried on transient errors, see
+    `call_with_retries`.
+
+    Args:
+        client (AppSearch): The app search client.
+        engine_name (str): The engine to delete the documents from.
+        document_ids (list of str): The IDs of the documents.
+
+    Returns:
+        BulkResults: app search's response for each document, in order.
+    """
+    results = BulkResults()
+    for chunk in iter_chunks(document_ids, apps.get_app_config('django_elastic_appsearch').chunk_size):
+        with bulk_priority():
+            response, retries = call_with_retries(client.delete_documents, engine_name=engine_name, document_ids=chunk)
+        results.add(response, len(chunk) if retries else 0)
+    return results
+
+
+def iter_chunks(iterable, chunk_size):
+    """
+    Split an iterable into lists of up to `chunk_size` items, without reading it all at once.
+
+    Args:
+        iterable (iterable): The items, eg. primary keys or document IDs.
+        chunk_size (int): The most items in a chunk.
+
+    Yields:
+        list: The items of each chunk, in order.
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
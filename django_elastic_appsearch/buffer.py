@@ -0,0 +1,294 @@
+"""Write-behind buffering of Elastic App Search operations."""
+
+import itertools
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from django.db import transaction
+
+from django_elastic_appsearch.batching import delete_document_chunks, send_packed_documents
+from django_elastic_appsearch.cache import invalidate_search_cache
+from django_elastic_appsearch.clients import get_api_v1_enterprise_search_client
+from django_elastic_appsearch.hashes import forget_documents, skip_unchanged
+from django_elastic_appsearch.retries import BulkResults
+
+INDEX = 'index'
+UPDATE = 'update'
+DELETE = 'delete'
+
+_state = Local()
+
+
+class _TransactionState:
+    """
+    Orders the operations buffered within a transaction, across the buffers of its savepoints.
+
+    Each savepoint buffers its operations separately, so they're dropped if
+    it rolls back, and the buffers are flushed one after the other when the
+    transaction commits. Operations are numbered as they're buffered, so a
+    buffer flushed later doesn't overwrite a newer operation on the same
+    document that was sent before it.
+    """
+
+    def __init__(self):
+        """Start with nothing sent."""
+        self.sequence = itertools.count()
+        # The last operation sent for each document: its number, the operation and, for updates, the document
+        self.sent = {}
+
+
+class AppSearchBuffer:
+    """
+    Collects index and delete operations to send them to app search in bulk.
+
+    Operations are kept per engine and document ID, so only the last write to
+    each document is sent when the buffer is flushed.
+    """
+
+    def __init__(self, transaction_state=None):
+        """
+        Initialise an empty buffer.
+
+        Args:
+            transaction_state (_TransactionState): Optional, the state shared by
+                the buffers of a transaction's savepoints.
+        """
+        self._operations = OrderedDict()
+        self._transaction_state = transaction_state
+        self._sequences = {}
+
+    def __len__(self):
+        """Return the number of buffered operations."""
+        return len(self._operations)
+
+    def add(self, engine_name, document_id, operation, document=None):
+        """
+        Buffer an operation on a document.
+
+        Args:
+            engine_name (str): The engine the document belongs to.
+            document_id (str): The app search document ID.
+            operation (str): One of `INDEX`, `UPDATE` or `DELETE`.
+            document (dict): The serialised document, for index and update operations.
+        """
+        key = (engine_name, document_id)
+        pending = self._operations.pop(key, None)
+        if operation == UPDATE and pending is not None and pending[0] != DELETE:
+            # A partial update on top of a pending write is merged into it
+            operation = pending[0]
+            document = dict(pending[1], **document)
+
+        self._operations[key] = (operation, document)
+        if self._transaction_state is not None:
+            self._sequences[key] = next(self._transaction_state.sequence)
+
+    def index_instance(self, instance, update_only=False, force=False):
+        """Buffer indexing a model object to all of its engines."""
+        operation = UPDATE if update_only else INDEX
+        document_id = instance.get_appsearch_document_id()
+        for (_, engine_name) in instance.get_appsearch_write_engine_pairs():
+            if force:
+                # Without its stored hash the document is sent even if it hasn't changed
+                forget_documents(engine_name, [document_id])
+            for document in instance._serialise_for_appsearch(engine_name):  # pylint:disable=protected-access
+                self.add(engine_name, document_id, operation, document)
+
+    def delete_instance(self, instance):
+        """Buffer deleting a model object from all of its engines."""
+        document_id = instance.get_appsearch_document_id()
+        for (_, engine_name) in instance.get_appsearch_write_engine_pairs():
+            self.add(engine_name, document_id, DELETE)
+
+    def clear(self):
+        """Drop the buffered operations without sending them."""
+        self._operations.clear()
+        self._sequences.clear()
+
+    def _get_operations(self):
+        """Return the operations to send, after the newer ones sent by other buffers of the transaction."""
+        if self._transaction_state is None:
+            return list(self._operations.items())
+
+        sent, operations = self._transaction_state.sent, []
+        for key, (operation, document) in self._operations.items():
+            sequence = self._sequences[key]
+            newer = sent.get(key)
+            if newer is not None and newer[0] > sequence:
+                if newer[1] != UPDATE:
+                    # The newer write replaced the document, or deleted it
+                    continue
+                # The newer partial update applies on top of this write
+                sequence = newer[0]
+                if operation != DELETE:
+                    document = dict(document, **newer[2])
+            sent[key] = (sequence, operation, document if operation == UPDATE else None)
+            operations.append((key, (operation, document)))
+        return operations
+
+    def flush(self):
+        """
+        Send the buffered operations to app search and empty the buffer.
+
+        Returns:
+            BulkResults: app search's response for each document, by engine
+                and operation in the order they were first buffered.
+        """
+        batches = OrderedDict()
+        for (engine_name, document_id), (operation, document) in self._get_operations():
+            batches.setdefault((engine_name, operation), []).append(
+                document_id if operation == DELETE else document
+            )
+        self.clear()
+
+        responses = BulkResults()
+        if not batches:
+            return responses
+
+        client = get_api_v1_enterprise_search_client()
+        for (engine_name, operation), items in batches.items():
+            if operation == DELETE:
+                forget_documents(engine_name, items)
+                responses.merge(delete_document_chunks(client, engine_name, items))
+            elif operation == UPDATE:
+                forget_documents(engine_name, [document['id'] for document in items if 'id' in document])
+                responses.merge(send_packed_documents(client.put_documents, engine_name, items))
+            else:
+                documents, hashes = skip_unchanged(engine_name, items)
+                responses.merge(send_packed_documents(client.index_documents, engine_name, documents, hashes))
+            invalidate_search_cache([engine_name])
+
+        return responses
+
+
+def get_active_buffer():
+    """Return the buffer collecting operations in the current context, if any."""
+    return getattr(_state, 'buffer', None)
+
+
+@contextmanager
+def appsearch_buffer(using=None):
+    """
+    Buffer model object index and delete operations within a block.
+
+    The operations are sent in bulk when the block exits. If the block is
+    running inside a transaction, they're sent once the transaction commits
+    and dropped if it rolls back. They're also dropped if the block raises.
+    Nested blocks share the outermost buffer.
+
+    Args:
+        using (str): Optional, the database alias of the transaction to wait for.
+
+    Yields:
+        AppSearchBuffer: The buffer collecting the operations.
+    """
+    active_buffer = get_active_buffer()
+    if active_buffer is not None:
+        yield active_buffer
+        return
+
+    buffer = AppSearchBuffer()
+    _state.buffer = buffer
+    try:
+        yield buffer
+    except BaseException:
+        buffer.clear()
+        raise
+    finally:
+        _state.buffer = None
+
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(buffer.flush, using=using)
+    else:
+        buffer.flush()
+
+
+def _is_waiting_for_commit(connection, flush):
+    """Check a buffer's flush is still waiting for the connection's transaction to commit."""
+    return any(entry[1] is flush for entry in connection.run_on_commit)
+
+
+def _get_transaction_buffer(connection):
+    """Return the buffer sent when the connection's current savepoint, and then its transaction, commits."""
+    buffers = getattr(_state, 'transaction_buffers', None)
+    if buffers is None:
+        buffers = _state.transaction_buffers = {}
+
+    transaction_state, savepoints = buffers.get(connection.alias, (None, {}))
+    # Buffers no longer waiting for a commit were rolled back with their
+    # savepoint, or belong to an earlier transaction
+    savepoints = {
+        savepoint_ids: (buffer, flush) for savepoint_ids, (buffer, flush) in savepoints.items()
+        if _is_waiting_for_commit(connection, flush)
+    }
+    if not savepoints:
+        transaction_state = _TransactionState()
+    buffers[connection.alias] = (transaction_state, savepoints)
+
+    savepoint_ids = tuple(connection.savepoint_ids)
+    if savepoint_ids not in savepoints:
+        buffer = AppSearchBuffer(transaction_state)
+
+        def flush():
+            _, flushing_savepoints = buffers.get(connection.alias, (None, {}))
+            if flushing_savepoints.get(savepoint_ids, (None, None))[0] is buffer:
+                del flushing_savepoints[savepoint_ids]
+            buffer.flush()
+
+        savepoints[savepoint_ids] = (buffer, flush)
+        # Django drops the flush if the savepoint rolls back
+        transaction.on_commit(flush, using=connection.alias)
+
+    return savepoints[savepoint_ids][0]
+
+
+@contextmanager
+def transaction_buffer(using=None):
+    """
+    Buffer model object index and delete operations until the transaction commits.
+
+    Unlike `appsearch_buffer`, every block within the same savepoint of a
+    transaction shares one buffer, and the buffers are sent once the
+    transaction commits. The operations buffered within a savepoint that
+    rolls back are dropped. Outside of a transaction, or within an
+    `appsearch_buffer` block, it behaves the same as `appsearch_buffer`.
+
+    Args:
+        using (str): Optional, the database alias of the transaction to wait for.
+
+    Yields:
+        AppSearchBuffer: The buffer collecting the operations.
+    """
+    connection = transaction.get_connection(using)
+    if get_active_buffer() is not None or not connection.in_atomic_block:
+        with appsearch_buffer(using=using) as buffer:
+            yield buffer
+        return
+
+    buffer = _get_transaction_buffer(connection)
+    _state.buffer = buffer
+    try:
+        yield buffer
+    finally:
+        _state.buffer = None
+
+
+class AppSearchBufferMiddleware:
+    """
+    Buffer the app search operations made while handling a request.
+
+    The operations are sent in bulk once the response is ready, and dropped
+    if the request fails with a server error.
+    """
+
+    def __init__(self, get_response):
+        """Initialise the middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Handle the request within an app search buffer."""
+        with appsearch_buffer() as buffer:
+            response = self.get_response(request)
+            if response.status_code >= 500:
+                buffer.clear()
+        return response
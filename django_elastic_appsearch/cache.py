@@ -0,0 +1,78 @@
+"""Cache search results, invalidated by generation whenever an engine is written to."""
+
+import hashlib
+import json
+import time
+
+from django.apps import apps
+from django.core.cache import caches
+
+
+def get_search_cache():
+    """Return the cache search results are cached in, or None if they aren't cached."""
+    alias = apps.get_app_config('django_elastic_appsearch').search_cache
+    return None if alias is None else caches[alias]
+
+
+def _get_generation_key(engine_name):
+    """Return the cache key of the generation of an engine's cached search results."""
+    return 'appsearch_search_generation:{}'.format(engine_name)
+
+
+def _new_generation():
+    """
+    Return a generation to start counting from.
+
+    Counters start from the time rather than 0, so a counter that's been
+    evicted from the cache doesn't go back to generations still cached.
+    """
+    return int(time.time() * 1000000)
+
+
+def get_search_generation(cache, engine_name):
+    """Return the current generation of an engine's cached search results."""
+    key = _get_generation_key(engine_name)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _new_generation(), timeout=None)
+        # Another process may have started the counter first
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_search_cache(engine_names):
+    """
+    Invalidate the cached search results of engines, after writing to them.
+
+    Moves the engines on to a new generation, so their cached results are
+    never read again, without looking for them.
+
+    Args:
+        engine_names (list of str): The engines written to.
+    """
+    cache = get_search_cache()
+    if cache is None:
+        return
+
+    for engine_name in engine_names:
+        key = _get_generation_key(engine_name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The counter was never started or has been evicted
+            cache.add(key, _new_generation(), timeout=None)
+
+
+def get_search_cache_key(engine_name, generation, query, options):
+    """
+    Return the cache key of a search.
+
+    Searches with the same query, up to whitespace, and the same options in
+    any key order, share a key.
+    """
+    normalised = json.dumps(
+        [' '.join(query.split()), options], sort_keys=True, separators=(',', ':'), default=str
+    )
+    return 'appsearch_search:{}:{}:{}'.format(
+        engine_name, generation, hashlib.sha256(normalised.encode('utf-8')).hexdigest()
+    )
@@ -1,20 +1,112 @@
 """Django App Search Client utilities."""
 
+import asyncio
+import os
+import threading
+import weakref
+
 from django.apps import apps
-from elastic_enterprise_search import AppSearch
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from elastic_enterprise_search import AppSearch, AsyncAppSearch
 
+from django_elastic_appsearch.throttle import ThrottledAppSearch, ThrottledAsyncAppSearch
 
-def get_api_v1_enterprise_search_client():
-    """Return the enterprise-search appsearch client."""
-    config = apps.get_app_config('django_elastic_appsearch')
+# Clients are shared by all threads in a process, keyed on their config.
+_clients = {}
+_clients_lock = threading.Lock()
+_clients_pid = None
+
+# Async clients hold a connection pool bound to an event loop, so they're
+# shared per event loop rather than per process.
+_async_clients = weakref.WeakKeyDictionary()
 
-    appsearch_host = config.appsearch_host
-    api_key = config.api_key
-    use_https = config.use_https
 
+def _get_client_options(config):
+    """Return the url, api key and extra options to build a client with."""
     url = '{}://{}'.format(
-        'https' if use_https else 'http',
-        appsearch_host
+        'https' if config.use_https else 'http',
+        config.appsearch_host
     )
 
-    return AppSearch(url, bearer_auth=api_key, **config.extra_config_options)
+    options = dict(config.extra_config_options)
+    if config.connections_per_node is not None:
+        options.setdefault('connections_per_node', config.connections_per_node)
+
+    return url, config.api_key, options
+
+
+def clear_client_cache():
+    """
+    Close and drop the shared clients, new ones will be built on next use.
+
+    Async clients are dropped without being closed, as coroutines on their
+    event loop may still be using them, and they can't be closed from another
+    loop. Their connections are closed once they're no longer used.
+    """
+    with _clients_lock:
+        clients = list(_clients.values()) if _clients_pid == os.getpid() else []
+        _clients.clear()
+        _async_clients.clear()
+
+    for client in clients:
+        client.transport.close()
+
+
+@receiver(setting_changed)
+def _clear_client_cache_on_setting_changed(setting, **kwargs):
+    """Drop the shared clients when app search settings change."""
+    if setting.startswith('APPSEARCH_'):
+        clear_client_cache()
+
+
+def get_api_v1_enterprise_search_client():
+    """
+    Return the enterprise-search appsearch client.
+
+    A single client is shared per config by all threads in a process, so its
+    pooled connections are kept alive between calls. Forked processes build
+    their own clients rather than sharing their parent's connections. With
+    `APPSEARCH_RATE_LIMITS` set, the client waits for room under the limits
+    before each request.
+    """
+    global _clients_pid  # pylint:disable=global-statement
+
+    config = apps.get_app_config('django_elastic_appsearch')
+    url, api_key, options = _get_client_options(config)
+    client_class = ThrottledAppSearch if config.rate_limits else AppSearch
+    cache_key = (client_class, url, api_key, repr(sorted(options.items())))
+
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+
+        client = _clients.get(cache_key)
+        if client is None:
+            client = _clients[cache_key] = client_class(url, bearer_auth=api_key, **options)
+
+    return client
+
+
+def get_api_v1_async_enterprise_search_client():
+    """
+    Return the asyncio enterprise-search appsearch client.
+
+    Must be called from a running event loop. A single client is shared per
+    config by all coroutines running on that loop, and is rate limited the same
+    way as the synchronous client.
+    """
+    config = apps.get_app_config('django_elastic_appsearch')
+    url, api_key, options = _get_client_options(config)
+    client_class = ThrottledAsyncAppSearch if config.rate_limits else AsyncAppSearch
+    cache_key = (client_class, url, api_key, repr(sorted(options.items())))
+
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(cache_key)
+        if client is None:
+            client = loop_clients[cache_key] = client_class(url, bearer_auth=api_key, **options)
+
+    return client
@@ -0,0 +1,235 @@
+"""Engine aliases and zero-downtime engine rebuilds for Elastic App Search."""
+
+import threading
+import time
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from elastic_enterprise_search import NotFoundError
+
+from django_elastic_appsearch.clients import get_api_v1_enterprise_search_client
+from django_elastic_appsearch.models import EngineAlias
+from django_elastic_appsearch.reindex import reindex_partition
+
+SEARCH_SETTINGS_FIELDS = ('boosts', 'precision', 'precision_enabled', 'result_fields', 'search_fields')
+
+# Aliases are cached per process for `APPSEARCH_ENGINE_ALIAS_TIMEOUT` seconds
+_aliases = {}
+_aliases_lock = threading.Lock()
+
+
+def clear_engine_alias_cache():
+    """Drop the cached engine aliases, they'll be read from the database on next use."""
+    with _aliases_lock:
+        _aliases.clear()
+
+
+def _get_engine_alias(name):
+    """Return the live and next engine names behind an alias, from the cache if it's fresh."""
+    now = time.monotonic()
+    with _aliases_lock:
+        cached = _aliases.get(name)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    alias = EngineAlias.objects.filter(name=name).values_list('engine_name', 'next_engine_name').first()
+    engines = alias or (name, '')
+
+    timeout = apps.get_app_config('django_elastic_appsearch').engine_alias_timeout
+    with _aliases_lock:
+        _aliases[name] = (now + timeout, engines)
+    return engines
+
+
+def get_live_engine_name(name):
+    """
+    Return the engine searches go to for an alias.
+
+    Args:
+        name (str): The engine name models are configured with.
+
+    Returns:
+        str: The live engine, or `name` itself if it's never been rebuilt.
+    """
+    return _get_engine_alias(name)[0]
+
+
+def get_write_engine_names(name):
+    """
+    Return the engines writes go to for an alias.
+
+    Args:
+        name (str): The engine name models are configured with.
+
+    Returns:
+        list of str: The live engine, followed by the engine being rebuilt if
+            there is one.
+    """
+    return [engine_name for engine_name in _get_engine_alias(name) if engine_name]
+
+
+def _delete_engine(client, engine_name):
+    """Delete an engine, if it exists."""
+    try:
+        client.delete_engine(engine_name=engine_name)
+    except NotFoundError:
+        pass
+
+
+def _copy_engine_settings(client, from_engine_name, to_engine_name):
+    """Copy the schema and search settings of an engine to another engine."""
+    try:
+        schema = client.get_schema(engine_name=from_engine_name)
+    except NotFoundError:
+        # There's nothing to copy when the alias points at an engine that was never created
+        return
+    client.put_schema(engine_name=to_engine_name, schema=dict(schema))
+
+    search_settings = client.get_search_settings(engine_name=from_engine_name)
+    client.put_search_settings(
+        engine_name=to_engine_name,
+        **{field: search_settings[field] for field in SEARCH_SETTINGS_FIELDS if field in search_settings}
+    )
+
+
+def _count_documents(client, engine_name):
+    """Return the number of documents in an engine."""
+    response = client.search(engine_name=engine_name, query='', page_size=1)
+    return response['meta']['page']['total_results']
+
+
+def _switch_meta_engine(client, meta_engine_name, from_engine_name, to_engine_name):
+    """Point a meta engine at a new source engine instead of the old one."""
+    try:
+        client.get_engine(engine_name=meta_engine_name)
+    except NotFoundError:
+        client.create_engine(engine_name=meta_engine_name, type='meta', source_engines=[to_engine_name])
+        return
+
+    # Add the new source before removing the old one, so searches never come back empty
+    client.add_meta_engine_source(engine_name=meta_engine_name, source_engines=[to_engine_name])
+    try:
+        client.delete_meta_engine_source(engine_name=meta_engine_name, source_engines=[from_engine_name])
+    except NotFoundError:
+        pass
+
+
+def rebuild_engine(model, engine_name=None, meta_engine_name=None, retire=True, verify=True,
+                   verify_timeout=60, workers=None, report=None):
+    """
+    Rebuild the engine behind an alias without any downtime.
+
+    A new versioned engine (eg. `cars__v2`) is created with the schema and
+    search settings of the live engine. Once every process has picked up the
+    change, objects saved while it's loading are written to both engines. It's
+    bulk loaded with all of the model's objects, its document count checked,
+    then the alias (and the meta engine, if one is given) is switched over to
+    it and the old engine is deleted. If app search rejects any documents,
+    the new engine is deleted and the alias is left as it was.
+
+    Args:
+        model (BaseAppSearchModel): The model to rebuild the engine of. Its
+            `AppsearchMeta.appsearch_use_engine_alias` must be turned on.
+        engine_name (str): Optional, the engine to rebuild. Required if the
+            model is indexed to more than one engine.
+        meta_engine_name (str): Optional, a meta engine to switch over to the
+            new engine along with the alias. It's created if it doesn't exist.
+        retire (bool): Delete the old engine once the alias has switched over.
+            Defaults to true.
+        verify (bool): Check the new engine has as many documents as the model
+            has objects before switching over. Defaults to true.
+        verify_timeout (int): Seconds to wait for the new engine's document
+            count to catch up when verifying.
+        workers (int): Optional, the number of chunks to send concurrently.
+            Defaults to the `APPSEARCH_MAX_WORKERS` setting.
+        report (callable): Optional, called with a message as each step starts.
+
+    Returns:
+        str: The name of the new live engine.
+
+    Raises:
+        RuntimeError: If app search rejected documents loading the new engine,
+            or its document count didn't catch up when verifying.
+    """
+    report = report or (lambda message: None)
+    config = apps.get_app_config('django_elastic_appsearch')
+    if not model.get_appsearch_use_engine_alias():
+        raise ImproperlyConfigured(
+            '{} must turn on `AppsearchMeta.appsearch_use_engine_alias` to be rebuilt.'.format(model._meta.label)
+        )
+
+    engine_names = [name for (_, name) in model.get_appsearch_serialiser_engine_pairs()]
+    if engine_name is None:
+        if len(engine_names) != 1:
+            raise ValueError('{} is indexed to more than one engine, choose one to rebuild.'.format(model._meta.label))
+        engine_name = engine_names[0]
+    elif engine_name not in engine_names:
+        raise ValueError('{} is not indexed to the {} engine.'.format(model._meta.label, engine_name))
+
+    client = get_api_v1_enterprise_search_client()
+
+    with transaction.atomic():
+        alias, _ = EngineAlias.objects.select_for_update().get_or_create(
+            name=engine_name, defaults={'engine_name': engine_name}
+        )
+        abandoned_engine_name = alias.next_engine_name
+        alias.version += 1
+        alias.next_engine_name = '{}__v{}'.format(engine_name, alias.version)
+        alias.save()
+    live_engine_name, new_engine_name = alias.engine_name, alias.next_engine_name
+
+    if abandoned_engine_name:
+        report('Deleting {}, left behind by an unfinished rebuild.'.format(abandoned_engine_name))
+        _delete_engine(client, abandoned_engine_name)
+
+    try:
+        report('Creating {}.'.format(new_engine_name))
+        client.create_engine(engine_name=new_engine_name)
+        _copy_engine_settings(client, live_engine_name, new_engine_name)
+
+        # Wait for every process to start writing to both engines before loading
+        clear_engine_alias_cache()
+        time.sleep(config.engine_alias_timeout)
+
+        report('Loading {}.'.format(new_engine_name))
+        queryset = model._default_manager.all()
+        failed = reindex_partition(
+            queryset, None, None, [new_engine_name], lambda last_pk, count, errors: None,
+            workers=config.max_workers if workers is None else workers
+        )
+        if failed:
+            raise RuntimeError('App search rejected {} documents loading {}.'.format(failed, new_engine_name))
+
+        if verify:
+            report('Verifying {}.'.format(new_engine_name))
+            deadline = time.monotonic() + verify_timeout
+            while True:
+                expected = queryset.count()
+                found = _count_documents(client, new_engine_name)
+                if found == expected:
+                    break
+                if time.monotonic() >= deadline:
+                    raise RuntimeError('{} has {} documents, but {} has {} objects.'.format(
+                        new_engine_name, found, model._meta.label, expected
+                    ))
+                time.sleep(1)
+    except BaseException:
+        EngineAlias.objects.filter(pk=alias.pk, next_engine_name=new_engine_name).update(next_engine_name='')
+        clear_engine_alias_cache()
+        _delete_engine(client, new_engine_name)
+        raise
+
+    report('Switching {} to {}.'.format(engine_name, new_engine_name))
+    if meta_engine_name:
+        _switch_meta_engine(client, meta_engine_name, live_engine_name, new_engine_name)
+    EngineAlias.objects.filter(pk=alias.pk).update(engine_name=new_engine_name, next_engine_name='')
+    clear_engine_alias_cache()
+
+    if retire:
+        # Wait for every process to stop searching the old engine before deleting it
+        time.sleep(config.engine_alias_timeout)
+        report('Deleting {}.'.format(live_engine_name))
+        _delete_engine(client, live_engine_name)
+
+    return new_engine_name
@@ -0,0 +1,101 @@
+"""Concurrent execution utilities for Django App Search."""
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django_elastic_appsearch.throttle import with_current_priority
+
+# Shared by the calls fanned out to several engines at once, so saving a model
+# object doesn't start threads of its own
+_fan_out_executor = None
+_fan_out_pid = None
+_fan_out_lock = threading.Lock()
+
+
+def ordered_map(func, iterable, workers=1):
+    """
+    Map a function over an iterable on a bounded thread pool.
+
+    The iterable is consumed lazily on the calling thread, so producing the
+    next item (eg. fetching and serialising the next chunk) overlaps with the
+    calls already running in the pool. At most `workers * 2` calls are in
+    flight at any time, which keeps memory bounded no matter how long the
+    iterable is.
+
+    Args:
+        func (callable): The function to call with each item.
+        iterable (iterable): The items to call the function with.
+        workers (int): The number of threads to use. Calls are made one after
+            another on the calling thread when this is 1 or less.
+
+    Yields:
+        The results of the calls, in the same order as the items.
+    """
+    if workers is None or workers <= 1:
+        for item in iterable:
+            yield func(item)
+        return
+
+    max_in_flight = workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        try:
+            for item in iterable:
+                in_flight.append(executor.submit(func, item))
+                if len(in_flight) >= max_in_flight:
+                    yield in_flight.popleft().result()
+
+            while in_flight:
+                yield in_flight.popleft().result()
+        finally:
+            # Don't start calls nobody will collect the results of
+            for future in in_flight:
+                future.cancel()
+
+
+def _get_fan_out_executor():
+    """Return the thread pool shared by fanned out calls, starting it if needed."""
+    global _fan_out_executor, _fan_out_pid  # pylint:disable=global-statement
+
+    with _fan_out_lock:
+        if _fan_out_executor is None or _fan_out_pid != os.getpid():
+            # Forked processes don't inherit their parent's threads
+            _fan_out_executor = ThreadPoolExecutor(thread_name_prefix='appsearch-fan-out')
+            _fan_out_pid = os.getpid()
+        return _fan_out_executor
+
+
+def fan_out(func, items):
+    """
+    Call a function with each of a few items at once.
+
+    The first item is called on the calling thread, and the rest on a shared
+    thread pool, at the priority of the calling context. Meant for a handful
+    of calls that each wait on app search, eg. sending a document to each of
+    its engines.
+
+    Args:
+        func (callable): The function to call with each item.
+        items (iterable): The items to call the function with.
+
+    Returns:
+        list: The results of the calls, in the same order as the items.
+
+    Raises:
+        Exception: The error of the first call that failed, once all the calls
+            are done.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+
+    executor = _get_fan_out_executor()
+    futures = [executor.submit(with_current_priority(func), item) for item in items[1:]]
+    try:
+        first = func(items[0])
+    finally:
+        # Don't leave calls running after returning or raising
+        wait(futures)
+    return [first] + [future.result() for future in futures]
@@ -0,0 +1,304 @@
+"""Content hashes of sent documents, to skip sending unchanged documents to Elastic App Search."""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.apps import apps
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import connections, router, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+def hash_document(document):
+    """Return the content hash of a serialised document."""
+    content = json.dumps(document, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class BaseHashStore:
+    """
+    Base class for stores of the content hashes of documents sent to app search.
+
+    Hashes are kept per engine and document ID.
+    """
+
+    def get_many(self, engine_name, document_ids):
+        """
+        Get the stored hashes of documents.
+
+        Args:
+            engine_name (str): The engine the documents were sent to.
+            document_ids (list of str): The app search document IDs.
+
+        Returns:
+            dict of str: str: The hashes found, by document ID.
+        """
+        raise NotImplementedError
+
+    def set_many(self, engine_name, hashes):
+        """
+        Store the hashes of documents.
+
+        Args:
+            engine_name (str): The engine the documents were sent to.
+            hashes (dict of str: str): The hashes, by document ID.
+        """
+        raise NotImplementedError
+
+    def delete_many(self, engine_name, document_ids):
+        """
+        Forget the hashes of documents.
+
+        Args:
+            engine_name (str): The engine the documents were sent to.
+            document_ids (list of str): The app search document IDs.
+        """
+        raise NotImplementedError
+
+
+class CacheHashStore(BaseHashStore):
+    """
+    Keep the hashes in a Django cache.
+
+    Subclass it to change `cache_alias` or `timeout`.
+    """
+
+    cache_alias = 'default'
+    timeout = None
+
+    def _make_key(self, engine_name, document_id):
+        """Return the cache key of a document's hash."""
+        return 'appsearch_hash:{}:{}'.format(engine_name, document_id)
+
+    def get_many(self, engine_name, document_ids):
+        """Get the stored hashes of documents."""
+        keys = {self._make_key(engine_name, document_id): document_id for document_id in document_ids}
+        return {keys[key]: value for key, value in caches[self.cache_alias].get_many(list(keys)).items()}
+
+    def set_many(self, engine_name, hashes):
+        """Store the hashes of documents."""
+        caches[self.cache_alias].set_many(
+            {self._make_key(engine_name, document_id): value for document_id, value in hashes.items()},
+            timeout=self.timeout
+        )
+
+    def delete_many(self, engine_name, document_ids):
+        """Forget the hashes of documents."""
+        caches[self.cache_alias].delete_many(
+            [self._make_key(engine_name, document_id) for document_id in document_ids]
+        )
+
+
+class DatabaseHashStore(BaseHashStore):
+    """Keep the hashes in a database table, run `migrate` to create it."""
+
+    @property
+    def model(self):
+        """Return the document hash model."""
+        # Looked up lazily, as the models module imports the buffer which imports this module
+        return apps.get_model('django_elastic_appsearch', 'DocumentHash')
+
+    def get_many(self, engine_name, document_ids):
+        """Get the stored hashes of documents."""
+        return dict(
+            self.model.objects.filter(
+                engine_name=engine_name, document_id__in=document_ids
+            ).values_list('document_id', 'content_hash')
+        )
+
+    def set_many(self, engine_name, hashes):
+        """
+        Store the hashes of documents.
+
+        Existing hashes are updated in place with a single upsert, so
+        concurrent writers of the same documents don't collide on the unique
+        constraint. Databases or Django versions without upserts update or
+        create each hash in turn instead.
+        """
+        connection = connections[router.db_for_write(self.model)]
+        if getattr(connection.features, 'supports_update_conflicts_with_target', False):
+            self.model.objects.bulk_create(
+                [
+                    self.model(engine_name=engine_name, document_id=document_id, content_hash=value)
+                    for document_id, value in hashes.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['engine_name', 'document_id'],
+                update_fields=['content_hash']
+            )
+            return
+
+        with transaction.atomic(using=connection.alias):
+            for document_id, value in hashes.items():
+                self.model.objects.update_or_create(
+                    engine_name=engine_name, document_id=document_id, defaults={'content_hash': value}
+                )
+
+    def delete_many(self, engine_name, document_ids):
+        """Forget the hashes of documents."""
+        self.model.objects.filter(engine_name=engine_name, document_id__in=document_ids).delete()
+
+
+class LocalMemoryHashStore(BaseHashStore):
+    """
+    Keep the hashes in memory, for this process only.
+
+    The least recently used hashes are dropped once there are more than
+    `max_size`. Subclass it to change `max_size`.
+    """
+
+    max_size = 100000
+
+    def __init__(self):
+        """Initialise an empty store."""
+        self._hashes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, engine_name, document_ids):
+        """Get the stored hashes of documents."""
+        found = {}
+        with self._lock:
+            for document_id in document_ids:
+                key = (engine_name, document_id)
+                if key in self._hashes:
+                    self._hashes.move_to_end(key)
+                    found[document_id] = self._hashes[key]
+        return found
+
+    def set_many(self, engine_name, hashes):
+        """Store the hashes of documents."""
+        with self._lock:
+            for document_id, value in hashes.items():
+                key = (engine_name, document_id)
+                self._hashes[key] = value
+                self._hashes.move_to_end(key)
+            while len(self._hashes) > self.max_size:
+                self._hashes.popitem(last=False)
+
+    def delete_many(self, engine_name, document_ids):
+        """Forget the hashes of documents."""
+        with self._lock:
+            for document_id in document_ids:
+                self._hashes.pop((engine_name, document_id), None)
+
+
+class HashCounters:
+    """Counts of the documents sent and skipped as unchanged, for this process."""
+
+    def __init__(self):
+        """Initialise the counts to zero."""
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.skipped = 0
+
+    def add(self, sent=0, skipped=0):
+        """Add to the counts."""
+        with self._lock:
+            self.sent += sent
+            self.skipped += skipped
+
+    def reset(self):
+        """Set the counts back to zero."""
+        with self._lock:
+            self.sent = 0
+            self.skipped = 0
+
+
+counters = HashCounters()
+
+# Stores are shared by all threads in a process, so in memory stores persist
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def clear_hash_store_cache():
+    """Drop the shared stores, along with the hashes held by in memory stores."""
+    with _stores_lock:
+        _stores.clear()
+
+
+@receiver(setting_changed)
+def _clear_hash_store_cache_on_setting_changed(setting, **kwargs):
+    """Drop the shared stores when app search settings change."""
+    if setting.startswith('APPSEARCH_'):
+        clear_hash_store_cache()
+
+
+def get_hash_store():
+    """Return the store configured with `APPSEARCH_HASH_STORE`, or None if it isn't set."""
+    path = apps.get_app_config('django_elastic_appsearch').hash_store
+    if path is None:
+        return None
+
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = import_string(path)()
+    return store
+
+
+def skip_unchanged(engine_name, documents, force=False):
+    """
+    Leave out the documents that haven't changed since they were last sent.
+
+    Args:
+        engine_name (str): The engine the documents are being sent to.
+        documents (list of dict): The serialised documents.
+        force (bool): Send every document, even if it hasn't changed.
+
+    Returns:
+        (list of dict, dict of str: str): The documents to send, and their
+            hashes by document ID to pass to `record_sent` once they're sent.
+    """
+    store = get_hash_store()
+    if store is None:
+        return documents, {}
+
+    hashes = {document['id']: hash_document(document) for document in documents if 'id' in document}
+    stored = {} if force else store.get_many(engine_name, list(hashes))
+    changed = [
+        document for document in documents
+        if 'id' not in document or stored.get(document['id']) != hashes[document['id']]
+    ]
+
+    counters.add(skipped=len(documents) - len(changed))
+    return changed, {
+        document['id']: hashes[document['id']] for document in changed if 'id' in document
+    }
+
+
+def record_sent(engine_name, hashes, responses):
+    """
+    Store the hashes of sent documents, except the ones app search rejected.
+
+    Args:
+        engine_name (str): The engine the documents were sent to.
+        hashes (dict of str: str): The hashes returned by `skip_unchanged`.
+        responses (list of dict): App search's response for each document.
+    """
+    store = get_hash_store()
+    if store is None:
+        return
+
+    rejected = {response.get('id') for response in responses if response.get('errors')}
+    store.set_many(engine_name, {
+        document_id: value for document_id, value in hashes.items() if document_id not in rejected
+    })
+    counters.add(sent=len(hashes))
+
+
+def forget_documents(engine_name, document_ids):
+    """
+    Forget the hashes of deleted or partially updated documents.
+
+    Args:
+        engine_name (str): The engine the documents are in.
+        document_ids (list of str): The app search document IDs.
+    """
+    store = get_hash_store()
+    if store is not None and document_ids:
+        store.delete_many(engine_name, list(document_ids))
@@ -0,0 +1,94 @@
+"""Sync the objects changed since the last sync to app search."""
+
+from datetime import timedelta
+
+from django.apps import apps
+from django.utils import timezone
+
+from django_elastic_appsearch.models import SyncWatermark
+
+
+def get_sync_since(model, engine_names):
+    """
+    Get when to sync the objects of a model changed since, to bring its engines up to date.
+
+    Each engine has a watermark of its own, so the objects are read once
+    from the earliest of them for all the engines. The watermarks are moved
+    back by `APPSEARCH_SYNC_LAG` seconds, so objects stamped by a clock that's
+    behind, or saved in a transaction that hadn't committed yet when the
+    last sync read past them, are picked up.
+
+    Args:
+        model (class): The app search model class.
+        engine_names (list of str): The engines documents are written to.
+
+    Returns:
+        datetime: The time to sync the objects changed since, or None if an
+            engine hasn't been synced yet.
+    """
+    watermarks = dict(SyncWatermark.objects.filter(
+        model_label=model._meta.label, engine_name__in=engine_names
+    ).values_list('engine_name', 'synced_until'))
+    if not engine_names or set(engine_names) - set(watermarks):
+        return None
+    lag = apps.get_app_config('django_elastic_appsearch').sync_lag
+    return min(watermarks.values()) - timedelta(seconds=lag)
+
+
+def sync_model(model, incremental=True, workers=None, force=False):
+    """
+    Sync the objects of a model to app search, and record how far each engine has been synced.
+
+    The next incremental sync then only reads the objects changed since,
+    so its cost follows the rate objects change rather than the size of
+    the table. Deleted objects aren't seen by incremental syncs, delete them
+    from app search as they're deleted, or use `appsearch_reconcile`.
+
+    The watermarks are only moved on once the sync finishes. Documents app
+    search rejected don't hold them back, as they'd be rejected again until
+    their objects change.
+
+    Args:
+        model (class): The app search model class, with an
+            `appsearch_updated_field`.
+        incremental (bool): Only sync the objects changed since the last sync.
+            Engines that haven't been synced yet are synced in full.
+        workers (int): Optional, the number of chunks to send to app search
+            concurrently. Defaults to the `APPSEARCH_MAX_WORKERS` setting.
+        force (bool): Send documents that haven't changed since they were last
+            sent, when `APPSEARCH_HASH_STORE` is set.
+
+    Returns:
+        (dict, datetime): The number of documents that `succeeded`, `failed`
+            and were `retried`, and when the objects were synced changed
+            since, or None for a full sync.
+
+    Raises:
+        ValueError: If the model has no `appsearch_updated_field`.
+    """
+    if model.get_appsearch_updated_field() is None:
+        raise ValueError('{} has no appsearch_updated_field.'.format(model._meta.label))
+
+    engine_names = [engine_name for (_, engine_name) in model.get_appsearch_write_engine_pairs()]
+    # Objects changed from here on are left to the next sync
+    started = timezone.now()
+    since = get_sync_since(model, engine_names) if incremental else None
+
+    queryset = model._default_manager.all()
+    if since is None:
+        batch_responses = queryset.iter_index_to_appsearch(workers=workers, force=force)
+    else:
+        batch_responses = queryset.iter_index_changed_since(since, workers=workers, force=force)
+
+    # Only the counts are kept, so a full sync doesn't hold every response
+    counts = {'succeeded': 0, 'failed': 0, 'retried': 0}
+    for _, responses in batch_responses:
+        counts['succeeded'] += responses.succeeded
+        counts['failed'] += responses.failed
+        counts['retried'] += responses.retried
+
+    for engine_name in engine_names:
+        SyncWatermark.objects.update_or_create(
+            model_label=model._meta.label, engine_name=engine_name, defaults={'synced_until': started}
+        )
+    return counts, since
@@ -0,0 +1 @@
+"""Django App Search management commands."""
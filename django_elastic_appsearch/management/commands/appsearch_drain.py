@@ -0,0 +1,61 @@
+"""Drain the app search outbox."""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from django_elastic_appsearch.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    """Send pending outbox entries to app search."""
+
+    help = 'Send pending outbox entries to app search, retrying failures with a backoff.'
+
+    def add_arguments(self, parser):
+        """Add the command arguments."""
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='The number of entries to claim at a time. Defaults to APPSEARCH_CHUNK_SIZE.'
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=10,
+            help='The number of times to attempt an entry before giving up on it.'
+        )
+        parser.add_argument(
+            '--retry-delay', type=int, default=5,
+            help='Seconds to wait before retrying a failed entry, doubled for each retry.'
+        )
+        parser.add_argument(
+            '--max-retry-delay', type=int, default=3600,
+            help='The longest to wait before retrying a failed entry, in seconds.'
+        )
+        parser.add_argument(
+            '--lease-time', type=int, default=300,
+            help='Seconds before claimed entries are retried if this worker doesn\'t finish them.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1,
+            help='Seconds to wait before checking for new entries when the outbox is empty.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once there are no entries due, instead of waiting for new ones.'
+        )
+
+    def handle(self, *args, **options):
+        """Drain the outbox until it's empty, or forever."""
+        while True:
+            sent, failed = drain_outbox(
+                batch_size=options['batch_size'],
+                max_attempts=options['max_attempts'],
+                retry_delay=options['retry_delay'],
+                max_retry_delay=options['max_retry_delay'],
+                lease_time=options['lease_time']
+            )
+            if sent or failed:
+                self.stdout.write('Sent {} entries, {} failed.'.format(sent, failed))
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['poll_interval'])
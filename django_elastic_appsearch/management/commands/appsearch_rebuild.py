@@ -0,0 +1,67 @@
+"""Rebuild the app search engine of a model without any downtime."""
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from django_elastic_appsearch.engines import rebuild_engine
+
+
+class Command(BaseCommand):
+    """Rebuild the app search engine of a model into a new engine and switch its alias over."""
+
+    help = 'Rebuild the app search engine of a model into a new versioned engine, then switch its alias over.'
+
+    def add_arguments(self, parser):
+        """Add the command arguments."""
+        parser.add_argument('model', help='The model to rebuild the engine of, as app_label.ModelName.')
+        parser.add_argument(
+            '--engine', default=None,
+            help='The engine to rebuild. Required if the model is indexed to more than one engine.'
+        )
+        parser.add_argument(
+            '--meta-engine', default=None,
+            help='A meta engine to switch over to the new engine along with the alias.'
+        )
+        parser.add_argument(
+            '--keep-old', action='store_true',
+            help="Don't delete the old engine once the alias has switched over."
+        )
+        parser.add_argument(
+            '--no-verify', action='store_true',
+            help="Don't check the document count of the new engine before switching over."
+        )
+        parser.add_argument(
+            '--verify-timeout', type=int, default=60,
+            help='Seconds to wait for the document count of the new engine to catch up.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='The number of chunks to send concurrently. Defaults to APPSEARCH_MAX_WORKERS.'
+        )
+
+    def handle(self, *args, **options):
+        """Rebuild the engine."""
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as error:
+            raise CommandError(str(error))
+
+        if not apps.get_app_config('django_elastic_appsearch').enabled:
+            raise CommandError('App search indexing is disabled.')
+
+        try:
+            engine_name = rebuild_engine(
+                model,
+                engine_name=options['engine'],
+                meta_engine_name=options['meta_engine'],
+                retire=not options['keep_old'],
+                verify=not options['no_verify'],
+                verify_timeout=options['verify_timeout'],
+                workers=options['workers'],
+                report=self.stdout.write
+            )
+        except (ImproperlyConfigured, ValueError, RuntimeError) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS('{} is now live.'.format(engine_name)))
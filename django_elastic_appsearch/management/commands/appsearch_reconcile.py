@@ -0,0 +1,82 @@
+"""Reconcile app search engines with the database."""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from django_elastic_appsearch.reconcile import reconcile_engine
+
+
+class Command(BaseCommand):
+    """Index the objects missing from app search, and delete the documents of deleted objects."""
+
+    help = (
+        'Compare the documents in app search with the objects in the database, indexing the objects missing '
+        'from app search and deleting the documents of objects that no longer exist.'
+    )
+
+    def add_arguments(self, parser):
+        """Add the command arguments."""
+        parser.add_argument('model', help='The model to reconcile, as app_label.ModelName.')
+        parser.add_argument(
+            '--engine', default=None,
+            help='Only reconcile this engine. Defaults to all the engines of the model.'
+        )
+        parser.add_argument(
+            '--keyset-field', default=None,
+            help='A number or date field every document has, to page through engines with more than 10,000 '
+                 'documents by.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='The number of chunks to send concurrently. Defaults to APPSEARCH_MAX_WORKERS.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report the differences, without repairing them.'
+        )
+
+    def handle(self, *args, **options):
+        """Reconcile each engine of the model."""
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as error:
+            raise CommandError(str(error))
+
+        engine_names = [engine_name for (_, engine_name) in model.get_appsearch_serialiser_engine_pairs()]
+        if options['engine'] is not None:
+            if options['engine'] not in engine_names:
+                raise CommandError('{} is not indexed to the {} engine.'.format(model._meta.label, options['engine']))
+            engine_names = [options['engine']]
+        engine_names = [
+            write_engine_name for engine_name in engine_names
+            for write_engine_name in model.get_appsearch_write_engine_names(engine_name)
+        ]
+
+        config = apps.get_app_config('django_elastic_appsearch')
+        if not config.enabled:
+            raise CommandError('App search indexing is disabled.')
+        workers = options['workers'] if options['workers'] is not None else config.max_workers
+
+        failed = 0
+        for engine_name in engine_names:
+            try:
+                counts = reconcile_engine(
+                    model._default_manager.all(), engine_name,
+                    keyset_field=options['keyset_field'],
+                    dry_run=options['dry_run'],
+                    workers=workers
+                )
+            except ValueError as error:
+                raise CommandError(str(error))
+
+            self.stdout.write(self.style.SUCCESS(
+                '{}: {} documents, {} objects, {} missing {}, {} orphaned {}.'.format(
+                    engine_name, counts['documents'], counts['objects'],
+                    counts['missing'], 'found' if options['dry_run'] else 'indexed',
+                    counts['orphaned'], 'found' if options['dry_run'] else 'deleted'
+                )
+            ))
+            failed += counts['failed']
+
+        if failed:
+            raise CommandError('App search rejected {} documents.'.format(failed))
@@ -0,0 +1,202 @@
+"""Reindex a model to app search."""
+
+import json
+import multiprocessing
+import os
+import queue
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.dateparse import parse_datetime
+
+from django_elastic_appsearch.reindex import partition_queryset, reindex_partition
+
+
+def _run_partition(queryset, index, after, until, engine_names, workers, force, messages):
+    """Reindex a partition in a child process, reporting progress on a queue."""
+    try:
+        reindex_partition(
+            queryset, after, until, engine_names,
+            lambda last_pk, count, errors: messages.put((index, last_pk, count, errors)),
+            workers=workers,
+            force=force
+        )
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """Reindex a model to app search."""
+
+    help = 'Reindex all the objects of a model to app search, split into partitions indexed in parallel.'
+
+    def add_arguments(self, parser):
+        """Add the command arguments."""
+        parser.add_argument('model', help='The model to reindex, as app_label.ModelName.')
+        parser.add_argument(
+            '--engine', default=None,
+            help='Only reindex to this engine. Defaults to all the engines of the model.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='The number of chunks each process sends concurrently. Defaults to APPSEARCH_MAX_WORKERS.'
+        )
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='The number of partitions to split the model into, each reindexed in its own process.'
+        )
+        parser.add_argument(
+            '--since', default=None,
+            help='Only reindex objects changed since this ISO 8601 date and time.'
+        )
+        parser.add_argument(
+            '--since-field', default=None,
+            help='The field holding when objects were last changed, used with --since. Defaults to the '
+                 "model's appsearch_updated_field, or updated_at."
+        )
+        parser.add_argument(
+            '--checkpoint', default=None,
+            help='The file to save progress to. Defaults to appsearch_reindex_<app_label>_<model>.json.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Send every object, even if it hasn't changed since it was last sent."
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Resume the reindex saved in the checkpoint file instead of starting over.'
+        )
+
+    def handle(self, *args, **options):
+        """Reindex the model."""
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as error:
+            raise CommandError(str(error))
+
+        engine_names = [engine_name for (_, engine_name) in model.get_appsearch_serialiser_engine_pairs()]
+        if options['engine'] is not None:
+            if options['engine'] not in engine_names:
+                raise CommandError('{} is not indexed to the {} engine.'.format(model._meta.label, options['engine']))
+            engine_names = [options['engine']]
+        engine_names = [
+            write_engine_name for engine_name in engine_names
+            for write_engine_name in model.get_appsearch_write_engine_names(engine_name)
+        ]
+
+        queryset = model._default_manager.all()
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError('--since must be an ISO 8601 date and time.')
+            since_field = options['since_field'] or model.get_appsearch_updated_field() or 'updated_at'
+            queryset = queryset.filter(**{'{}__gte'.format(since_field): since})
+
+        config = apps.get_app_config('django_elastic_appsearch')
+        if not config.enabled:
+            raise CommandError('App search indexing is disabled.')
+        workers = options['workers'] if options['workers'] is not None else config.max_workers
+
+        checkpoint_path = options['checkpoint'] or 'appsearch_reindex_{}_{}.json'.format(
+            model._meta.app_label, model._meta.model_name
+        )
+        checkpoint = {
+            'model': model._meta.label,
+            'engines': engine_names,
+            'since': options['since'],
+        }
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as checkpoint_file:
+                saved_checkpoint = json.load(checkpoint_file)
+            if {key: saved_checkpoint.get(key) for key in checkpoint} != checkpoint:
+                raise CommandError('The checkpoint in {} is for a different reindex.'.format(checkpoint_path))
+            checkpoint = saved_checkpoint
+            self.stdout.write('Resuming the reindex saved in {}.'.format(checkpoint_path))
+        else:
+            checkpoint['partitions'] = partition_queryset(queryset, max(options['processes'], 1))
+        self._save_checkpoint(checkpoint_path, checkpoint)
+
+        failed = self._reindex(queryset, checkpoint, checkpoint_path, engine_names, workers, options['force'])
+
+        os.remove(checkpoint_path)
+        if failed:
+            raise CommandError('App search rejected {} documents.'.format(failed))
+
+    def _save_checkpoint(self, path, checkpoint):
+        """Save the progress of the reindex, so it can be resumed."""
+        with open(path + '.tmp', 'w') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(path + '.tmp', path)
+
+    def _reindex(self, queryset, checkpoint, checkpoint_path, engine_names, workers, force):
+        """
+        Reindex the partitions in the checkpoint, in parallel if there's more than one.
+
+        Returns:
+            int: The number of documents app search rejected.
+        """
+        partitions = [
+            (index, after, until) for (index, (after, until)) in enumerate(checkpoint['partitions'])
+            if until is None or after is None or after < until
+        ]
+        started = last_reported = time.time()
+        indexed = failed = 0
+
+        def record_progress(index, last_pk, count, errors):
+            nonlocal indexed, failed, last_reported
+            checkpoint['partitions'][index][0] = last_pk
+            self._save_checkpoint(checkpoint_path, checkpoint)
+            indexed += count
+            failed += len(errors)
+            for document_id, document_errors in errors.items():
+                self.stderr.write('App search rejected {}: {}'.format(document_id, '; '.join(document_errors)))
+            now = time.time()
+            if now - last_reported >= 1:
+                last_reported = now
+                self.stdout.write('Indexed {} objects ({:.0f} per second).'.format(indexed, indexed / (now - started)))
+
+        if len(partitions) <= 1:
+            for (index, after, until) in partitions:
+                reindex_partition(
+                    queryset, after, until, engine_names,
+                    lambda last_pk, count, errors, index=index: record_progress(index, last_pk, count, errors),
+                    workers=workers,
+                    force=force
+                )
+        else:
+            self._reindex_in_processes(queryset, partitions, engine_names, workers, force, record_progress)
+
+        elapsed = max(time.time() - started, 0.001)
+        self.stdout.write(self.style.SUCCESS(
+            'Indexed {} objects in {:.1f} seconds ({:.0f} per second).'.format(indexed, elapsed, indexed / elapsed)
+        ))
+        return failed
+
+    def _reindex_in_processes(self, queryset, partitions, engine_names, workers, force, record_progress):
+        """Reindex each partition in its own process."""
+        # Each process opens its own database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        messages = context.Queue()
+        processes = [
+            context.Process(
+                target=_run_partition,
+                args=(queryset, index, after, until, engine_names, workers, force, messages)
+            )
+            for (index, after, until) in partitions
+        ]
+        for process in processes:
+            process.start()
+
+        while any(process.is_alive() for process in processes) or not messages.empty():
+            try:
+                record_progress(*messages.get(timeout=0.5))
+            except queue.Empty:
+                pass
+
+        for process in processes:
+            process.join()
+        if any(process.exitcode for process in processes):
+            raise CommandError('Reindexing failed, run the command again with --resume to continue.')
@@ -0,0 +1,55 @@
+"""Sync models to app search."""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from django_elastic_appsearch.incremental import sync_model
+
+
+class Command(BaseCommand):
+    """Sync models to app search, optionally only the objects changed since the last sync."""
+
+    help = (
+        'Sync models to app search, recording how far each engine has been synced so the next sync with '
+        '--incremental only sends the objects changed since.'
+    )
+
+    def add_arguments(self, parser):
+        """Add the command arguments."""
+        parser.add_argument('models', nargs='+', help='The models to sync, as app_label.ModelName.')
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Only sync the objects changed since the last sync.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='The number of chunks to send concurrently. Defaults to APPSEARCH_MAX_WORKERS.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Send every object, even if it hasn't changed since it was last sent."
+        )
+
+    def handle(self, *args, **options):
+        """Sync each model."""
+        try:
+            models = [apps.get_model(label) for label in options['models']]
+        except (LookupError, ValueError) as error:
+            raise CommandError(str(error))
+
+        if not apps.get_app_config('django_elastic_appsearch').enabled:
+            raise CommandError('App search indexing is disabled.')
+
+        for model in models:
+            try:
+                counts, since = sync_model(
+                    model, incremental=options['incremental'], workers=options['workers'], force=options['force']
+                )
+            except ValueError as error:
+                raise CommandError(str(error))
+
+            self.stdout.write(self.style.SUCCESS('Synced {} documents of {}{}, {} failed.'.format(
+                counts['succeeded'], model._meta.label,
+                '' if since is None else ' changed since {}'.format(since.isoformat()),
+                counts['failed']
+            )))
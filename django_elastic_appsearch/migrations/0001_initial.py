@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:29
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('engine_name', models.CharField(max_length=255)),
+                ('document_id', models.CharField(max_length=255)),
+                ('operation', models.CharField(choices=[('index', 'Index'), ('delete', 'Delete')], max_length=10)),
+                ('model_label', models.CharField(max_length=255)),
+                ('object_pk', models.CharField(max_length=255)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('available_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'outbox entries',
+                'unique_together': {('engine_name', 'document_id')},
+            },
+        ),
+    ]
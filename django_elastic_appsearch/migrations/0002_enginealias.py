@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_elastic_appsearch', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngineAlias',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('engine_name', models.CharField(max_length=255)),
+                ('next_engine_name', models.CharField(blank=True, max_length=255)),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'engine aliases',
+            },
+        ),
+    ]
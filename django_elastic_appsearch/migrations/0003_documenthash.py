@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_elastic_appsearch', '0002_enginealias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentHash',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('engine_name', models.CharField(max_length=255)),
+                ('document_id', models.CharField(max_length=255)),
+                ('content_hash', models.CharField(max_length=40)),
+            ],
+            options={
+                'unique_together': {('engine_name', 'document_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_elastic_appsearch', '0003_documenthash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncWatermark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=255)),
+                ('engine_name', models.CharField(max_length=255)),
+                ('synced_until', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('model_label', 'engine_name')},
+            },
+        ),
+    ]
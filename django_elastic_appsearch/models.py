@@ -0,0 +1,93 @@
+"""Django App Search models."""
+
+from django.db import models
+from django.utils import timezone
+
+from django_elastic_appsearch.buffer import DELETE, INDEX
+
+
+class OutboxEntry(models.Model):
+    """A pending app search operation on a document, waiting to be drained."""
+
+    OPERATION_CHOICES = (
+        (INDEX, 'Index'),
+        (DELETE, 'Delete'),
+    )
+
+    engine_name = models.CharField(max_length=255)
+    document_id = models.CharField(max_length=255)
+    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
+    model_label = models.CharField(max_length=255)
+    object_pk = models.CharField(max_length=255)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now, db_index=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Meta options for the outbox entry."""
+
+        unique_together = (('engine_name', 'document_id'),)
+        verbose_name_plural = 'outbox entries'
+
+    def __str__(self):
+        """Describe the entry."""
+        return '{} {} in {}'.format(self.operation, self.document_id, self.engine_name)
+
+
+class EngineAlias(models.Model):
+    """
+    Maps the engine name models are configured with to the engines behind it.
+
+    Models write to the live engine, and to the next engine while it's being
+    rebuilt. Searches go to the live engine.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    engine_name = models.CharField(max_length=255)
+    next_engine_name = models.CharField(max_length=255, blank=True)
+    version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """Meta options for the engine alias."""
+
+        verbose_name_plural = 'engine aliases'
+
+    def __str__(self):
+        """Describe the alias."""
+        return '{} -> {}'.format(self.name, self.engine_name)
+
+
+class DocumentHash(models.Model):
+    """The content hash of a document last sent to an engine."""
+
+    engine_name = models.CharField(max_length=255)
+    document_id = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=40)
+
+    class Meta:
+        """Meta options for the document hash."""
+
+        unique_together = (('engine_name', 'document_id'),)
+
+    def __str__(self):
+        """Describe the hash."""
+        return '{} in {}'.format(self.document_id, self.engine_name)
+
+
+class SyncWatermark(models.Model):
+    """How far the objects of a model have been synced to an engine, by when they last changed."""
+
+    model_label = models.CharField(max_length=255)
+    engine_name = models.CharField(max_length=255)
+    synced_until = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Meta options for the sync watermark."""
+
+        unique_together = (('model_label', 'engine_name'),)
+
+    def __str__(self):
+        """Describe the watermark."""
+        return '{} in {} until {}'.format(self.model_label, self.engine_name, self.synced_until)
@@ -1,56 +1,852 @@
 """ORM features for Elastic App Search."""
 
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
 from django.apps import apps
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Max, Q
+from django.db.models.deletion import Collector
+
+from django_elastic_appsearch.batching import DocumentPacker, iter_chunks, pack_documents
+from django_elastic_appsearch.buffer import DELETE, get_active_buffer, transaction_buffer
+from django_elastic_appsearch.cache import invalidate_search_cache
+from django_elastic_appsearch.clients import (
+    get_api_v1_async_enterprise_search_client,
+    get_api_v1_enterprise_search_client
+)
+from django_elastic_appsearch.engines import get_write_engine_names
+from django_elastic_appsearch.executors import fan_out, ordered_map
+from django_elastic_appsearch.hashes import forget_documents, record_sent, skip_unchanged
+from django_elastic_appsearch.planner import plan_queryset, prepare_chunks
+from django_elastic_appsearch.retries import (
+    BulkResults,
+    acall_with_retries,
+    asend_documents_with_retries,
+    call_with_retries,
+    send_documents_with_retries
+)
+from django_elastic_appsearch.search import ModelSearchDescriptor, SearchResults
+from django_elastic_appsearch.slicer import keyset_slice_queryset
+from django_elastic_appsearch.sync import get_sync_processor
+from django_elastic_appsearch.throttle import bulk_priority
+from django_elastic_appsearch.values import ID_FIELD, _is_inherited, compile_update_plan, get_values_serialiser
+
+logger = logging.getLogger(__name__)
+
+
+def _prepare_engine_batches(engine_names, engine_documents, update_only=False, force=False):
+    """
+    Prepare the documents serialised for each engine to be sent.
+
+    Args:
+        engine_names (list of str): The engines the documents are sent to.
+        engine_documents (list of list of dict): The documents for each engine,
+            in the same order.
+        update_only (bool): The documents are partial updates.
+        force (bool): Send documents that haven't changed since they were last
+            sent, when `APPSEARCH_HASH_STORE` is set.
+
+    Returns:
+        list of (list of dict, dict): The documents to send to each engine,
+            and their content hashes, as returned by `skip_unchanged`.
+    """
+    batches = []
+    for engine_name, documents in zip(engine_names, engine_documents):
+        if update_only:
+            # The stored hashes are of whole documents, not partial updates
+            forget_documents(engine_name, [document['id'] for document in documents])
+            batches.append((documents, {}))
+        else:
+            batches.append(skip_unchanged(engine_name, documents, force=force))
+    return batches
+
+
+def _merge_engine_responses(engine_responses):
+    """Merge the results of each engine into one, by engine, in order."""
+    responses = BulkResults()
+    for engine_results in engine_responses.values():
+        responses.merge(engine_results)
+    return responses
+
+
+def _delete_document_id_chunks(model, document_id_chunks, workers):
+    """
+    Delete chunks of documents from all the engines of a model.
+
+    Args:
+        model (class): The app search model class.
+        document_id_chunks (iterable of list of str): The document IDs, a chunk
+            at a time.
+        workers (int): The number of chunks to send concurrently.
+
+    Returns:
+        BulkResults: app search's response for each document, by engine,
+            in order.
+    """
+    engine_names = [engine_name for (_, engine_name) in model.get_appsearch_write_engine_pairs()]
+    client = model.get_enterprise_search_appsearch_client()
+
+    def delete_documents(batch):
+        engine_name, document_ids = batch
+        with bulk_priority():
+            response, retries = call_with_retries(
+                client.delete_documents, engine_name=engine_name, document_ids=document_ids
+            )
+        return response, len(document_ids) if retries else 0
+
+    def prepare_batches(document_ids):
+        for engine_name in engine_names:
+            forget_documents(engine_name, document_ids)
+        return [(engine_name, document_ids) for engine_name in engine_names]
 
-from django_elastic_appsearch.clients import get_api_v1_enterprise_search_client
-from django_elastic_appsearch.slicer import slice_queryset
+    # Each chunk is deleted from all the engines at once
+    engine_responses = {engine_name: BulkResults() for engine_name in engine_names}
+    for batches, chunk_responses in ordered_map(
+        lambda batches: (batches, fan_out(delete_documents, batches)),
+        (prepare_batches(document_ids) for document_ids in document_id_chunks),
+        workers
+    ):
+        for (engine_name, _), (response, retried) in zip(batches, chunk_responses):
+            engine_responses[engine_name].add(response, retried)
+        invalidate_search_cache(engine_names)
+
+    return _merge_engine_responses(engine_responses)
+
+
+class _AppSearchCollector(Collector):
+    """
+    Collects the objects deleted along with a queryset, and the app search documents to delete with them.
+
+    Django deletes objects without fetching them when it can. The objects of
+    app search models are fetched instead, once, so their document IDs are
+    known.
+    """
+
+    def can_fast_delete(self, objs, from_field=None):
+        """Check whether objects can be deleted without fetching them, never for app search models."""
+        model = objs._meta.model if hasattr(objs, '_meta') else getattr(objs, 'model', None)
+        if model is not None and issubclass(model, BaseAppSearchModel):
+            return False
+        return super().can_fast_delete(objs, from_field=from_field)
+
+    def get_appsearch_deletes(self):
+        """
+        Get the documents of the collected objects of app search models.
+
+        Returns:
+            list of (list of str, list of str): The engines, and the IDs of
+                the documents to delete from them.
+        """
+        deletes = []
+        for model, instances in self.data.items():
+            # Models with auto sync turned on delete their documents as their objects are deleted
+            if not issubclass(model, BaseAppSearchModel) or model.get_appsearch_auto_sync():
+                continue
+            document_ids = model.get_appsearch_document_ids([instance.pk for instance in instances])
+            if document_ids is None:
+                document_ids = [instance.get_appsearch_document_id() for instance in instances]
+            engine_names = [engine_name for (_, engine_name) in model.get_appsearch_write_engine_pairs()]
+            deletes.append((engine_names, document_ids))
+        return deletes
 
 
 class AppSearchQuerySet(models.QuerySet):
     """A queryset that supports Elastic App Search functions."""
 
-    def _get_sliced_queryset(self):
-        """Return the sliced queryset."""
+    def _get_sliced_queryset(self, ordering=None):
+        """Return the queryset sliced into chunks of model objects, paged over the ordering key by default."""
         chunk_size = apps.get_app_config('django_elastic_appsearch').chunk_size
-        return slice_queryset(self, chunk_size)
+        return keyset_slice_queryset(
+            self,
+            chunk_size,
+            ordering=ordering or self.model.get_appsearch_ordering_key()
+        )
 
-    def delete_from_appsearch(self):
-        """Delete from appsearch."""
-        responses = []
-        if self and apps.get_app_config('django_elastic_appsearch').enabled:
-            for (_, engine_name) in self.first().get_appsearch_serialiser_engine_pairs():
-                client = self.first().get_enterprise_search_appsearch_client()
-                slices = self._get_sliced_queryset()
-                for queryset in slices:
-                    responses += client.delete_documents(
-                        engine_name=engine_name,
-                        document_ids=[item.get_appsearch_document_id() for item in queryset]
-                    )
+    def _get_pk_document_id_chunks(self, ordering=None):
+        """
+        Return the primary keys and document IDs of the queryset, a chunk at a time.
 
-        return responses
+        Only the primary keys are fetched when the model can work out its
+        document IDs from them, see `get_appsearch_document_ids`. Otherwise
+        the objects are paged over `ordering`, the model's
+        `appsearch_ordering_key` by default.
+        """
+        model = self.model
+        if model.get_appsearch_document_ids([]) is None:
+            return (
+                [(item.pk, item.get_appsearch_document_id()) for item in chunk]
+                for chunk in self._get_sliced_queryset(ordering)
+            )
+
+        chunk_size = apps.get_app_config('django_elastic_appsearch').chunk_size
+        return (
+            list(zip(pks, model.get_appsearch_document_ids(pks)))
+            for pks in keyset_slice_queryset(self.values_list('pk', flat=True), chunk_size, key=lambda pk: pk)
+        )
+
+    def _get_document_id_chunks(self):
+        """Return the document IDs of the queryset, a chunk at a time, see `_get_pk_document_id_chunks`."""
+        return ([document_id for (_, document_id) in chunk] for chunk in self._get_pk_document_id_chunks())
+
+    def _get_serialisable_chunks(self, engine_names, ordering=None):
+        """
+        Return the queryset sliced into chunks to serialise for some engines.
+
+        When the serialisers only read model fields, chunks are rows of the
+        values they read instead of model objects. Chunks are paged over
+        `ordering`, the model's `appsearch_ordering_key` by default.
+
+        Returns:
+            (iterable of list, callable): The chunks, and a function called with
+                a chunk, returning its documents for each engine, in the same
+                order as the engines.
+        """
+        values_serialiser = get_values_serialiser(self.model, engine_names)
+        if values_serialiser is not None:
+            chunk_size = apps.get_app_config('django_elastic_appsearch').chunk_size
+            chunks = values_serialiser.slice_queryset(self, chunk_size, ordering=ordering)
+            serialise = values_serialiser.serialise_for_engines
+        else:
+            chunks = plan_queryset(self, engine_names, ordering)._get_sliced_queryset(ordering)
+
+            def serialise(item, engine_names):
+                return item._serialise_for_engines(engine_names)
+
+        def serialise_chunk(chunk):
+            documents = [[] for _ in engine_names]
+            for item in chunk:
+                # Serialisers shared between engines run once for each item
+                for (engine_documents, item_documents) in zip(documents, serialise(item, engine_names)):
+                    engine_documents += item_documents
+            return documents
+
+        return chunks, serialise_chunk
+
+    def search(self, query, **kwargs):
+        """
+        Search the model's engine, with the hits mapped back to objects in the queryset.
+
+        Args:
+            query (str): The search query.
+            **kwargs: The search options, see `SearchResults`.
+
+        Returns:
+            SearchResults: The lazy search results.
+        """
+        return SearchResults(self, query, **kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Create the objects, and sync them to app search if the model has auto sync turned on.
+
+        Objects only get their primary keys back on some databases, and never
+        with `ignore_conflicts`. When that happens, the created rows are read
+        back as the ones after the highest auto primary key before the insert,
+        which can also pick up rows other transactions inserted meanwhile.
+        Objects without a primary key that can't be read back this way are
+        logged and not synced.
+        """
+        if not self.model.get_appsearch_auto_sync():
+            return super().bulk_create(objs, *args, **kwargs)
+
+        objs = list(objs)
+        after_pk = None
+        read_back = any(obj.pk is None for obj in objs) and isinstance(self.model._meta.pk, models.AutoField)
+        if read_back:
+            after_pk = self.model._base_manager.using(self.db).aggregate(max_pk=Max('pk'))['max_pk']
+        objs = super().bulk_create(objs, *args, **kwargs)
+
+        missing = [obj for obj in objs if obj.pk is None]
+        if not missing:
+            get_sync_processor().index(objs)
+        elif read_back:
+            created = self.model._base_manager.using(self.db).order_by('pk')
+            if after_pk is not None:
+                pks = [obj.pk for obj in objs if obj.pk is not None]
+                created = created.filter(Q(pk__gt=after_pk) | Q(pk__in=pks))
+            get_sync_processor().index(list(created))
+        else:
+            get_sync_processor().index([obj for obj in objs if obj.pk is not None])
+            logger.warning(
+                '%s bulk created %s objects can\'t be synced to app search as they have no primary key.',
+                len(missing), self.model._meta.label
+            )
+        return objs
+
+    def update(self, **kwargs):
+        """
+        Update the objects, and sync them to app search if the model has auto sync turned on.
+
+        With auto sync, the objects are updated a chunk at a time in a single
+        transaction, paged over their primary keys, so their primary keys
+        aren't all held in memory at once.
+        """
+        if not self.model.get_appsearch_auto_sync():
+            return super().update(**kwargs)
+
+        self._for_write = True
+        processor = get_sync_processor()
+        chunk_size = apps.get_app_config('django_elastic_appsearch').chunk_size
+        rows = 0
+        with transaction.atomic(using=self.db, savepoint=False):
+            # Each chunk is read before it's updated, as the update can take it out of the queryset, and paging
+            # over the primary keys means the updated rows are never read again
+            for pks in keyset_slice_queryset(self.values_list('pk', flat=True), chunk_size, key=lambda pk: pk):
+                rows += super(AppSearchQuerySet, self.filter(pk__in=pks)).update(**kwargs)
+                processor.index(self.model._base_manager.using(self.db).filter(pk__in=pks))
+
+        return rows
+
+    def update_in_appsearch(self, **fields):
+        """
+        Update the objects, and patch the fields that changed in their app search documents.
+
+        Rather than serialising the objects again, app search is sent partial
+        updates of the document fields reading the updated model fields. Only
+        the document IDs of the objects are read before they're updated, from
+        their primary keys unless the model has custom document IDs. Values
+        that are expressions, or foreign keys the serialisers read through,
+        are read back from the updated rows, only the columns that changed.
+
+        The objects are updated a chunk at a time, paged over their primary
+        keys, and each chunk's patches are sent straight after it's updated,
+        before any outer transaction commits. Only the objects read before
+        their update are patched, and if sending fails the chunks before it
+        stay updated, unless an outer transaction rolls back.
+
+        Args:
+            **fields: The fields to update and their values, as for `update`.
+
+        Returns:
+            (int, BulkResults): The number of rows updated, and app search's
+                response for each document, by engine, in order.
+
+        Raises:
+            ValueError: If a serialiser needs model instances, as fields it
+                computes from the updated ones can't be patched. Update the
+                objects and index them with `update_only` instead.
+        """
+        if not apps.get_app_config('django_elastic_appsearch').enabled:
+            return super().update(**fields), BulkResults()
+
+        engine_names, plans = [], []
+        for (serialiser_class, engine_name) in self.model.get_appsearch_write_engine_pairs():
+            plan = compile_update_plan(self.model, serialiser_class, fields)
+            if plan is None:
+                raise ValueError('{} needs model instances to serialise {} objects.'.format(
+                    serialiser_class.__name__, self.model._meta.label
+                ))
+            if plan:
+                engine_names.append(engine_name)
+                plans.append(plan)
+        if not engine_names:
+            # None of the document fields change
+            return super().update(**fields), BulkResults()
+
+        # Values that aren't known until the rows are updated are read back
+        read_lookups = []
+        for plan in plans:
+            for (_, lookup, _, _) in plan:
+                known = lookup in fields and not hasattr(fields[lookup], 'resolve_expression')
+                if not known and lookup not in read_lookups:
+                    read_lookups.append(lookup)
+
+        def convert(value, to_value, required):
+            if to_value and (required or value is not None):
+                value = to_value(value)
+            return value
+
+        self._for_write = True
+        rows = 0
+
+        def update_chunks():
+            nonlocal rows
+            # Each chunk is read before it's updated, as the update can take it out of the queryset, and paging
+            # over the primary keys means the updated rows are never read again
+            for chunk in self._get_pk_document_id_chunks(ordering='pk'):
+                rows += self.filter(pk__in=[pk for (pk, _) in chunk]).update(**fields)
+                yield chunk
+
+        def serialise_chunk(chunk):
+            if read_lookups:
+                values = {
+                    row[0]: row[1:] for row in self.model._base_manager.using(self.db).filter(
+                        pk__in=[pk for (pk, _) in chunk]
+                    ).values_list('pk', *read_lookups)
+                }
+                # Objects deleted since they were updated are left out
+                chunk = [(pk, document_id) for (pk, document_id) in chunk if pk in values]
+
+            documents = []
+            for plan in plans:
+                patch = {
+                    name: convert(fields[lookup], to_value, required)
+                    for (name, lookup, to_value, required) in plan if lookup not in read_lookups
+                }
+                read_fields = [
+                    (name, read_lookups.index(lookup), to_value, required)
+                    for (name, lookup, to_value, required) in plan if lookup in read_lookups
+                ]
+                documents.append([
+                    dict({ID_FIELD: document_id}, **patch, **{
+                        name: convert(values[pk][column], to_value, required)
+                        for (name, column, to_value, required) in read_fields
+                    })
+                    for (pk, document_id) in chunk
+                ])
+            return documents
+
+        responses = self._merge_batch_responses(
+            self._iter_send_chunks(engine_names, update_chunks(), serialise_chunk, update_only=True)
+        )
+        return rows, responses
+
+    update_in_appsearch.alters_data = True
+
+    def delete(self, appsearch=None):
+        """
+        Delete the objects, and optionally their documents from app search.
+
+        The documents of the objects, and of the objects of app search models
+        deleted along with them by cascades, are deleted from app search in
+        bulk once the transaction commits. Their IDs are read from the objects
+        Django's collector fetches to delete them, so they're only fetched
+        once.
+
+        Args:
+            appsearch (bool): Delete the documents from app search too.
+                Defaults to the model's `appsearch_sync_deletes` meta option.
+
+        Returns:
+            (int, dict): The number of objects deleted, and the number of each
+                model, the same as Django's `QuerySet.delete`.
+        """
+        if appsearch is None:
+            appsearch = self.model.get_appsearch_sync_deletes()
+        if not appsearch or not apps.get_app_config('django_elastic_appsearch').enabled:
+            return super().delete()
+        sliced = not self.query.can_filter()
+        if sliced or self.query.distinct or self.query.distinct_fields or self._fields is not None:
+            # Django raises the errors of querysets that can't be deleted
+            return super().delete()
+
+        # The same as Django's `QuerySet.delete`, collecting the documents of the objects along the way
+        del_query = self._chain().order_by().select_related(None)
+        del_query._for_write = True
+        del_query.query.select_for_update = False
+        collector = _AppSearchCollector(using=del_query.db)
+        collector.origin = self
+        collector.collect(del_query)
+        appsearch_deletes = collector.get_appsearch_deletes()
+        deleted = collector.delete()
+        self._result_cache = None
+
+        with transaction_buffer(using=del_query.db) as buffer:
+            for engine_names, document_ids in appsearch_deletes:
+                for engine_name in engine_names:
+                    for document_id in document_ids:
+                        buffer.add(engine_name, document_id, DELETE)
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def _get_max_workers(self, workers):
+        """Return the number of workers to dispatch chunks with."""
+        if workers is None:
+            return apps.get_app_config('django_elastic_appsearch').max_workers
+        return workers
+
+    def _get_max_payload_size(self, max_payload_size):
+        """Return the byte budget to pack batches of documents under."""
+        if max_payload_size is None:
+            return apps.get_app_config('django_elastic_appsearch').max_payload_size
+        return max_payload_size
+
+    def delete_from_appsearch(self, workers=None):
+        """
+        Delete from appsearch.
+
+        Only the primary keys of the objects are fetched, unless the model
+        has custom document IDs that can't be worked out from them.
+
+        Args:
+            workers (int): Optional, the number of chunks to send to app search
+                concurrently. Defaults to the `APPSEARCH_MAX_WORKERS` setting.
+
+        Returns:
+            BulkResults: app search's response for each document, by engine,
+                in order.
+        """
+        if not apps.get_app_config('django_elastic_appsearch').enabled:
+            return BulkResults()
+
+        # The queryset is read once, and each chunk is deleted from all the engines at once
+        return _delete_document_id_chunks(self.model, self._get_document_id_chunks(), self._get_max_workers(workers))
+
+    def iter_index_to_appsearch(self, update_only=False, workers=None, force=False, max_payload_size=None):
+        """
+        Index the queryset, yielding app search's responses as each batch is sent.
+
+        The queryset is read once, a chunk at a time, and each chunk is
+        serialised for all the engines before the next one is read. Only the
+        chunks and batches in flight are held in memory, however large the
+        queryset is.
+
+        Args:
+            update_only (bool): Update rather than index the documents. Defaults to false.
+            workers (int): Optional, the number of batches to send to app search
+                concurrently. Defaults to the `APPSEARCH_MAX_WORKERS` setting.
+            force (bool): Send documents that haven't changed since they were
+                last sent, when `APPSEARCH_HASH_STORE` is set. Defaults to false.
+            max_payload_size (int): Optional, the most bytes of JSON to send in
+                a request. Defaults to the `APPSEARCH_MAX_PAYLOAD_SIZE` setting.
+
+        Yields:
+            (str, BulkResults): The engine each batch was sent to, and app
+                search's response for each document in it, in the order the
+                batches were read.
+        """
+        yield from self._iter_index_to_appsearch(
+            update_only=update_only, workers=workers, force=force, max_payload_size=max_payload_size
+        )
+
+    def _iter_index_to_appsearch(self, ordering=None, update_only=False, workers=None, force=False,
+                                 max_payload_size=None):
+        """Index the queryset paged over `ordering`, see `iter_index_to_appsearch`."""
+        if not apps.get_app_config('django_elastic_appsearch').enabled:
+            return
+
+        engine_names = [engine_name for (_, engine_name) in self.model.get_appsearch_write_engine_pairs()]
+        chunks, serialise_chunk = self._get_serialisable_chunks(engine_names, ordering)
+        yield from self._iter_send_chunks(
+            engine_names, chunks, serialise_chunk, update_only, workers, force, max_payload_size
+        )
+
+    def _iter_send_chunks(self, engine_names, chunks, serialise_chunk, update_only=False, workers=None, force=False,
+                          max_payload_size=None, report=None):
+        """
+        Send chunks of documents to app search, yielding its responses as each batch is sent.
+
+        Args:
+            engine_names (list of str): The engines the documents are sent to.
+            chunks (iterable of list): The chunks to serialise.
+            serialise_chunk (callable): Called with a chunk, returns its
+                documents for each engine, in the same order as the engines.
+            update_only (bool): The documents are partial updates.
+            workers (int): Optional, the number of batches to send concurrently.
+            force (bool): Send documents that haven't changed since they were
+                last sent, when `APPSEARCH_HASH_STORE` is set.
+            max_payload_size (int): Optional, the most bytes of JSON to send in
+                a request.
+            report (callable): Optional, called with each chunk and app
+                search's response for each of its documents, by engine, once
+                they've all been sent. The documents of each chunk are then
+                sent without waiting for the next chunk's.
+
+        Yields:
+            (str, BulkResults): The engine each batch was sent to, and app
+                search's response for each document in it, in order.
+        """
+        client = self.model.get_enterprise_search_appsearch_client()
+        send_documents = client.put_documents if update_only else client.index_documents
+        chunk_size = apps.get_app_config('django_elastic_appsearch').chunk_size
+        max_payload_size = self._get_max_payload_size(max_payload_size)
+        # Each engine packs its documents into batches of its own, across chunks
+        packers = {engine_name: DocumentPacker(chunk_size, max_payload_size) for engine_name in engine_names}
+
+        def index_documents(batch):
+            engine_name, documents, hashes, rejected = batch
+            responses = BulkResults()
+            if documents:
+                with bulk_priority():
+                    response, retried = send_documents_with_retries(send_documents, engine_name, documents)
+                responses.add(response, retried)
+            responses.add(rejected)
+            return engine_name, hashes, responses
+
+        def flush_batches():
+            return [
+                (engine_name,) + batch for engine_name in engine_names for batch in packers[engine_name].flush()
+            ]
+
+        def prepare_batches(chunk):
+            batches = [
+                (engine_name,) + batch
+                for engine_name, (documents, hashes) in zip(
+                    engine_names, _prepare_engine_batches(engine_names, serialise_chunk(chunk), update_only, force)
+                )
+                for batch in packers[engine_name].add(documents, hashes)
+            ]
+            if report is not None:
+                batches += flush_batches()
+            # Batches of unchanged documents have nothing to send
+            return chunk, [batch for batch in batches if batch[1] or batch[3]]
+
+        def iter_batches():
+            yield from prepare_chunks(chunks, prepare_batches, self.db, self.model._meta.label)
+            yield None, flush_batches()
+
+        def send_batches(prepared):
+            chunk, batches = prepared
+            return chunk, fan_out(index_documents, batches)
+
+        # The batches of each chunk are sent to all the engines at once
+        for chunk, chunk_responses in ordered_map(send_batches, iter_batches(), self._get_max_workers(workers)):
+            chunk_results = BulkResults()
+            for engine_name, hashes, responses in chunk_responses:
+                record_sent(engine_name, hashes, responses)
+                invalidate_search_cache([engine_name])
+                chunk_results.merge(responses)
+                yield engine_name, responses
+            if report is not None and chunk is not None:
+                report(chunk, chunk_results)
+
+    def index_to_appsearch(self, update_only=False, workers=None, force=False, max_payload_size=None):
+        """
+        Index the queryset.
+
+        Args:
+            update_only (bool): Update rather than index the documents. Defaults to false.
+            workers (int): Optional, the number of chunks to send to app search
+                concurrently. Defaults to the `APPSEARCH_MAX_WORKERS` setting.
+            force (bool): Send documents that haven't changed since they were
+                last sent, when `APPSEARCH_HASH_STORE` is set. Defaults to false.
+            max_payload_size (int): Optional, the most bytes of JSON to send in
+                a request. Defaults to the `APPSEARCH_MAX_PAYLOAD_SIZE` setting.
+
+        Returns:
+            BulkResults: app search's response for each document, by engine,
+                in order.
+        """
+        return self._merge_batch_responses(self.iter_index_to_appsearch(
+            update_only=update_only, workers=workers, force=force, max_payload_size=max_payload_size
+        ))
+
+    def index_changed_since(self, since, workers=None, force=False, max_payload_size=None):
+        """
+        Index the objects changed since a point in time.
+
+        See `iter_index_changed_since`.
+
+        Args:
+            since (datetime): Index the objects changed at or after this.
+            workers (int): Optional, the number of chunks to send to app search
+                concurrently. Defaults to the `APPSEARCH_MAX_WORKERS` setting.
+            force (bool): Send documents that haven't changed since they were
+                last sent, when `APPSEARCH_HASH_STORE` is set. Defaults to false.
+            max_payload_size (int): Optional, the most bytes of JSON to send in
+                a request. Defaults to the `APPSEARCH_MAX_PAYLOAD_SIZE` setting.
+
+        Returns:
+            BulkResults: app search's response for each document, by engine,
+                in order.
+
+        Raises:
+            ValueError: If the model has no `appsearch_updated_field`.
+        """
+        return self._merge_batch_responses(self.iter_index_changed_since(
+            since, workers=workers, force=force, max_payload_size=max_payload_size
+        ))
+
+    def iter_index_changed_since(self, since, workers=None, force=False, max_payload_size=None):
+        """
+        Index the objects changed since a point in time, yielding app search's responses as each batch is sent.
+
+        The objects are read in order of the model's `appsearch_updated_field`
+        and primary key, so the field's index is used to find them, and
+        objects changed while they're read are picked up later on.
+
+        Args:
+            since (datetime): Index the objects changed at or after this.
+            workers (int): Optional, the number of chunks to send to app search
+                concurrently. Defaults to the `APPSEARCH_MAX_WORKERS` setting.
+            force (bool): Send documents that haven't changed since they were
+                last sent, when `APPSEARCH_HASH_STORE` is set. Defaults to false.
+            max_payload_size (int): Optional, the most bytes of JSON to send in
+                a request. Defaults to the `APPSEARCH_MAX_PAYLOAD_SIZE` setting.
+
+        Yields:
+            (str, BulkResults): The engine each batch was sent to, and app
+                search's response for each document in it, in the order the
+                batches were read.
+
+        Raises:
+            ValueError: If the model has no `appsearch_updated_field`.
+        """
+        updated_field = self.model.get_appsearch_updated_field()
+        if updated_field is None:
+            raise ValueError('{} has no appsearch_updated_field.'.format(self.model._meta.label))
+
+        queryset = self.filter(**{'{}__gte'.format(updated_field): since})
+        return queryset._iter_index_to_appsearch(
+            ordering=(updated_field, 'pk'), workers=workers, force=force, max_payload_size=max_payload_size
+        )
 
-    def index_to_appsearch(self, update_only=False):
-        """Index the queryset."""
-        responses = []
-        if self and apps.get_app_config('django_elastic_appsearch').enabled:
-            for (_, engine_name) in self.first().get_appsearch_serialiser_engine_pairs():
-                client = self.first().get_enterprise_search_appsearch_client()
-                slices = self._get_sliced_queryset()
-                for queryset in slices:
-                    if update_only:
-                        responses += client.put_documents(
-                            engine_name=engine_name,
-                            documents=[item.serialise_for_appsearch(engine_name) for item in queryset]
-                        )
-                    else:
-                        responses += client.index_documents(
-                            engine_name=engine_name,
-                            documents=[item.serialise_for_appsearch(engine_name) for item in queryset]
-                        )
+    def _merge_batch_responses(self, batch_responses):
+        """Merge the responses of each batch sent, by engine, in order."""
+        engine_responses = {
+            engine_name: BulkResults() for (_, engine_name) in self.model.get_appsearch_write_engine_pairs()
+        }
+        for engine_name, responses in batch_responses:
+            engine_responses[engine_name].merge(responses)
+
+        return _merge_engine_responses(engine_responses)
+
+    async def _aget_write_engine_names(self):
+        """Return the engines the queryset is written to, resolving engine aliases on a thread."""
+        engine_pairs = await sync_to_async(self.model.get_appsearch_write_engine_pairs)()
+        return [engine_name for (_, engine_name) in engine_pairs]
+
+    async def _asend_chunks(self, engine_names, chunks, prepare_batches, send_batch, workers):
+        """
+        Send the queryset to all its engines chunk by chunk from an event loop.
+
+        Chunks are fetched and prepared on a thread through `sync_to_async`, and
+        each chunk is sent to all the engines at once. At most `workers` chunks
+        are prepared or in flight at any time.
+
+        Args:
+            engine_names (list of str): The engines the chunks are sent to.
+            chunks (iterable of list): The chunks of the queryset.
+            prepare_batches (callable): Called with a chunk and the engine
+                names, returns the batch to send to each engine, in order.
+            send_batch (coroutine function): Called with an engine name and a
+                batch, returns the app search response and the number of
+                documents that were retried.
+            workers (int): The number of chunks to send concurrently.
+
+        Returns:
+            BulkResults: app search's response for each document, by engine,
+                then by chunk, in order.
+        """
+        chunks = prepare_chunks(
+            chunks, lambda chunk: prepare_batches(chunk, engine_names), self.db, self.model._meta.label
+        )
+
+        def prepare_next_chunk():
+            return next(chunks, None)
+
+        semaphore = asyncio.Semaphore(max(self._get_max_workers(workers), 1))
+
+        async def send_chunk(batches):
+            try:
+                return await asyncio.gather(*[
+                    send_batch(engine_name, batch) for (engine_name, batch) in zip(engine_names, batches)
+                ])
+            finally:
+                semaphore.release()
+
+        tasks = []
+        try:
+            # The tasks sending the chunks are created in this context, so send them at bulk priority
+            with bulk_priority():
+                while True:
+                    await semaphore.acquire()
+                    batches = await sync_to_async(prepare_next_chunk)()
+                    if batches is None:
+                        break
+                    tasks.append(asyncio.ensure_future(send_chunk(batches)))
+
+            chunk_responses = await asyncio.gather(*tasks)
+        finally:
+            # Stop sending the rest of the chunks if one of them failed
+            for task in tasks:
+                task.cancel()
+
+        responses = BulkResults()
+        for index in range(len(engine_names)):
+            for engine_responses in chunk_responses:
+                responses.add(*engine_responses[index])
 
         return responses
 
+    async def adelete_from_appsearch(self, workers=None):
+        """
+        Delete from appsearch, from an event loop.
+
+        Args:
+            workers (int): Optional, the number of chunks to send to app search
+                concurrently. Defaults to the `APPSEARCH_MAX_WORKERS` setting.
+
+        Returns:
+            BulkResults: app search's response for each document, by engine,
+                in order.
+        """
+        if not apps.get_app_config('django_elastic_appsearch').enabled:
+            return BulkResults()
+
+        client = self.model.get_enterprise_search_async_appsearch_client()
+
+        async def delete_documents(engine_name, document_ids):
+            response, retries = await acall_with_retries(
+                client.delete_documents, engine_name=engine_name, document_ids=document_ids
+            )
+            await sync_to_async(invalidate_search_cache)([engine_name])
+            return response, len(document_ids) if retries else 0
+
+        def prepare_document_ids(document_ids, engine_names):
+            for engine_name in engine_names:
+                forget_documents(engine_name, document_ids)
+            return [document_ids for _ in engine_names]
+
+        return await self._asend_chunks(
+            await self._aget_write_engine_names(), self._get_document_id_chunks(), prepare_document_ids,
+            delete_documents, workers
+        )
+
+    async def aindex_to_appsearch(self, update_only=False, workers=None, force=False, max_payload_size=None):
+        """
+        Index the queryset, from an event loop.
+
+        Args:
+            update_only (bool): Update rather than index the documents. Defaults to false.
+            workers (int): Optional, the number of chunks to send to app search
+                concurrently. Defaults to the `APPSEARCH_MAX_WORKERS` setting.
+            force (bool): Send documents that haven't changed since they were
+                last sent, when `APPSEARCH_HASH_STORE` is set. Defaults to false.
+            max_payload_size (int): Optional, the most bytes of JSON to send in
+                a request. Defaults to the `APPSEARCH_MAX_PAYLOAD_SIZE` setting.
+
+        Returns:
+            BulkResults: app search's response for each document, by engine,
+                in order.
+        """
+        if not apps.get_app_config('django_elastic_appsearch').enabled:
+            return BulkResults()
+
+        client = self.model.get_enterprise_search_async_appsearch_client()
+        send_documents = client.put_documents if update_only else client.index_documents
+
+        async def index_documents(engine_name, batches):
+            # A chunk too large for a single request is sent in several
+            responses, retried = [], 0
+            for (documents, hashes, rejected) in batches:
+                if documents:
+                    response, resent = await asend_documents_with_retries(send_documents, engine_name, documents)
+                    await sync_to_async(record_sent)(engine_name, hashes, response)
+                    await sync_to_async(invalidate_search_cache)([engine_name])
+                    responses += response
+                    retried += resent
+                responses += rejected
+            return responses, retried
+
+        engine_names = await self._aget_write_engine_names()
+        chunks, serialise_chunk = self._get_serialisable_chunks(engine_names)
+
+        def prepare_documents(chunk, engine_names):
+            return [
+                list(pack_documents([batch], chunk_size, max_payload_size))
+                for batch in _prepare_engine_batches(engine_names, serialise_chunk(chunk), update_only, force)
+            ]
+
+        chunk_size = apps.get_app_config('django_elastic_appsearch').chunk_size
+        max_payload_size = self._get_max_payload_size(max_payload_size)
+        return await self._asend_chunks(engine_names, chunks, prepare_documents, index_documents, workers)
+
 
 class BaseAppSearchModel(models.Model):
     """
@@ -61,6 +857,8 @@ class BaseAppSearchModel(models.Model):
 
     objects = AppSearchQuerySet.as_manager()
 
+    appsearch = ModelSearchDescriptor()
+
     class Meta:
         """Meta options for the app search model."""
 
@@ -71,34 +869,186 @@ class BaseAppSearchModel(models.Model):
         """Get the Enterprise Search appsearch client."""
         return get_api_v1_enterprise_search_client()
 
+    @classmethod
+    def get_enterprise_search_async_appsearch_client(cls):
+        """Get the asyncio Enterprise Search appsearch client."""
+        return get_api_v1_async_enterprise_search_client()
+
+    @classmethod
+    def get_appsearch_auto_sync(cls):
+        """Get whether saved and deleted objects are synced to app search automatically."""
+        return getattr(cls.AppsearchMeta, 'appsearch_auto_sync', False)
+
+    @classmethod
+    def get_appsearch_ordering_key(cls):
+        """Get the unique, indexed field used to page through querysets."""
+        return getattr(cls.AppsearchMeta, 'appsearch_ordering_key', 'pk')
+
+    @classmethod
+    def get_appsearch_sync_deletes(cls):
+        """Get whether deleting querysets deletes their documents from app search by default."""
+        return getattr(cls.AppsearchMeta, 'appsearch_sync_deletes', False)
+
+    @classmethod
+    def get_appsearch_updated_field(cls):
+        """Get the field holding when objects last changed, or None if the model doesn't have one."""
+        return getattr(cls.AppsearchMeta, 'appsearch_updated_field', None)
+
+    @classmethod
+    def get_appsearch_use_engine_alias(cls):
+        """Get whether the engine names are aliases for the engines written to and searched."""
+        return getattr(cls.AppsearchMeta, 'appsearch_use_engine_alias', False)
+
+    @classmethod
+    def get_appsearch_write_engine_names(cls, engine_name):
+        """
+        Get the engines documents for an engine are written to.
+
+        Args:
+            engine_name (str): The engine name the model is configured with.
+
+        Returns:
+        list of string: The engine itself, or if the model uses engine aliases
+            the live engine behind it and the engine being rebuilt, if any.
+        """
+        if cls.get_appsearch_use_engine_alias():
+            return get_write_engine_names(engine_name)
+        return [engine_name]
+
+    @classmethod
+    def get_appsearch_write_engine_pairs(cls):
+        """
+        Get the serialisers and the engines documents are written to.
+
+        Returns:
+        list of (class, string): List of pairs of app search serialisers and engine names
+            to be used together, with the engine names resolved through their aliases.
+        """
+        return [
+            (serialiser, write_engine_name)
+            for (serialiser, engine_name) in cls.get_appsearch_serialiser_engine_pairs()
+            for write_engine_name in cls.get_appsearch_write_engine_names(engine_name)
+        ]
+
     def get_appsearch_document_id(self):
         """Get the unique document ID."""
         return "{}_{}".format(type(self).__name__, self.pk)
 
-    def _destroy_document(self, engine_name):
-        """Destroys document in specified engine."""
-        return self.get_enterprise_search_appsearch_client().delete_documents(
-            engine_name=engine_name,
-            document_ids=[self.get_appsearch_document_id()]
-        )
+    @classmethod
+    def get_appsearch_document_ids(cls, pks):
+        """
+        Get the document IDs of objects from their primary keys, without fetching the objects.
 
-    def _index_to_engine(self, engine_name, update_only):
-        """Index to specified engine."""
-        if update_only:
-            return self.get_enterprise_search_appsearch_client().put_documents(
-                engine_name=engine_name, documents=self._serialise_for_appsearch()
-            )
-        else:
-            return self.get_enterprise_search_appsearch_client().index_documents(
-                engine_name=engine_name, documents=self._serialise_for_appsearch()
+        Used to delete objects from app search without fetching them. If you
+        override `get_appsearch_document_id` with IDs that can be worked out
+        from primary keys, override this along with it.
+
+        Args:
+            pks (list): The primary keys.
+
+        Returns:
+            list of str: The document IDs, in the same order, or None if they
+                can't be worked out from primary keys alone.
+        """
+        if not _is_inherited(cls, 'get_appsearch_document_id', __name__):
+            # Custom document IDs need the objects, unless this is overridden too
+            return None
+        prefix = '{}_'.format(cls.__name__)
+        return [prefix + str(pk) for pk in pks]
+
+    @classmethod
+    def _get_appsearch_document_ids_from_pks(cls, pks):
+        """Get the document IDs of primary keys, raising an error if the model can't work them out."""
+        document_ids = cls.get_appsearch_document_ids(pks)
+        if document_ids is None:
+            raise ValueError(
+                "{}'s document IDs can't be worked out from primary keys, override get_appsearch_document_ids."
+                .format(cls._meta.label)
             )
+        return document_ids
+
+    @classmethod
+    def delete_pks_from_appsearch(cls, pks, workers=None):
+        """
+        Delete the documents of objects from app search by primary key, without touching the database.
+
+        Args:
+            pks (iterable): The primary keys of the objects.
+            workers (int): Optional, the number of chunks to send to app search
+                concurrently. Defaults to the `APPSEARCH_MAX_WORKERS` setting.
+
+        Returns:
+            BulkResults: app search's response for each document, by engine,
+                in order.
+
+        Raises:
+            ValueError: If the document IDs can't be worked out from primary
+                keys, see `get_appsearch_document_ids`.
+        """
+        config = apps.get_app_config('django_elastic_appsearch')
+        # Check the model can work out its document IDs before sending anything
+        cls._get_appsearch_document_ids_from_pks([])
+        if not config.enabled:
+            return BulkResults()
+
+        return _delete_document_id_chunks(
+            cls,
+            (cls._get_appsearch_document_ids_from_pks(chunk) for chunk in iter_chunks(pks, config.chunk_size)),
+            config.max_workers if workers is None else workers
+        )
+
+    @classmethod
+    def delete_pk_range_from_appsearch(cls, first_pk, last_pk, workers=None):
+        """
+        Delete the documents of a range of integer primary keys from app search, without touching the database.
+
+        A document is deleted for every primary key in the range, app search
+        reports the ones that weren't there as not deleted.
+
+        Args:
+            first_pk (int): The first primary key in the range.
+            last_pk (int): The last primary key in the range, included.
+            workers (int): Optional, the number of chunks to send to app search
+                concurrently. Defaults to the `APPSEARCH_MAX_WORKERS` setting.
+
+        Returns:
+            BulkResults: app search's response for each document, by engine,
+                in order.
+
+        Raises:
+            ValueError: If the document IDs can't be worked out from primary
+                keys, see `get_appsearch_document_ids`.
+        """
+        return cls.delete_pks_from_appsearch(range(first_pk, last_pk + 1), workers=workers)
+
+    @classmethod
+    def get_pk_from_appsearch_document_id(cls, document_id):
+        """
+        Get the primary key of the object a document was indexed from.
+
+        The inverse of `get_appsearch_document_id`, override it along with it.
+
+        Args:
+            document_id (str): The document ID.
+
+        Returns:
+            The primary key, or None if the document isn't of this model.
+        """
+        prefix = '{}_'.format(cls.__name__)
+        if not document_id.startswith(prefix):
+            return None
+        try:
+            return cls._meta.pk.to_python(document_id[len(prefix):])
+        except ValidationError:
+            return None
 
     def _serialise_for_appsearch(self, engine_name=None):
         """
         Serialise for app search.
 
         Args:
-            engine_name (str): Optional, only serialise for the specified engine.
+            engine_name (str): Optional, only serialise for the specified engine,
+                or an engine written to through its alias.
 
         Returns:
         list of serialiser output: List of the document serialised with the available
@@ -106,23 +1056,123 @@ class BaseAppSearchModel(models.Model):
         """
         _pairs = self.get_appsearch_serialiser_engine_pairs()
         if engine_name is not None:
-            _pairs = [pair for pair in _pairs if pair[1] == engine_name]
+            _pairs = [
+                pair for pair in _pairs
+                if pair[1] == engine_name or engine_name in self.get_appsearch_write_engine_names(pair[1])
+            ]
 
         return [serialiser(self).data for (serialiser, _) in _pairs]
 
-    def _index_to_appsearch(self, update_only=False):
+    def _serialise_for_engines(self, engine_names):
+        """
+        Serialise for several app search engines, running each serialiser once.
+
+        Args:
+            engine_names (list of str): The engines, or engines written to
+                through their aliases, to serialise for.
+
+        Returns:
+        list of list of serialiser output: The documents for each engine, as
+            `_serialise_for_appsearch` returns them, in the same order as the
+            engines.
+        """
+        if type(self)._serialise_for_appsearch is not BaseAppSearchModel._serialise_for_appsearch:
+            # Respect models serialising documents their own way
+            return [self._serialise_for_appsearch(engine_name) for engine_name in engine_names]
+
+        pairs = [
+            (serialiser, [engine_name] + self.get_appsearch_write_engine_names(engine_name))
+            for (serialiser, engine_name) in self.get_appsearch_serialiser_engine_pairs()
+        ]
+        data = {}
+        documents = []
+        for engine_name in engine_names:
+            engine_documents = []
+            for (serialiser, pair_engine_names) in pairs:
+                if engine_name in pair_engine_names:
+                    if serialiser not in data:
+                        data[serialiser] = serialiser(self).data
+                    engine_documents.append(data[serialiser])
+            documents.append(engine_documents)
+        return documents
+
+    def _prepare_index_batches(self, update_only=False, force=False):
+        """
+        Serialise the object for its engines, unless a buffer is collecting the operation.
+
+        Args:
+            update_only (bool): Update rather than index the documents.
+            force (bool): Send the document even if it hasn't changed since it
+                was last sent.
+
+        Returns:
+            (list of str, list of (list of dict, dict)): The engines, and the
+                documents to send to each with their content hashes, or None if
+                the operation was buffered.
+        """
+        buffer = get_active_buffer()
+        if buffer is not None:
+            buffer.index_instance(self, update_only=update_only, force=force)
+            return None
+        engine_names = [engine_name for (_, engine_name) in self.get_appsearch_write_engine_pairs()]
+        return engine_names, _prepare_engine_batches(
+            engine_names, self._serialise_for_engines(engine_names), update_only, force
+        )
+
+    def _prepare_delete(self):
+        """
+        Get the document to delete from the object's engines, unless a buffer is collecting the operation.
+
+        Returns:
+            (list of str, list of str): The engines, and the ID of the document
+                to delete, or None if the operation was buffered.
+        """
+        buffer = get_active_buffer()
+        if buffer is not None:
+            buffer.delete_instance(self)
+            return None
+        document_ids = [self.get_appsearch_document_id()]
+        engine_names = [engine_name for (_, engine_name) in self.get_appsearch_write_engine_pairs()]
+        for engine_name in engine_names:
+            forget_documents(engine_name, document_ids)
+        return engine_names, document_ids
+
+    def _index_to_appsearch(self, update_only=False, force=False):
         """
         Indexes to all specified app search engines.
 
         Args:
             update_only (bool): Update rather than index the documents. Defaults to false.
+            force (bool): Send the document even if it hasn't changed since it
+                was last sent, when `APPSEARCH_HASH_STORE` is set. Defaults to false.
 
         Returns:
-            list of app search responses: responses from app search by engine, in order
+            list of app search responses: responses from app search by engine, in order,
+                or an empty list if the operation was buffered
         """
         if apps.get_app_config("django_elastic_appsearch").enabled:
-            return [self._index_to_engine(engine_name, update_only) for (_, engine_name)
-                    in self.get_appsearch_serialiser_engine_pairs()]
+            prepared = self._prepare_index_batches(update_only, force)
+            if prepared is None:
+                return []
+            engine_names, batches = prepared
+
+            client = self.get_enterprise_search_appsearch_client()
+            send_documents = client.put_documents if update_only else client.index_documents
+
+            def index_documents(batch):
+                engine_name, (documents, _) = batch
+                if not documents:
+                    # The document hasn't changed
+                    return []
+                return send_documents_with_retries(send_documents, engine_name, documents)[0]
+
+            # Send the document to all the engines at once
+            responses = fan_out(index_documents, zip(engine_names, batches))
+            for engine_name, (_, hashes), response in zip(engine_names, batches, responses):
+                if hashes:
+                    record_sent(engine_name, hashes, response)
+            invalidate_search_cache(engine_names)
+            return responses
         return []
 
     def _delete_from_appsearch(self):
@@ -130,11 +1180,91 @@ class BaseAppSearchModel(models.Model):
         Delete from all specified app search engines.
 
         Returns:
-            list of app search responses: responses from app search by engine, in order
+            list of app search responses: responses from app search by engine, in order,
+                or an empty list if the operation was buffered
+        """
+        if apps.get_app_config("django_elastic_appsearch").enabled:
+            prepared = self._prepare_delete()
+            if prepared is None:
+                return []
+            engine_names, document_ids = prepared
+
+            client = self.get_enterprise_search_appsearch_client()
+            # Delete the document from all the engines at once
+            responses = fan_out(
+                lambda engine_name: call_with_retries(
+                    client.delete_documents, engine_name=engine_name, document_ids=document_ids
+                )[0],
+                engine_names
+            )
+            invalidate_search_cache(engine_names)
+            return responses
+        return []
+
+    async def _aindex_to_appsearch(self, update_only=False, force=False):
+        """
+        Indexes to all specified app search engines concurrently, from an event loop.
+
+        Args:
+            update_only (bool): Update rather than index the documents. Defaults to false.
+            force (bool): Send the document even if it hasn't changed since it
+                was last sent, when `APPSEARCH_HASH_STORE` is set. Defaults to false.
+
+        Returns:
+            list of app search responses: responses from app search by engine, in order,
+                or an empty list if the operation was buffered
         """
         if apps.get_app_config("django_elastic_appsearch").enabled:
-            return [self._destroy_document(engine_name) for (_, engine_name)
-                    in self.get_appsearch_serialiser_engine_pairs()]
+            prepared = await sync_to_async(self._prepare_index_batches)(update_only, force)
+            if prepared is None:
+                return []
+            engine_names, batches = prepared
+
+            client = self.get_enterprise_search_async_appsearch_client()
+            send_documents = client.put_documents if update_only else client.index_documents
+
+            async def index_documents(engine_name, documents, hashes):
+                if not documents:
+                    # The document hasn't changed
+                    return []
+                response, _ = await asend_documents_with_retries(send_documents, engine_name, documents)
+                if hashes:
+                    await sync_to_async(record_sent)(engine_name, hashes, response)
+                return response
+
+            responses = list(await asyncio.gather(*[
+                index_documents(engine_name, documents, hashes)
+                for (engine_name, (documents, hashes)) in zip(engine_names, batches)
+            ]))
+            await sync_to_async(invalidate_search_cache)(engine_names)
+            return responses
+        return []
+
+    async def _adelete_from_appsearch(self):
+        """
+        Delete from all specified app search engines concurrently, from an event loop.
+
+        Returns:
+            list of app search responses: responses from app search by engine, in order,
+                or an empty list if the operation was buffered
+        """
+        if apps.get_app_config("django_elastic_appsearch").enabled:
+            prepared = await sync_to_async(self._prepare_delete)()
+            if prepared is None:
+                return []
+            engine_names, document_ids = prepared
+
+            client = self.get_enterprise_search_async_appsearch_client()
+
+            async def delete_documents(engine_name):
+                response, _ = await acall_with_retries(
+                    client.delete_documents, engine_name=engine_name, document_ids=document_ids
+                )
+                return response
+
+            responses = list(await asyncio.gather(*[delete_documents(engine_name) for engine_name in engine_names]))
+            await sync_to_async(invalidate_search_cache)(engine_names)
+            return responses
         return []
 
 
@@ -181,9 +1311,9 @@ class AppSearchModel(BaseAppSearchModel):
         """Serialise the instance for appsearch."""
         return super()._serialise_for_appsearch(engine_name=(engine_name or self.get_appsearch_engine_name()))[0]
 
-    def index_to_appsearch(self, update_only=False):
+    def index_to_appsearch(self, update_only=False, force=False):
         """Index the object to appsearch."""
-        response = super()._index_to_appsearch(update_only=update_only)
+        response = super()._index_to_appsearch(update_only=update_only, force=force)
         return response[0] if response else None
 
     def delete_from_appsearch(self):
@@ -191,6 +1321,16 @@ class AppSearchModel(BaseAppSearchModel):
         response = super()._delete_from_appsearch()
         return response[0] if response else None
 
+    async def aindex_to_appsearch(self, update_only=False, force=False):
+        """Index the object to appsearch, from an event loop."""
+        response = await super()._aindex_to_appsearch(update_only=update_only, force=force)
+        return response[0] if response else None
+
+    async def adelete_from_appsearch(self):
+        """Delete the object from appsearch, from an event loop."""
+        response = await super()._adelete_from_appsearch()
+        return response[0] if response else None
+
 
 class AppSearchMultiEngineModel(BaseAppSearchModel):
     """A model that integrates with multiple Elastic App Search engines."""
@@ -226,10 +1366,18 @@ class AppSearchMultiEngineModel(BaseAppSearchModel):
         """Serialise the instance for appsearch."""
         return super()._serialise_for_appsearch(engine_name=engine_name)
 
-    def index_to_appsearch(self, update_only=False):
+    def index_to_appsearch(self, update_only=False, force=False):
         """Index the object to appsearch."""
-        return super()._index_to_appsearch(update_only=update_only)
+        return super()._index_to_appsearch(update_only=update_only, force=force)
 
     def delete_from_appsearch(self):
         """Delete the object from appsearch."""
         return super()._delete_from_appsearch()
+
+    async def aindex_to_appsearch(self, update_only=False, force=False):
+        """Index the object to appsearch, from an event loop."""
+        return await super()._aindex_to_appsearch(update_only=update_only, force=force)
+
+    async def adelete_from_appsearch(self):
+        """Delete the object from appsearch, from an event loop."""
+        return await super()._adelete_from_appsearch()
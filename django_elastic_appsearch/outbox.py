@@ -0,0 +1,211 @@
+"""A durable outbox of pending Elastic App Search operations."""
+
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from django_elastic_appsearch.batching import delete_document_chunks, send_packed_documents
+from django_elastic_appsearch.buffer import DELETE, INDEX
+from django_elastic_appsearch.cache import invalidate_search_cache
+from django_elastic_appsearch.hashes import forget_documents, skip_unchanged
+from django_elastic_appsearch.planner import plan_queryset
+from django_elastic_appsearch.models import OutboxEntry
+from django_elastic_appsearch.sync import BaseAppSearchProcessor
+from django_elastic_appsearch.throttle import bulk_priority
+
+
+def add_to_outbox(instance, operation):
+    """
+    Record a pending operation on a model object for each of its engines.
+
+    The entries are written in the current transaction, so they're only
+    drained if it commits. A pending entry for the same document is replaced,
+    so only the last operation on each document is drained.
+
+    Args:
+        instance (BaseAppSearchModel): The model object.
+        operation (str): `INDEX` or `DELETE`.
+    """
+    document_id = instance.get_appsearch_document_id()
+    for (_, engine_name) in instance.get_appsearch_write_engine_pairs():
+        OutboxEntry.objects.update_or_create(
+            engine_name=engine_name,
+            document_id=document_id,
+            defaults={
+                'operation': operation,
+                'model_label': instance._meta.label,
+                'object_pk': str(instance.pk),
+                'attempts': 0,
+                'available_at': timezone.now(),
+                'last_error': '',
+            }
+        )
+
+
+class OutboxProcessor(BaseAppSearchProcessor):
+    """
+    Record saved and deleted model objects in the outbox.
+
+    The `appsearch_drain` management command sends them to app search, so
+    saves neither wait on nor fail with app search.
+    """
+
+    def index(self, instances):
+        """Index the model objects to app search."""
+        for instance in instances:
+            add_to_outbox(instance, INDEX)
+
+    def delete(self, instances):
+        """Delete the model objects from app search."""
+        for instance in instances:
+            add_to_outbox(instance, DELETE)
+
+
+def _send_entries(model_label, engine_name, operation, entries):
+    """
+    Send outbox entries for one model, engine and operation to app search.
+
+    Objects are re-serialised in their current state, and objects that no
+    longer exist are skipped.
+
+    Returns:
+        dict of str: str: Errors for the documents app search failed to index
+            or delete, by document ID.
+    """
+    model = apps.get_model(model_label)
+    client = model.get_enterprise_search_appsearch_client()
+
+    if operation == DELETE:
+        document_ids = [entry.document_id for entry in entries]
+        forget_documents(engine_name, document_ids)
+        responses = delete_document_chunks(client, engine_name, document_ids)
+        invalidate_search_cache([engine_name])
+    else:
+        objects = plan_queryset(
+            model._default_manager.filter(pk__in=[entry.object_pk for entry in entries]), [engine_name]
+        )
+        documents = [
+            document for instance in objects
+            for document in instance._serialise_for_appsearch(engine_name)  # pylint:disable=protected-access
+        ]
+        documents, hashes = skip_unchanged(engine_name, documents)
+        if not documents:
+            return {}
+
+        responses = send_packed_documents(client.index_documents, engine_name, documents, hashes)
+        invalidate_search_cache([engine_name])
+
+    return {document_id: '; '.join(errors) for document_id, errors in responses.errors.items()}
+
+
+def _claim_entries(batch_size, max_attempts, lease_time):
+    """
+    Claim a batch of due outbox entries for this worker.
+
+    The entries are leased by moving them `lease_time` seconds into the
+    future, so no other worker picks them up while they're being sent, and
+    they're retried if this one dies. The lease doubles as a claim token, as
+    entries replaced in the meantime are no longer available at it.
+
+    Returns:
+        (datetime, list of OutboxEntry): The lease and the claimed entries.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=lease_time)
+    with transaction.atomic():
+        due = OutboxEntry.objects.filter(available_at__lte=now, attempts__lt=max_attempts)
+        entries = due.order_by('available_at', 'pk')
+
+        features = transaction.get_connection().features
+        if features.has_select_for_update_skip_locked:
+            entries = entries.select_for_update(skip_locked=True)
+        elif features.has_select_for_update:
+            entries = entries.select_for_update()
+
+        pks = list(entries.values_list('pk', flat=True)[:batch_size])
+        # Only entries still due are claimed, in case another worker got to them first
+        due.filter(pk__in=pks).update(attempts=F('attempts') + 1, available_at=lease)
+        entries = list(OutboxEntry.objects.filter(pk__in=pks, available_at=lease).order_by('available_at', 'pk'))
+    return lease, entries
+
+
+def _record_results(lease, batch, errors, retry_delay, max_retry_delay):
+    """
+    Remove the sent entries of a batch, and schedule the failed ones for a retry.
+
+    Entries that were replaced while they were being sent are left alone.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        OutboxEntry.objects.filter(
+            pk__in=[entry.pk for entry in batch if entry.document_id not in errors],
+            available_at=lease
+        ).delete()
+
+        for entry in batch:
+            if entry.document_id in errors:
+                OutboxEntry.objects.filter(pk=entry.pk, available_at=lease).update(
+                    available_at=now + timedelta(
+                        seconds=min(retry_delay * 2 ** (entry.attempts - 1), max_retry_delay)
+                    ),
+                    last_error=errors[entry.document_id]
+                )
+
+
+def drain_outbox(batch_size=None, max_attempts=10, retry_delay=5, max_retry_delay=3600, lease_time=300):
+    """
+    Claim a batch of due outbox entries and send them to app search.
+
+    Entries are claimed in a short transaction, with `SELECT ... FOR UPDATE
+    SKIP LOCKED` where the database supports it, so several workers can drain
+    the outbox at once. They're sent outside of it, and the results are
+    recorded in another, so no locks are held while waiting on app search.
+    Sent entries are removed. Failed entries are retried after an exponential
+    backoff, until they've been attempted `max_attempts` times.
+
+    Args:
+        batch_size (int): Optional, the number of entries to claim. Defaults
+            to the `APPSEARCH_CHUNK_SIZE` setting.
+        max_attempts (int): The number of times to attempt an entry.
+        retry_delay (int): Seconds to wait before the first retry, doubled for
+            each retry after that.
+        max_retry_delay (int): The longest to wait before a retry, in seconds.
+        lease_time (int): Seconds before claimed entries are available to
+            other workers again, in case this one doesn't finish them.
+
+    Returns:
+        (int, int): The number of entries sent and failed.
+    """
+    config = apps.get_app_config('django_elastic_appsearch')
+    if not config.enabled:
+        return 0, 0
+
+    lease, entries = _claim_entries(batch_size or config.chunk_size, max_attempts, lease_time)
+
+    # Batch the entries by model, engine and operation, within the chunk size
+    batches = []
+    open_batches = {}
+    for entry in entries:
+        key = (entry.model_label, entry.engine_name, entry.operation)
+        batch = open_batches.get(key)
+        if batch is None or len(batch) >= config.chunk_size:
+            batch = open_batches[key] = []
+            batches.append((key, batch))
+        batch.append(entry)
+
+    sent = failed = 0
+    for (model_label, engine_name, operation), batch in batches:
+        try:
+            with bulk_priority():
+                errors = _send_entries(model_label, engine_name, operation, batch)
+        except Exception as error:  # pylint:disable=broad-except
+            errors = {entry.document_id: repr(error) for entry in batch}
+
+        _record_results(lease, batch, errors, retry_delay, max_retry_delay)
+        failed += len(errors)
+        sent += len(batch) - len(errors)
+
+    return sent, failed
@@ -0,0 +1,142 @@
+"""Plan the queries that fetch model objects for serialisation from their serialisers."""
+
+import logging
+
+from django.apps import apps
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """
+    A database execute wrapper that counts the queries run through it.
+
+    Only queries that read are counted, so writes such as the updates of
+    `update_in_appsearch` don't count towards fetching a chunk.
+    """
+
+    def __init__(self):
+        """Initialise the count to zero."""
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Count the query if it reads, and run it."""
+        if sql.lstrip().upper().startswith('SELECT'):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def get_serialiser_plan(serialiser_classes):
+    """
+    Combine the relations and fields serialisers declare they read.
+
+    Serialisers declare them with `select_related`, `prefetch_related` and
+    `only` in their `Meta` class. Objects are only limited to the `only` fields
+    if every serialiser declares them.
+
+    Args:
+        serialiser_classes (list of class): The serialisers.
+
+    Returns:
+        (list, list, list or None): The `select_related` lookups, the
+            `prefetch_related` lookups, and the `only` fields or None to fetch
+            every field.
+    """
+    select_related, prefetch_related, only = [], [], []
+    for serialiser_class in serialiser_classes:
+        meta = getattr(serialiser_class, 'Meta', None)
+        select_related += [
+            lookup for lookup in getattr(meta, 'select_related', ()) if lookup not in select_related
+        ]
+        prefetch_related += [
+            lookup for lookup in getattr(meta, 'prefetch_related', ()) if lookup not in prefetch_related
+        ]
+
+        fields = getattr(meta, 'only', None)
+        if fields is None or only is None:
+            only = None
+        else:
+            only += [field for field in fields if field not in only]
+
+    return select_related, prefetch_related, (only or None)
+
+
+def plan_queryset(queryset, engine_names=None, ordering=None):
+    """
+    Apply the relations and fields the serialisers of a queryset's model read.
+
+    Args:
+        queryset (QuerySet): A queryset of app search model objects.
+        engine_names (list of str): Optional, only plan for the serialisers of
+            these engines. Defaults to all the model's engines.
+        ordering (str or tuple of str): Optional, the fields the queryset is
+            paged over. Defaults to the model's `appsearch_ordering_key`.
+
+    Returns:
+        QuerySet: The queryset, fetching the related objects the serialisers
+            read along with the objects.
+    """
+    model = queryset.model
+    select_related, prefetch_related, only = get_serialiser_plan([
+        serialiser_class for (serialiser_class, engine_name) in model.get_appsearch_write_engine_pairs()
+        if engine_names is None or engine_name in engine_names
+    ])
+
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    if only is not None:
+        # Chunks are paged on the ordering key, and related objects need their foreign keys
+        ordering = ordering or model.get_appsearch_ordering_key()
+        ordering_keys = [key.lstrip('-') for key in ([ordering] if isinstance(ordering, str) else ordering)]
+        extra_fields = [key for key in ordering_keys if key != 'pk']
+        queryset = queryset.only(*(only + extra_fields + select_related))
+    return queryset
+
+
+def prepare_chunks(chunks, prepare, using, model_label):
+    """
+    Prepare each chunk of objects to be sent.
+
+    With `APPSEARCH_DEBUG_QUERIES` turned on, the queries run to fetch and
+    prepare each chunk are counted and logged, with a warning when there are
+    more queries than objects, as that's a sign of related objects being
+    fetched one object at a time.
+
+    Args:
+        chunks (iterable of list): The chunks of model objects, or of rows
+            standing in for them.
+        prepare (callable): Called with each chunk, returns what to send.
+        using (str): The database alias the objects are fetched from.
+        model_label (str): The label of the objects' model, for the warning.
+
+    Yields:
+        The prepared chunks, in order.
+    """
+    if not apps.get_app_config('django_elastic_appsearch').debug_queries:
+        for chunk in chunks:
+            yield prepare(chunk)
+        return
+
+    chunks = iter(chunks)
+    warned = False
+    while True:
+        queries = QueryCounter()
+        with connections[using].execute_wrapper(queries):
+            chunk = next(chunks, None)
+            prepared = prepare(chunk) if chunk is not None else None
+        if chunk is None:
+            return
+
+        logger.debug('%s queries to fetch and serialise a chunk of %s objects.', queries.count, len(chunk))
+        if not warned and queries.count > len(chunk):
+            logger.warning(
+                '%s queries to fetch and serialise a chunk of %s %s objects. Declare the relations your '
+                'serialiser reads with `Meta.select_related` and `Meta.prefetch_related`.',
+                queries.count, len(chunk), model_label
+            )
+            warned = True
+
+        yield prepared
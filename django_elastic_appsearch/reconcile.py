@@ -0,0 +1,238 @@
+"""Find and repair the differences between app search engines and the database."""
+
+import os
+import sqlite3
+import tempfile
+
+from django.apps import apps
+
+from django_elastic_appsearch.batching import iter_chunks
+from django_elastic_appsearch.cache import invalidate_search_cache
+from django_elastic_appsearch.hashes import forget_documents
+from django_elastic_appsearch.reindex import reindex_partition
+from django_elastic_appsearch.retries import call_with_retries
+from django_elastic_appsearch.search import get_hit_document_id
+from django_elastic_appsearch.slicer import keyset_slice_queryset
+from django_elastic_appsearch.throttle import bulk_priority
+
+# The largest page of search results app search returns, and how deep it pages
+PAGE_SIZE = 1000
+RESULT_WINDOW = 10000
+
+
+def iter_engine_document_ids(client, engine_name, keyset_field=None):
+    """
+    Stream the IDs of all the documents in an engine.
+
+    App search only pages through the first 10,000 results of a search. To
+    list larger engines, pass a number or date field every document has,
+    and the documents are paged through in order of it, each page starting
+    from the last value of the page before.
+
+    Args:
+        client (AppSearch): The app search client.
+        engine_name (str): The engine.
+        keyset_field (str): Optional, the number or date field to page through
+            the documents by.
+
+    Yields:
+        str: The document IDs.
+
+    Raises:
+        ValueError: If the engine has more documents than app search pages
+            through without a `keyset_field`, or more documents share a
+            value of it than fit in a page.
+    """
+    def search(**options):
+        response, _ = call_with_retries(
+            client.search, engine_name=engine_name, query='', page_size=PAGE_SIZE, **options
+        )
+        return response
+
+    if keyset_field is None:
+        number, total_pages = 1, 1
+        while number <= total_pages:
+            response = search(current_page=number, result_fields={'id': {'raw': {}}})
+            if number == 1:
+                if response['meta']['page']['total_results'] > RESULT_WINDOW:
+                    raise ValueError(
+                        '{} has more than {} documents, pass a number or date field to page through '
+                        'them by.'.format(engine_name, RESULT_WINDOW)
+                    )
+                total_pages = response['meta']['page']['total_pages']
+            for hit in response['results']:
+                yield get_hit_document_id(hit)
+            number += 1
+        return
+
+    last_value, seen = None, set()
+    while True:
+        options = {
+            'current_page': 1,
+            'sort': [{keyset_field: 'asc'}],
+            'result_fields': {'id': {'raw': {}}, keyset_field: {'raw': {}}},
+        }
+        if last_value is not None:
+            options['filters'] = {keyset_field: {'from': last_value}}
+        hits = search(**options)['results']
+
+        for hit in hits:
+            document_id = get_hit_document_id(hit)
+            if document_id not in seen:
+                yield document_id
+
+        if len(hits) < PAGE_SIZE:
+            return
+        value = hits[-1][keyset_field]['raw']
+        if value == hits[0][keyset_field]['raw']:
+            raise ValueError('More than {} documents in {} have the same {}.'.format(
+                PAGE_SIZE, engine_name, keyset_field
+            ))
+        # The next page starts from the last value, so skip the documents with it already seen
+        seen = {get_hit_document_id(hit) for hit in hits if hit[keyset_field]['raw'] == value}
+        last_value = value
+
+
+def iter_model_document_ids(queryset):
+    """
+    Stream the document IDs of the objects in a queryset.
+
+    Only the primary keys are read when the model can work out its document
+    IDs from them, see `get_appsearch_document_ids`.
+
+    Yields:
+        (str, object): The document ID and primary key of each object.
+    """
+    model = queryset.model
+    chunk_size = apps.get_app_config('django_elastic_appsearch').chunk_size
+    if model.get_appsearch_document_ids([]) is not None:
+        for pks in keyset_slice_queryset(queryset.values_list('pk', flat=True), chunk_size, key=lambda pk: pk):
+            yield from zip(model.get_appsearch_document_ids(pks), pks)
+        return
+
+    for chunk in keyset_slice_queryset(queryset, chunk_size):
+        for obj in chunk:
+            yield obj.get_appsearch_document_id(), obj.pk
+
+
+class _DocumentIdSets:
+    """The document IDs in an engine and in the database, in a temporary SQLite file."""
+
+    def __init__(self, path):
+        """Create the tables."""
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE engine (id TEXT PRIMARY KEY) WITHOUT ROWID')
+        self.connection.execute('CREATE TABLE model (id TEXT PRIMARY KEY, pk) WITHOUT ROWID')
+
+    def add_engine_ids(self, document_ids):
+        """Store the IDs of the documents in the engine, returning how many there were."""
+        cursor = self.connection.executemany(
+            'INSERT OR IGNORE INTO engine VALUES (?)', ((document_id,) for document_id in document_ids)
+        )
+        return cursor.rowcount
+
+    def add_model_ids(self, document_ids):
+        """Store the document IDs and primary keys of the objects, returning how many there were."""
+        cursor = self.connection.executemany(
+            'INSERT OR IGNORE INTO model VALUES (?, ?)',
+            ((document_id, pk if isinstance(pk, (int, str)) else str(pk)) for (document_id, pk) in document_ids)
+        )
+        return cursor.rowcount
+
+    def iter_missing(self):
+        """Stream the primary keys of the objects without documents in the engine."""
+        for (pk,) in self.connection.execute(
+            'SELECT pk FROM model WHERE NOT EXISTS (SELECT 1 FROM engine WHERE engine.id = model.id) ORDER BY pk'
+        ):
+            yield pk
+
+    def iter_orphaned(self):
+        """Stream the IDs of the documents in the engine without objects."""
+        for (document_id,) in self.connection.execute(
+            'SELECT id FROM engine WHERE NOT EXISTS (SELECT 1 FROM model WHERE model.id = engine.id)'
+        ):
+            yield document_id
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+
+def reconcile_engine(queryset, engine_name, keyset_field=None, dry_run=False, workers=1):
+    """
+    Repair the differences between an engine and the objects in a queryset.
+
+    The document IDs in the engine are listed first, then the objects in the
+    database, each streamed into a temporary on-disk set, so memory use
+    doesn't grow with the size of the engine. Objects without documents are
+    then indexed, and documents without objects deleted, so a repair costs
+    the size of the differences rather than the size of the table. Documents
+    of other models in the same engine are left alone.
+
+    Listing the engine first means objects created while it runs are indexed
+    rather than deleted, and documents are checked against the database
+    again just before they're deleted.
+
+    Args:
+        queryset (QuerySet): The objects that should be in the engine.
+        engine_name (str): The engine.
+        keyset_field (str): Optional, the number or date field to page through
+            the documents by, see `iter_engine_document_ids`.
+        dry_run (bool): Only count the differences, without repairing them.
+        workers (int): The number of chunks to send concurrently.
+
+    Returns:
+        dict of str: int: The number of `documents` in the engine, `objects`
+            in the database, objects `missing` from the engine, `orphaned`
+            documents without objects, and documents app search `failed` to
+            index or delete.
+    """
+    model = queryset.model
+    client = model.get_enterprise_search_appsearch_client()
+    chunk_size = apps.get_app_config('django_elastic_appsearch').chunk_size
+    counts = {'documents': 0, 'objects': 0, 'missing': 0, 'orphaned': 0, 'failed': 0}
+
+    with tempfile.TemporaryDirectory() as directory:
+        sets = _DocumentIdSets(os.path.join(directory, 'reconcile.sqlite3'))
+        try:
+            counts['documents'] = sets.add_engine_ids(iter_engine_document_ids(client, engine_name, keyset_field))
+            counts['objects'] = sets.add_model_ids(iter_model_document_ids(queryset))
+
+            for pks in iter_chunks(sets.iter_missing(), chunk_size):
+                counts['missing'] += len(pks)
+                if not dry_run:
+                    # The hashes of documents missing from the engine can't be trusted
+                    counts['failed'] += reindex_partition(
+                        queryset.filter(pk__in=pks), None, None, [engine_name], lambda last_pk, count, errors: None,
+                        workers=workers, force=True
+                    )
+
+            # Only documents of this model can be orphans of it
+            orphaned = (
+                document_id for document_id in sets.iter_orphaned()
+                if model.get_pk_from_appsearch_document_id(document_id) is not None
+            )
+            for document_ids in iter_chunks(orphaned, chunk_size):
+                if not dry_run:
+                    document_ids = _exclude_existing(queryset, document_ids)
+                    if document_ids:
+                        forget_documents(engine_name, document_ids)
+                        with bulk_priority():
+                            responses, _ = call_with_retries(
+                                client.delete_documents, engine_name=engine_name, document_ids=document_ids
+                            )
+                        invalidate_search_cache([engine_name])
+                        counts['failed'] += sum(1 for response in responses if response.get('errors'))
+                counts['orphaned'] += len(document_ids)
+        finally:
+            sets.close()
+
+    return counts
+
+
+def _exclude_existing(queryset, document_ids):
+    """Leave out the documents of objects created since the database was listed."""
+    model = queryset.model
+    pks = {document_id: model.get_pk_from_appsearch_document_id(document_id) for document_id in document_ids}
+    existing = set(queryset.filter(pk__in=list(pks.values())).values_list('pk', flat=True))
+    return [document_id for document_id in document_ids if pks[document_id] not in existing]
@@ -0,0 +1,85 @@
+"""Partitioned, resumable reindexing of models to Elastic App Search."""
+
+from operator import attrgetter
+
+from django.db import models
+from django.db.models import Max, Min
+
+from django_elastic_appsearch.values import get_values_serialiser
+
+
+def partition_queryset(queryset, partitions):
+    """
+    Split a queryset into primary key ranges of about the same size.
+
+    Only integer primary keys can be split, any other queryset is returned as
+    a single unbounded partition.
+
+    Args:
+        queryset (QuerySet): The queryset to split.
+        partitions (int): The number of ranges to split it into.
+
+    Returns:
+        list of [int, int]: `[after, until]` ranges, covering the primary keys
+            greater than `after` and up to and including `until`.
+    """
+    if not isinstance(queryset.model._meta.pk, (models.AutoField, models.IntegerField)):
+        return [[None, None]]
+
+    bounds = queryset.aggregate(lowest=Min('pk'), highest=Max('pk'))
+    if bounds['lowest'] is None:
+        return []
+
+    size = -(-(bounds['highest'] - bounds['lowest'] + 1) // partitions)
+    return [
+        [after, min(after + size, bounds['highest'])]
+        for after in range(bounds['lowest'] - 1, bounds['highest'], size)
+    ]
+
+
+def reindex_partition(queryset, after, until, engine_names, report, workers=1, force=False, max_payload_size=None):
+    """
+    Index a primary key range of a queryset to app search.
+
+    Args:
+        queryset (QuerySet): The queryset to index.
+        after (int): Index the objects with a primary key greater than this, or
+            from the start when None.
+        until (int): Index the objects with a primary key up to and including
+            this, or to the end when None.
+        engine_names (list of str): The engines to index to.
+        report (callable): Called with the primary key of the last object, the
+            number of objects, and the errors of the documents app search
+            rejected by document ID, after each chunk has been sent.
+        workers (int): The number of chunks to send concurrently.
+        force (bool): Send documents that haven't changed since they were last
+            sent, when `APPSEARCH_HASH_STORE` is set.
+        max_payload_size (int): Optional, the most bytes of JSON to send in a
+            request. Defaults to the `APPSEARCH_MAX_PAYLOAD_SIZE` setting.
+
+    Returns:
+        int: The number of documents app search rejected.
+    """
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    if until is not None:
+        queryset = queryset.filter(pk__lte=until)
+
+    values_serialiser = get_values_serialiser(queryset.model, engine_names)
+    get_pk = values_serialiser.get_pk if values_serialiser is not None else attrgetter('pk')
+    chunks, serialise_chunk = queryset._get_serialisable_chunks(  # pylint:disable=protected-access
+        engine_names, ordering='pk'
+    )
+    failed = 0
+
+    def report_chunk(chunk, responses):
+        nonlocal failed
+        failed += responses.failed
+        report(get_pk(chunk[-1]), len(chunk), responses.errors)
+
+    for _ in queryset._iter_send_chunks(  # pylint:disable=protected-access
+        engine_names, chunks, serialise_chunk, workers=workers, force=force, max_payload_size=max_payload_size,
+        report=report_chunk
+    ):
+        pass
+    return failed
@@ -0,0 +1,226 @@
+"""Retry requests to Elastic App Search that failed with transient errors."""
+
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+from django.apps import apps
+from django.utils import timezone
+from elastic_transport import ApiError, ConnectionTimeout, TlsError
+from elastic_transport import ConnectionError  # pylint:disable=redefined-builtin
+
+logger = logging.getLogger(__name__)
+
+# Too many requests, and errors app search or a proxy in front of it recover from
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# The longest to wait between attempts, unless app search asks for longer
+MAX_BACKOFF = 60
+
+
+class BulkResults(list):
+    """
+    The app search responses for each document of a bulk request, in order.
+
+    Along with the responses, keeps count of the documents that succeeded,
+    failed, or had to be retried, and the errors of the failed documents by
+    document ID.
+    """
+
+    def __init__(self):
+        """Start with no responses."""
+        super().__init__()
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.errors = {}
+
+    @property
+    def failed_ids(self):
+        """The IDs of the documents app search rejected, in order."""
+        return list(self.errors)
+
+    def add(self, responses, retried=0):
+        """
+        Add the responses to a request.
+
+        Args:
+            responses (list of dict): App search's response for each document.
+            retried (int): The number of documents that were sent again to get
+                these responses.
+        """
+        self.extend(responses)
+        self.retried += retried
+        for response in responses:
+            if response.get('errors'):
+                self.failed += 1
+                self.errors[response.get('id')] = response['errors']
+            else:
+                self.succeeded += 1
+
+    def merge(self, other):
+        """
+        Add the responses and counts of other results after these.
+
+        Args:
+            other (BulkResults): The results to add.
+        """
+        self.extend(other)
+        self.succeeded += other.succeeded
+        self.failed += other.failed
+        self.retried += other.retried
+        self.errors.update(other.errors)
+
+
+def is_retryable(error):
+    """Check whether a request that failed with an error can be sent again."""
+    if isinstance(error, ApiError):
+        return error.meta.status in RETRY_STATUSES
+    return isinstance(error, (ConnectionError, ConnectionTimeout)) and not isinstance(error, TlsError)
+
+
+def get_retry_after(error):
+    """
+    Get how long app search asked to wait before retrying, from `Retry-After`.
+
+    Returns:
+        float: The seconds to wait, or None if the error doesn't say.
+    """
+    headers = getattr(getattr(error, 'meta', None), 'headers', None)
+    value = headers.get('retry-after') if headers else None
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - timezone.now()).total_seconds(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_retry_delay(error, attempt):
+    """
+    Get how long to wait before retrying a request.
+
+    Honours `Retry-After`, otherwise backs off exponentially from
+    `APPSEARCH_RETRY_BACKOFF` with full jitter, so workers that failed together
+    don't all retry together.
+
+    Args:
+        error (Exception): The error the request failed with.
+        attempt (int): The number of attempts made so far.
+
+    Returns:
+        float: The seconds to wait.
+    """
+    retry_after = get_retry_after(error)
+    if retry_after is not None:
+        return retry_after
+    backoff = apps.get_app_config('django_elastic_appsearch').retry_backoff
+    return random.uniform(0, min(MAX_BACKOFF, backoff * 2 ** (attempt - 1)))
+
+
+def _should_retry(error, attempt):
+    """Check whether to retry after an attempt failed, and log it if so."""
+    if not is_retryable(error) or attempt > apps.get_app_config('django_elastic_appsearch').max_retries:
+        return False
+    logger.warning('App search request failed with %r, retrying (attempt %s).', error, attempt)
+    return True
+
+
+def call_with_retries(func, **kwargs):
+    """
+    Send a request to app search, retrying it on transient errors.
+
+    Args:
+        func (callable): The client method to call.
+        **kwargs: The arguments to call it with.
+
+    Returns:
+        (object, int): The response, and the number of times the request was
+            retried.
+
+    Raises:
+        Exception: The last error, if the request still fails after
+            `APPSEARCH_MAX_RETRIES` retries or fails with an error that can't
+            be retried.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return func(**kwargs), attempt - 1
+        except Exception as error:  # pylint:disable=broad-except
+            if not _should_retry(error, attempt):
+                raise
+            time.sleep(get_retry_delay(error, attempt))
+
+
+async def acall_with_retries(func, **kwargs):
+    """
+    Send a request to app search from an event loop, retrying it on transient errors.
+
+    Args:
+        func (coroutine function): The async client method to call.
+        **kwargs: The arguments to call it with.
+
+    Returns:
+        (object, int): The response, and the number of times the request was
+            retried.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return await func(**kwargs), attempt - 1
+        except Exception as error:  # pylint:disable=broad-except
+            if not _should_retry(error, attempt):
+                raise
+            await asyncio.sleep(get_retry_delay(error, attempt))
+
+
+def send_documents_with_retries(func, engine_name, documents):
+    """
+    Send documents to app search, retrying the request on transient errors.
+
+    The request is retried the same as with `call_with_retries`. Documents app
+    search rejects, eg. for an invalid field value, aren't sent again as
+    they'd only be rejected again; their errors are in the responses.
+
+    Args:
+        func (callable): The client method to send the documents with, eg.
+            `index_documents`.
+        engine_name (str): The engine to send the documents to.
+        documents (list of dict): The documents to send.
+
+    Returns:
+        (list of dict, int): app search's response for each document, in
+            order, and the number of documents that were sent again.
+    """
+    response, retries = call_with_retries(func, engine_name=engine_name, documents=documents)
+    return list(response), len(documents) if retries else 0
+
+
+async def asend_documents_with_retries(func, engine_name, documents):
+    """
+    Send documents to app search from an event loop, retrying the request on transient errors.
+
+    See `send_documents_with_retries`.
+
+    Args:
+        func (coroutine function): The async client method to send the
+            documents with.
+        engine_name (str): The engine to send the documents to.
+        documents (list of dict): The documents to send.
+
+    Returns:
+        (list of dict, int): app search's response for each document, in
+            order, and the number of documents that were sent again.
+    """
+    response, retries = await acall_with_retries(func, engine_name=engine_name, documents=documents)
+    return list(response), len(documents) if retries else 0
@@ -0,0 +1,447 @@
+"""Search Elastic App Search engines, and map the results back to model objects."""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from django.apps import apps
+
+from django_elastic_appsearch.cache import get_search_cache, get_search_cache_key, get_search_generation
+from django_elastic_appsearch.engines import get_live_engine_name
+from django_elastic_appsearch.executors import fan_out
+from django_elastic_appsearch.retries import call_with_retries
+
+# App search's own default page size, and the largest page it returns
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 1000
+
+# The most queries app search takes in a multi search request
+MAX_MULTI_SEARCH_QUERIES = 10
+
+_state = Local()
+
+
+def get_hit_document_id(hit):
+    """Return the document ID of a search result."""
+    meta = hit.get('_meta') or {}
+    if 'id' in meta:
+        return meta['id']
+    return hit['id']['raw']
+
+
+class SearchPage:
+    """
+    A page of search results.
+
+    The raw results are available as `hits`, and the model objects they were
+    indexed from as `objects`, fetched on first use with a single query.
+    """
+
+    def __init__(self, results, number, response):
+        """
+        Initialise the page.
+
+        Args:
+            results (SearchResults): The search the page is of.
+            number (int): The page number, starting from 1.
+            response (dict): App search's response for the page.
+        """
+        self.results = results
+        self.number = number
+        self.response = response
+        self._objects = None
+
+    @property
+    def hits(self):
+        """The raw search results on the page, in ranking order."""
+        return self.response['results']
+
+    @property
+    def meta(self):
+        """The metadata app search returned with the page."""
+        return self.response['meta']
+
+    @property
+    def facets(self):
+        """The facets app search returned with the page."""
+        return self.response.get('facets', {})
+
+    @property
+    def objects(self):
+        """The model objects on the page, in ranking order."""
+        if self._objects is None:
+            self._objects = self.results.get_objects(self.hits)
+        return self._objects
+
+    def __iter__(self):
+        """Iterate over the model objects on the page."""
+        return iter(self.objects)
+
+    def __len__(self):
+        """Return the number of model objects on the page."""
+        return len(self.objects)
+
+
+class SearchResults:
+    """
+    The lazy results of a search of an app search engine.
+
+    Nothing is sent to app search until the results are used. Iterating over
+    the results fetches one page at a time, and yields the model objects the
+    hits were indexed from in ranking order, with a single query a page. Hits
+    for objects that aren't in the queryset, eg. objects deleted since they
+    were indexed, are left out.
+
+    The results can also be sliced and counted, so they can be paged through
+    with Django's `Paginator`.
+    """
+
+    def __init__(self, queryset, query, engine_name=None, filters=None, facets=None,
+                 page_size=DEFAULT_PAGE_SIZE, use_cache=True, **options):
+        """
+        Initialise the search.
+
+        Args:
+            queryset (QuerySet): The model objects hits are mapped back to.
+            query (str): The search query.
+            engine_name (str): Optional, the engine to search. Defaults to the
+                model's first engine, or the live engine behind it if the model
+                uses engine aliases.
+            filters (dict): Optional, app search filters.
+            facets (dict): Optional, app search facets.
+            page_size (int): The number of hits to fetch at a time, up to 1000.
+            use_cache (bool): Read and store the pages in the cache, when
+                `APPSEARCH_SEARCH_CACHE` is set. Defaults to true.
+            **options: Other app search search options, eg. `sort`, `boosts`,
+                `search_fields` or `result_fields`.
+        """
+        model = queryset.model
+        if engine_name is None:
+            engine_name = model.get_appsearch_serialiser_engine_pairs()[0][1]
+        if model.get_appsearch_use_engine_alias():
+            engine_name = get_live_engine_name(engine_name)
+
+        self.queryset = queryset
+        self.query = query
+        self.engine_name = engine_name
+        self.filters = filters
+        self.facets_options = facets
+        self.page_size = min(page_size, MAX_PAGE_SIZE)
+        self.options = options
+        self.use_cache = use_cache
+        self._first_page = None
+
+        # Within a `search_batch` block, the first page is fetched along with the other searches
+        self._batch = get_active_search_batch()
+        if self._batch is not None:
+            self._batch.add(self)
+
+    def _get_search_options(self, number):
+        """Return the options of the search for a page, as the client's `search` takes them."""
+        options = dict(self.options, current_page=number, page_size=self.page_size)
+        if self.filters is not None:
+            options['filters'] = self.filters
+        if self.facets_options is not None:
+            options['facets'] = self.facets_options
+        return options
+
+    def _get_multi_search_query(self):
+        """Return the search for the first page, as app search's multi search takes it."""
+        query = self._get_search_options(1)
+        query['page'] = {'current': query.pop('current_page'), 'size': query.pop('page_size')}
+        query['query'] = self.query
+        return query
+
+    def _get_cache_key(self, number):
+        """Return the cache key of the search for a page, or None if it isn't cached."""
+        cache = get_search_cache() if self.use_cache else None
+        if cache is None:
+            return None
+        return get_search_cache_key(
+            self.engine_name, get_search_generation(cache, self.engine_name), self.query,
+            self._get_search_options(number)
+        )
+
+    def _get_cached_response(self, key):
+        """Return the cached response of a search, if it's been cached."""
+        return None if key is None else get_search_cache().get(key)
+
+    def _cache_response(self, key, response):
+        """Cache the response of a search, if search results are cached."""
+        if key is not None:
+            get_search_cache().set(
+                key, response, apps.get_app_config('django_elastic_appsearch').search_cache_timeout
+            )
+
+    def _search(self, number):
+        """
+        Send the search for a page to app search, and return the response.
+
+        With `APPSEARCH_SEARCH_CACHE` set, responses are cached for
+        `APPSEARCH_SEARCH_CACHE_TIMEOUT` seconds, or until the engine is
+        written to.
+        """
+        key = self._get_cache_key(number)
+        response = self._get_cached_response(key)
+        if response is not None:
+            return response
+
+        client = self.queryset.model.get_enterprise_search_appsearch_client()
+        response, _ = call_with_retries(
+            client.search, engine_name=self.engine_name, query=self.query, **self._get_search_options(number)
+        )
+        # Keep the body rather than the client's response object
+        response = getattr(response, 'body', response)
+
+        self._cache_response(key, response)
+        return response
+
+    def get_page(self, number):
+        """
+        Fetch a page of results.
+
+        Args:
+            number (int): The page number, starting from 1.
+
+        Returns:
+            SearchPage: The page.
+        """
+        if number == 1 and self._batch is not None:
+            self._batch.resolve()
+        if number == 1 and self._first_page is not None:
+            return self._first_page
+        page = SearchPage(self, number, self._search(number))
+        if number == 1:
+            # The first page holds the counts, metadata and facets
+            self._first_page = page
+        return page
+
+    def get_objects(self, hits):
+        """
+        Fetch the model objects search results were indexed from.
+
+        Args:
+            hits (list of dict): The raw search results.
+
+        Returns:
+            list of model objects: The objects, in the same order as the hits.
+        """
+        model = self.queryset.model
+        pks = [model.get_pk_from_appsearch_document_id(get_hit_document_id(hit)) for hit in hits]
+        pks = [pk for pk in pks if pk is not None]
+        if not pks:
+            return []
+        objects = {obj.pk: obj for obj in self.queryset.filter(pk__in=pks)}
+        return [objects[pk] for pk in pks if pk in objects]
+
+    @property
+    def meta(self):
+        """The metadata app search returned with the first page."""
+        return self.get_page(1).meta
+
+    @property
+    def facets(self):
+        """The facets app search returned with the first page."""
+        return self.get_page(1).facets
+
+    @property
+    def count(self):
+        """The total number of hits."""
+        return self.meta['page']['total_results']
+
+    @property
+    def num_pages(self):
+        """The total number of pages of hits."""
+        return self.meta['page']['total_pages']
+
+    def __len__(self):
+        """Return the total number of hits."""
+        return self.count
+
+    def iter_pages(self):
+        """
+        Iterate over the pages of results, fetching each when it's reached.
+
+        Yields:
+            SearchPage: The pages, in order.
+        """
+        page = self.get_page(1)
+        yield page
+        for number in range(2, page.meta['page']['total_pages'] + 1):
+            yield self.get_page(number)
+
+    def iter_hits(self):
+        """
+        Iterate over the raw search results of all pages.
+
+        Yields:
+            dict: The hits, in ranking order.
+        """
+        for page in self.iter_pages():
+            yield from page.hits
+
+    def __iter__(self):
+        """Iterate over the model objects of all pages, in ranking order."""
+        for page in self.iter_pages():
+            yield from page.objects
+
+    def __getitem__(self, key):
+        """
+        Return the model objects of a range of hits, or of a single hit.
+
+        Only the pages the range covers are fetched. Objects missing from the
+        queryset are left out, so a range can have fewer objects than hits.
+        """
+        if isinstance(key, slice):
+            if key.step is not None or (key.start or 0) < 0 or (key.stop is not None and key.stop < 0):
+                raise ValueError('Search results only support slices with non-negative bounds and no step.')
+            start = key.start or 0
+            stop = self.count if key.stop is None else min(key.stop, self.count)
+            hits = []
+            for number in range(start // self.page_size + 1, (stop - 1) // self.page_size + 2):
+                page_start = (number - 1) * self.page_size
+                hits += self.get_page(number).hits[max(start - page_start, 0):stop - page_start]
+            return self.get_objects(hits)
+
+        if not isinstance(key, int) or key < 0:
+            raise TypeError('Search results can only be indexed by non-negative integers or slices.')
+        objects = self[key:key + 1]
+        if not objects:
+            raise IndexError('Search result index out of range.')
+        return objects[0]
+
+
+class SearchBatch:
+    """
+    The searches made within a `search_batch` block.
+
+    The first pages of the searches are fetched together, as soon as one of
+    them is used.
+    """
+
+    def __init__(self):
+        """Start with no searches."""
+        self.pending = []
+
+    def add(self, results):
+        """Add a search whose first page is to be fetched with the others."""
+        self.pending.append(results)
+
+    def resolve(self):
+        """
+        Fetch the first pages of all the searches not fetched yet.
+
+        Searches of the same engine are sent in multi search requests of up
+        to 10 searches, and the requests to all the engines are sent at once.
+        Cached pages aren't sent again. If a request fails, its searches are
+        sent on their own when they're next used.
+        """
+        pending, self.pending = self.pending, []
+        engine_searches = OrderedDict()
+        for results in pending:
+            results._batch = None
+            if results._first_page is not None:
+                continue
+            key = results._get_cache_key(1)
+            response = results._get_cached_response(key)
+            if response is not None:
+                results._first_page = SearchPage(results, 1, response)
+            else:
+                engine_searches.setdefault(results.engine_name, []).append((results, key))
+
+        requests = [
+            (engine_name, searches[start:start + MAX_MULTI_SEARCH_QUERIES])
+            for engine_name, searches in engine_searches.items()
+            for start in range(0, len(searches), MAX_MULTI_SEARCH_QUERIES)
+        ]
+        for (_, searches), responses in zip(requests, fan_out(self._send, requests)):
+            for (results, key), response in zip(searches, responses):
+                if 'results' not in response:
+                    # Leave searches app search couldn't run to be sent on their own, and raise their errors
+                    continue
+                results._cache_response(key, response)
+                results._first_page = SearchPage(results, 1, response)
+
+    @staticmethod
+    def _send(request):
+        """Send the searches of an engine, and return app search's responses in order."""
+        engine_name, searches = request
+        client = searches[0][0].queryset.model.get_enterprise_search_appsearch_client()
+        if len(searches) == 1:
+            response, _ = call_with_retries(
+                client.search, engine_name=engine_name, query=searches[0][0].query,
+                **searches[0][0]._get_search_options(1)
+            )
+            return [getattr(response, 'body', response)]
+
+        responses, _ = call_with_retries(
+            client.multi_search, engine_name=engine_name,
+            queries=[results._get_multi_search_query() for (results, _) in searches]
+        )
+        return getattr(responses, 'body', responses)
+
+
+def get_active_search_batch():
+    """Return the batch collecting searches in the current context, if any."""
+    return getattr(_state, 'batch', None)
+
+
+@contextmanager
+def search_batch():
+    """
+    Batch the searches made within a block.
+
+    The searches stay lazy. The first time the results of one of them are
+    used, the first pages of all of them are fetched together, with a multi
+    search request for each engine, sent at once. A page's search latency is
+    then that of its slowest request rather than the sum of all of them.
+    Later pages are fetched on their own as usual. Nested blocks share the
+    outermost batch.
+
+    Yields:
+        SearchBatch: The batch collecting the searches.
+    """
+    active_batch = get_active_search_batch()
+    if active_batch is not None:
+        yield active_batch
+        return
+
+    batch = SearchBatch()
+    _state.batch = batch
+    try:
+        yield batch
+    finally:
+        _state.batch = None
+
+
+class ModelSearch:
+    """Searches the app search engines of a model."""
+
+    def __init__(self, model):
+        """Initialise the search for a model."""
+        self.model = model
+
+    def search(self, query, **kwargs):
+        """
+        Search the model's engine.
+
+        Args:
+            query (str): The search query.
+            **kwargs: The search options, see `SearchResults`.
+
+        Returns:
+            SearchResults: The lazy search results.
+        """
+        return SearchResults(self.model._default_manager.all(), query, **kwargs)
+
+    def batch(self):
+        """Batch the searches made within a block, see `search_batch`."""
+        return search_batch()
+
+
+class ModelSearchDescriptor:
+    """Gives app search models a `Model.appsearch.search()` API."""
+
+    def __get__(self, instance, owner):
+        """Return the search for the model class."""
+        return ModelSearch(owner)
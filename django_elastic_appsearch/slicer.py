@@ -1,5 +1,9 @@
 """A Queryset slicer for Django."""
 
+from operator import attrgetter
+
+from django.db.models import Q
+
 
 def slice_queryset(queryset, chunk_size):
     """Slice a queryset into chunks."""
@@ -23,3 +27,69 @@ def slice_queryset(queryset, chunk_size):
         yield queryset.filter(pk__gt=start_pk).filter(pk__lte=end_pk)
 
         start_pk = end_pk
+
+
+def _get_ordering_attname(model, field_name):
+    """Get the attribute holding the ordering key value on model instances."""
+    if field_name == 'pk':
+        return 'pk'
+    return model._meta.get_field(field_name).attname
+
+
+def _get_keyset_filter(ordering, values):
+    """
+    Get the filter for the rows after a position in a keyset ordering.
+
+    For an ordering over several fields, eg. `(a, b)`, a row is after
+    `(x, y)` if `a > x`, or `a = x` and `b > y`.
+    """
+    condition = None
+    for index, field in reversed(list(enumerate(ordering))):
+        field_name = field.lstrip('-')
+        lookup = '{}__{}'.format(field_name, 'lt' if field.startswith('-') else 'gt')
+        value = values[index]
+        after = Q(**{lookup: value})
+        condition = after if condition is None else after | (Q(**{field_name: value}) & condition)
+    return condition
+
+
+def keyset_slice_queryset(queryset, chunk_size, ordering='pk', key=None):
+    """
+    Slice a queryset into chunks of model instances using keyset pagination.
+
+    Each chunk is fetched with a single `WHERE key > last ORDER BY key LIMIT n`
+    query, so the cost of a chunk doesn't grow with the size of the table.
+
+    Args:
+        queryset (QuerySet): The queryset to slice.
+        chunk_size (int): The maximum number of objects in a chunk.
+        ordering (str or tuple of str): A unique, indexed field to page over,
+            or several fields that are unique together, eg.
+            `('updated_at', 'pk')`. Prefix a field with `-` to page over it in
+            descending order. Defaults to `pk`.
+        key (callable): Optional, gets the ordering key value from the last
+            item of a chunk, as a tuple when paging over several fields.
+            Defaults to reading it from model instances, pass it to slice
+            querysets of values.
+
+    Yields:
+        list of model instances: The objects in each chunk, in order.
+    """
+    single = isinstance(ordering, str)
+    ordering = (ordering,) if single else tuple(ordering)
+    if key is None:
+        key = attrgetter(*(_get_ordering_attname(queryset.model, field.lstrip('-')) for field in ordering))
+    queryset = queryset.order_by(*ordering)
+
+    chunk_queryset = queryset
+    while True:
+        chunk = list(chunk_queryset[:chunk_size])
+        if chunk:
+            yield chunk
+
+        # A short chunk means we've reached the end, no need to ask again
+        if len(chunk) < chunk_size:
+            break
+
+        values = key(chunk[-1])
+        chunk_queryset = queryset.filter(_get_keyset_filter(ordering, (values,) if single else values))
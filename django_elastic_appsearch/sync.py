@@ -0,0 +1,166 @@
+"""Automatic syncing of model objects to Elastic App Search."""
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+
+from django_elastic_appsearch.batching import delete_document_chunks
+from django_elastic_appsearch.buffer import DELETE, INDEX, transaction_buffer
+from django_elastic_appsearch.cache import invalidate_search_cache
+from django_elastic_appsearch.hashes import forget_documents
+from django_elastic_appsearch.retries import BulkResults
+
+
+class BaseAppSearchProcessor:
+    """
+    Base class for processors that sync model objects to app search.
+
+    Processors are handed the objects saved and deleted for models with
+    `AppsearchMeta.appsearch_auto_sync` set, and decide when and how they're
+    sent to app search.
+    """
+
+    def index(self, instances):
+        """Index the model objects to app search."""
+        raise NotImplementedError
+
+    def delete(self, instances):
+        """Delete the model objects from app search."""
+        raise NotImplementedError
+
+
+class ImmediateProcessor(BaseAppSearchProcessor):
+    """Send each model object to app search as soon as it's saved or deleted."""
+
+    def index(self, instances):
+        """Index the model objects to app search."""
+        for instance in instances:
+            instance.index_to_appsearch()
+
+    def delete(self, instances):
+        """Delete the model objects from app search."""
+        for instance in instances:
+            instance.delete_from_appsearch()
+
+
+class OnCommitProcessor(BaseAppSearchProcessor):
+    """
+    Send the model objects to app search in bulk when the transaction commits.
+
+    Everything saved or deleted within a transaction is sent once it commits,
+    and nothing is sent if it rolls back.
+    """
+
+    def index(self, instances):
+        """Index the model objects to app search."""
+        with transaction_buffer():
+            for instance in instances:
+                instance.index_to_appsearch()
+
+    def delete(self, instances):
+        """Delete the model objects from app search."""
+        with transaction_buffer():
+            for instance in instances:
+                instance.delete_from_appsearch()
+
+
+class QueuedProcessor(BaseAppSearchProcessor):
+    """
+    Hand the model objects to a task queue when the transaction commits.
+
+    Subclasses implement `enqueue` to send the work to a queue, and the worker
+    picking it up calls `process_queued` with the same arguments.
+    """
+
+    def enqueue(self, model_label, operation, identifiers):
+        """
+        Send the work to the queue.
+
+        Args:
+            model_label (str): The `app_label.ModelName` of the objects.
+            operation (str): `INDEX` or `DELETE`.
+            identifiers (list): The primary keys of the objects to index, or
+                the app search document IDs of the objects to delete.
+        """
+        raise NotImplementedError
+
+    def _enqueue_on_commit(self, model_label, operation, identifiers):
+        """Enqueue the work once the transaction commits."""
+        if identifiers:
+            transaction.on_commit(lambda: self.enqueue(model_label, operation, identifiers))
+
+    def index(self, instances):
+        """Index the model objects to app search."""
+        instances = list(instances)
+        if instances:
+            self._enqueue_on_commit(
+                instances[0]._meta.label, INDEX, [instance.pk for instance in instances]
+            )
+
+    def delete(self, instances):
+        """Delete the model objects from app search."""
+        # The rows are gone by the time the queue gets to them, so send their document IDs
+        instances = list(instances)
+        if instances:
+            self._enqueue_on_commit(
+                instances[0]._meta.label, DELETE, [instance.get_appsearch_document_id() for instance in instances]
+            )
+
+
+def process_queued(model_label, operation, identifiers):
+    """
+    Process work handed to a queue by a `QueuedProcessor`.
+
+    Args:
+        model_label (str): The `app_label.ModelName` of the objects.
+        operation (str): `INDEX` or `DELETE`.
+        identifiers (list): The primary keys of the objects to index, or the
+            app search document IDs of the objects to delete.
+
+    Returns:
+        BulkResults: app search's response for each document, by engine, in
+            order.
+    """
+    model = apps.get_model(model_label)
+    if operation == INDEX:
+        return model._default_manager.filter(pk__in=identifiers).index_to_appsearch()
+
+    responses = BulkResults()
+    if apps.get_app_config('django_elastic_appsearch').enabled:
+        client = model.get_enterprise_search_appsearch_client()
+        for (_, engine_name) in model.get_appsearch_write_engine_pairs():
+            forget_documents(engine_name, identifiers)
+            responses.merge(delete_document_chunks(client, engine_name, identifiers))
+            invalidate_search_cache([engine_name])
+    return responses
+
+
+def get_sync_processor():
+    """Return the processor configured with `APPSEARCH_SYNC_PROCESSOR`."""
+    return import_string(apps.get_app_config('django_elastic_appsearch').sync_processor)()
+
+
+def _index_on_save(sender, instance, raw=False, **kwargs):
+    """Index a saved model object."""
+    # Don't index fixtures as they're loaded
+    if not raw:
+        get_sync_processor().index([instance])
+
+
+def _delete_on_delete(sender, instance, **kwargs):
+    """Delete a deleted model object."""
+    get_sync_processor().delete([instance])
+
+
+def connect_auto_sync():
+    """Connect the sync signal handlers for every model with auto sync turned on."""
+    for model in apps.get_models():
+        get_auto_sync = getattr(model, 'get_appsearch_auto_sync', None)
+        if get_auto_sync is not None and get_auto_sync():
+            post_save.connect(
+                _index_on_save, sender=model, dispatch_uid='appsearch_auto_sync_{}'.format(model._meta.label)
+            )
+            post_delete.connect(
+                _delete_on_delete, sender=model, dispatch_uid='appsearch_auto_sync_{}'.format(model._meta.label)
+            )
@@ -7,7 +7,12 @@
 # `assertAppSearchQuerySetDeleteCallCount` follows the same camel case pattern
 # from the python unittests library.
 
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
+
+from django.utils.module_loading import import_string
+
+# The client methods that write to app search
+CLIENT_WRITE_METHODS = ('index_documents', 'put_documents', 'delete_documents')
 
 
 class MockedAppSearchTestCase:
@@ -31,6 +36,22 @@ class MockedAppSearchTestCase:
         - Lets you assert how many times
           `AppSearchModel.delete_from_appsearch` was called.
         - Usage: `self.assertAppSearchModelDeleteCallCount(2)`
+    * `self.assertAppSearchQuerySetUpdateCallCount`
+        - Lets you assert how many times
+          `AppSearchQuerySet.update_in_appsearch` was called. The objects
+          are still updated in the database.
+        - Usage: `self.assertAppSearchQuerySetUpdateCallCount(2)`
+    * `self.assertAppSearchModelDeletePksCallCount`
+        - Lets you assert how many times
+          `AppSearchModel.delete_pks_from_appsearch` or
+          `AppSearchModel.delete_pk_range_from_appsearch` were called.
+        - Usage: `self.assertAppSearchModelDeletePksCallCount(2)`
+    The call counts include calls to the asyncio versions of these methods
+    (`aindex_to_appsearch` and `adelete_from_appsearch`).
+
+    Any other request that would send documents to app search, eg. deleting
+    a queryset with `delete(appsearch=True)` or the writes of auto sync, is
+    sent to a mocked client instead.
     Note that the call counts depend on your chunk size configuration.
     The default chunk size is 100.
 
@@ -60,6 +81,12 @@ class MockedAppSearchTestCase:
         queryset_delete_from_appsearch = patch(
             f'{queryset_class}delete_from_appsearch'
         )
+        queryset_aindex_to_appsearch = patch(
+            f'{queryset_class}aindex_to_appsearch'
+        )
+        queryset_adelete_from_appsearch = patch(
+            f'{queryset_class}adelete_from_appsearch'
+        )
 
         model_index_to_appsearch = patch(
             'django_elastic_appsearch.orm.BaseAppSearchModel._index_to_appsearch'
@@ -67,42 +94,102 @@ class MockedAppSearchTestCase:
         model_delete_from_appsearch = patch(
             'django_elastic_appsearch.orm.BaseAppSearchModel._delete_from_appsearch'
         )
+        model_aindex_to_appsearch = patch(
+            'django_elastic_appsearch.orm.BaseAppSearchModel._aindex_to_appsearch'
+        )
+        model_adelete_from_appsearch = patch(
+            'django_elastic_appsearch.orm.BaseAppSearchModel._adelete_from_appsearch'
+        )
 
         self.queryset_index_to_appsearch = queryset_index_to_appsearch.start()
         self.queryset_delete_from_appsearch = \
             queryset_delete_from_appsearch.start()
         self.model_index_to_appsearch = model_index_to_appsearch.start()
         self.model_delete_from_appsearch = model_delete_from_appsearch.start()
+        self.queryset_aindex_to_appsearch = queryset_aindex_to_appsearch.start()
+        self.queryset_adelete_from_appsearch = \
+            queryset_adelete_from_appsearch.start()
+        self.model_aindex_to_appsearch = model_aindex_to_appsearch.start()
+        self.model_adelete_from_appsearch = model_adelete_from_appsearch.start()
 
         self.addCleanup(queryset_index_to_appsearch.stop)
         self.addCleanup(queryset_delete_from_appsearch.stop)
         self.addCleanup(model_index_to_appsearch.stop)
         self.addCleanup(model_delete_from_appsearch.stop)
+        self.addCleanup(queryset_aindex_to_appsearch.stop)
+        self.addCleanup(queryset_adelete_from_appsearch.stop)
+        self.addCleanup(model_aindex_to_appsearch.stop)
+        self.addCleanup(model_adelete_from_appsearch.stop)
+
+        # The objects are still updated, only the requests to app search are mocked
+        queryset_update_in_appsearch = patch(
+            f'{queryset_class}update_in_appsearch',
+            autospec=True,
+            side_effect=import_string(queryset_class.rstrip('.')).update_in_appsearch
+        )
+        model_delete_pks_from_appsearch = patch(
+            'django_elastic_appsearch.orm.BaseAppSearchModel.delete_pks_from_appsearch'
+        )
+        model_delete_pk_range_from_appsearch = patch(
+            'django_elastic_appsearch.orm.BaseAppSearchModel.delete_pk_range_from_appsearch'
+        )
+
+        self.queryset_update_in_appsearch = queryset_update_in_appsearch.start()
+        self.model_delete_pks_from_appsearch = model_delete_pks_from_appsearch.start()
+        self.model_delete_pk_range_from_appsearch = model_delete_pk_range_from_appsearch.start()
+
+        self.addCleanup(queryset_update_in_appsearch.stop)
+        self.addCleanup(model_delete_pks_from_appsearch.stop)
+        self.addCleanup(model_delete_pk_range_from_appsearch.stop)
+
+        for method in CLIENT_WRITE_METHODS:
+            client_patch = patch(f'elastic_enterprise_search.AppSearch.{method}', return_value=[])
+            async_client_patch = patch(
+                f'elastic_enterprise_search.AsyncAppSearch.{method}', new_callable=AsyncMock, return_value=[]
+            )
+            client_patch.start()
+            async_client_patch.start()
+            self.addCleanup(client_patch.stop)
+            self.addCleanup(async_client_patch.stop)
 
         super().setUp()
 
     def assertAppSearchModelIndexCallCount(self, call_count):
         """Check the call count on `BaseAppSearchModel._index_to_appsearch`."""
-        self.assertEqual(self.model_index_to_appsearch.call_count, call_count)
+        self.assertEqual(
+            self.model_index_to_appsearch.call_count + self.model_aindex_to_appsearch.call_count,
+            call_count
+        )
 
     def assertAppSearchModelDeleteCallCount(self, call_count):
         """Check the call count on `BaseAppSearchModel._delete_from_appsearch`."""
         self.assertEqual(
-            self.model_delete_from_appsearch.call_count,
+            self.model_delete_from_appsearch.call_count + self.model_adelete_from_appsearch.call_count,
             call_count
         )
 
     def assertAppSearchQuerySetIndexCallCount(self, call_count):
         """Check the call count on `AppSearchQueryset.index_to_appsearch`."""
         self.assertEqual(
-            self.queryset_index_to_appsearch.call_count,
+            self.queryset_index_to_appsearch.call_count + self.queryset_aindex_to_appsearch.call_count,
             call_count
         )
 
     def assertAppSearchQuerySetDeleteCallCount(self, call_count):
         """Check the call count on `AppSearchQueryset.delete_from_appsearch`."""
         self.assertEqual(
-            self.queryset_delete_from_appsearch.call_count,
+            self.queryset_delete_from_appsearch.call_count + self.queryset_adelete_from_appsearch.call_count,
+            call_count
+        )
+
+    def assertAppSearchQuerySetUpdateCallCount(self, call_count):
+        """Check the call count on `AppSearchQueryset.update_in_appsearch`."""
+        self.assertEqual(self.queryset_update_in_appsearch.call_count, call_count)
+
+    def assertAppSearchModelDeletePksCallCount(self, call_count):
+        """Check the call count on `BaseAppSearchModel.delete_pks_from_appsearch` and its range version."""
+        self.assertEqual(
+            self.model_delete_pks_from_appsearch.call_count + self.model_delete_pk_range_from_appsearch.call_count,
             call_count
         )
 
@@ -0,0 +1,391 @@
+"""Client side rate limiting of the requests sent to Elastic App Search."""
+
+import asyncio
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import unquote
+
+from asgiref.local import Local
+from django.apps import apps
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from elastic_enterprise_search import AppSearch, AsyncAppSearch
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+
+# The limits that apply to engines without limits of their own
+DEFAULT_LIMITS = 'default'
+
+# The share of each limit held back for interactive requests by default
+DEFAULT_INTERACTIVE_RESERVE = 0.2
+
+# How long to wait before checking again for a free slot
+POLL_INTERVAL = 0.01
+
+_ENGINE_PATH = re.compile(r'^/api/as/v1/engines/([^/?]+)')
+
+_state = Local()
+
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+def get_priority():
+    """Return the priority of requests sent in the current context."""
+    return getattr(_state, 'priority', INTERACTIVE)
+
+
+@contextmanager
+def bulk_priority():
+    """Send the requests made within a block at bulk priority, behind interactive requests."""
+    previous = get_priority()
+    _state.priority = BULK
+    try:
+        yield
+    finally:
+        _state.priority = previous
+
+
+def with_current_priority(func):
+    """Wrap a function to run at the priority of the current context, eg. when it's called on another thread."""
+    priority = get_priority()
+
+    def wrapper(*args, **kwargs):
+        previous = get_priority()
+        _state.priority = priority
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _state.priority = previous
+
+    return wrapper
+
+
+class LocalRateLimiter:
+    """
+    A token bucket, limiting a rate within a process.
+
+    The bucket holds up to a second's worth of tokens, and refills at `rate`
+    tokens a second.
+    """
+
+    def __init__(self, rate):
+        """Start with a full bucket."""
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self, amount, reserve):
+        """
+        Take tokens from the bucket if there are enough.
+
+        Args:
+            amount (int): The number of tokens to take. Amounts larger than the
+                bucket are taken once it's full.
+            reserve (float): The share of the bucket that has to be left over.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds to wait
+                before there could be enough.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            available = self.tokens - self.rate * reserve
+            needed = min(amount, self.rate * (1 - reserve))
+            if available >= needed:
+                self.tokens -= amount
+                return 0
+            return (needed - available) / self.rate
+
+    def refund(self, amount):
+        """Put back tokens taken for a request that wasn't sent."""
+        with self.lock:
+            self.tokens = min(self.rate, self.tokens + amount)
+
+
+class CacheRateLimiter:
+    """
+    A rate limit shared by every process using the same Django cache.
+
+    Requests are counted in one second windows with atomic cache increments.
+    """
+
+    def __init__(self, rate, cache_alias, key):
+        """Initialise the limiter."""
+        self.rate = rate
+        self.cache_alias = cache_alias
+        self.key = key
+
+    def _make_key(self, now):
+        """Return the cache key of the count of the window a time is in."""
+        return 'appsearch_rate:{}:{}'.format(self.key, int(now))
+
+    def try_acquire(self, amount, reserve):
+        """
+        Count an amount against the current window if it has room.
+
+        Args:
+            amount (int): The amount to count. Amounts larger than a window
+                are counted in a window of their own.
+            reserve (float): The share of the window that has to be left over.
+
+        Returns:
+            float: 0 if the amount was counted, otherwise the seconds to wait
+                for the next window.
+        """
+        cache = caches[self.cache_alias]
+        now = time.time()
+        key = self._make_key(now)
+        cache.add(key, 0, timeout=5)
+        count = cache.incr(key, amount)
+        if count == amount or count <= self.rate * (1 - reserve):
+            return 0
+        cache.decr(key, amount)
+        return math.floor(now) + 1 - now
+
+    def refund(self, amount):
+        """Take back an amount counted for a request that wasn't sent."""
+        try:
+            caches[self.cache_alias].decr(self._make_key(time.time()), amount)
+        except ValueError:
+            # The window it was counted in is over
+            pass
+
+
+class InFlightGovernor:
+    """
+    Limits the requests in flight at once within a process.
+
+    Interactive requests waiting for a slot are let through before bulk ones,
+    and bulk requests leave a share of the slots for interactive requests.
+    """
+
+    def __init__(self, max_in_flight, reserve):
+        """Initialise the governor."""
+        self.max_in_flight = max_in_flight
+        self.max_bulk_in_flight = max(1, int(max_in_flight * (1 - reserve)))
+        self.in_flight = 0
+        self.interactive_waiting = 0
+        self.condition = threading.Condition()
+
+    def _can_start(self, priority):
+        """Check whether a request of a priority can start, with the condition held."""
+        if priority == BULK:
+            return self.interactive_waiting == 0 and self.in_flight < self.max_bulk_in_flight
+        return self.in_flight < self.max_in_flight
+
+    def try_acquire(self, priority):
+        """Take a slot if there's one free, returning whether it was taken."""
+        with self.condition:
+            if self._can_start(priority):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self, priority):
+        """Wait for a free slot, and take it."""
+        with self.condition:
+            if priority == INTERACTIVE:
+                self.interactive_waiting += 1
+            try:
+                while not self._can_start(priority):
+                    self.condition.wait()
+            finally:
+                if priority == INTERACTIVE:
+                    self.interactive_waiting -= 1
+            self.in_flight += 1
+
+    def set_waiting(self, priority, delta):
+        """Count an interactive request waiting from an event loop in or out."""
+        if priority == INTERACTIVE:
+            with self.condition:
+                self.interactive_waiting += delta
+
+    def release(self):
+        """Free a slot."""
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+
+class Throttle:
+    """The rate limits and in flight limit of the requests to an engine."""
+
+    def __init__(self, limits, cache_alias=None, key=''):
+        """
+        Initialise the throttle.
+
+        Args:
+            limits (dict): The `requests_per_second`, `documents_per_second`,
+                `max_in_flight` and `interactive_reserve` limits, all optional.
+            cache_alias (str): Optional, the Django cache to share the rate
+                limits between processes through.
+            key (str): The key to share the rate limits on.
+        """
+        self.reserve = limits.get('interactive_reserve', DEFAULT_INTERACTIVE_RESERVE)
+
+        def make_limiter(kind):
+            rate = limits.get('{}_per_second'.format(kind))
+            if rate is None:
+                return None
+            if cache_alias is None:
+                return LocalRateLimiter(rate)
+            return CacheRateLimiter(rate, cache_alias, '{}:{}'.format(key, kind))
+
+        self.requests = make_limiter('requests')
+        self.documents = make_limiter('documents')
+        max_in_flight = limits.get('max_in_flight')
+        self.governor = None if max_in_flight is None else InFlightGovernor(max_in_flight, self.reserve)
+
+    def _try_acquire_rates(self, documents, priority):
+        """Take from the rate limits, returning the seconds to wait if there wasn't room."""
+        reserve = self.reserve if priority == BULK else 0
+        if self.requests is not None:
+            wait = self.requests.try_acquire(1, reserve)
+            if wait:
+                return wait
+        if self.documents is not None and documents:
+            wait = self.documents.try_acquire(documents, reserve)
+            if wait:
+                if self.requests is not None:
+                    # The request isn't sent yet after all
+                    self.requests.refund(1)
+                return wait
+        return 0
+
+    @contextmanager
+    def request(self, documents, priority):
+        """
+        Wait for room to send a request, and hold its in flight slot while it's sent.
+
+        Args:
+            documents (int): The number of documents in the request.
+            priority (str): `INTERACTIVE` or `BULK`.
+        """
+        while True:
+            wait = self._try_acquire_rates(documents, priority)
+            if not wait:
+                break
+            time.sleep(wait)
+
+        if self.governor is not None:
+            self.governor.acquire(priority)
+        try:
+            yield
+        finally:
+            if self.governor is not None:
+                self.governor.release()
+
+    async def arequest(self, coroutine_function, documents, priority):
+        """
+        Wait for room to send a request from an event loop, and send it.
+
+        Args:
+            coroutine_function (coroutine function): Sends the request.
+            documents (int): The number of documents in the request.
+            priority (str): `INTERACTIVE` or `BULK`.
+        """
+        while True:
+            wait = self._try_acquire_rates(documents, priority)
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+
+        if self.governor is not None:
+            self.governor.set_waiting(priority, 1)
+            try:
+                while not self.governor.try_acquire(priority):
+                    await asyncio.sleep(POLL_INTERVAL)
+            finally:
+                self.governor.set_waiting(priority, -1)
+        try:
+            return await coroutine_function()
+        finally:
+            if self.governor is not None:
+                self.governor.release()
+
+
+def clear_throttle_cache():
+    """Drop the throttles, along with the state of their limits."""
+    with _throttles_lock:
+        _throttles.clear()
+
+
+@receiver(setting_changed)
+def _clear_throttle_cache_on_setting_changed(setting, **kwargs):
+    """Drop the throttles when app search settings change."""
+    if setting.startswith('APPSEARCH_'):
+        clear_throttle_cache()
+
+
+def get_throttle(engine_name):
+    """
+    Get the throttle of the requests to an engine.
+
+    Args:
+        engine_name (str): The engine, or None for requests that aren't to an
+            engine.
+
+    Returns:
+        Throttle: The throttle, or None if the engine isn't limited.
+    """
+    config = apps.get_app_config('django_elastic_appsearch')
+    if not config.rate_limits:
+        return None
+
+    if engine_name in config.rate_limits:
+        key = engine_name
+    elif DEFAULT_LIMITS in config.rate_limits:
+        # Engines without limits of their own share the default ones
+        key = DEFAULT_LIMITS
+    else:
+        return None
+
+    with _throttles_lock:
+        throttle = _throttles.get(key)
+        if throttle is None:
+            throttle = _throttles[key] = Throttle(config.rate_limits[key], config.rate_limit_cache, key)
+    return throttle
+
+
+def _get_request_throttle(path, body):
+    """Get the throttle for a request, and the number of documents it sends."""
+    match = _ENGINE_PATH.match(path)
+    engine_name = unquote(match.group(1)) if match else None
+    documents = len(body) if isinstance(body, (list, tuple)) else 0
+    return get_throttle(engine_name), documents
+
+
+class ThrottledAppSearch(AppSearch):
+    """An app search client that waits for room under `APPSEARCH_RATE_LIMITS` before each request."""
+
+    def perform_request(self, method, path, params=None, headers=None, body=None):
+        """Send a request once the engine's limits allow it."""
+        throttle, documents = _get_request_throttle(path, body)
+        if throttle is None:
+            return super().perform_request(method, path, params=params, headers=headers, body=body)
+        with throttle.request(documents, get_priority()):
+            return super().perform_request(method, path, params=params, headers=headers, body=body)
+
+
+class ThrottledAsyncAppSearch(AsyncAppSearch):
+    """An asyncio app search client that waits for room under `APPSEARCH_RATE_LIMITS` before each request."""
+
+    async def perform_request(self, method, path, params=None, headers=None, body=None):
+        """Send a request once the engine's limits allow it."""
+        throttle, documents = _get_request_throttle(path, body)
+        send = super().perform_request
+        if throttle is None:
+            return await send(method, path, params=params, headers=headers, body=body)
+        return await throttle.arequest(
+            lambda: send(method, path, params=params, headers=headers, body=body), documents, get_priority()
+        )
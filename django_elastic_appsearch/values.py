@@ -0,0 +1,278 @@
+"""Serialise querysets from rows of values, without building model instances."""
+
+from functools import lru_cache
+from operator import itemgetter
+
+from django.core.exceptions import FieldDoesNotExist
+
+from django_elastic_appsearch.slicer import keyset_slice_queryset
+
+# Fields of the base serialiser computed from the model rather than read from it
+ID_FIELD = 'id'
+OBJECT_TYPE_FIELD = 'object_type'
+
+# Model methods that change how objects are serialised when overridden
+SERIALISATION_METHODS = ('get_appsearch_document_id', '_serialise_for_appsearch', 'serialise_for_appsearch')
+
+
+def _is_inherited(cls, name, module):
+    """Check the attribute of a class is the one defined in a module, rather than overridden."""
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            return klass.__module__ == module
+    return False
+
+
+def _get_lookup(model, path):
+    """
+    Get the values lookup reading an attribute path from a model.
+
+    Args:
+        model (class): The model class.
+        path (str): The attribute path a serialiser field reads, eg. `make`
+            or `manufacturer.name`.
+
+    Returns:
+        str: The lookup to pass to `values_list`, or None if the path doesn't
+            end in a concrete field reached through forward relations.
+    """
+    parts = path.split('.')
+    for index, part in enumerate(parts):
+        if part == 'pk':
+            field = model._meta.pk
+        else:
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                return None
+        if not field.concrete:
+            return None
+
+        if index < len(parts) - 1:
+            if not (field.many_to_one or field.one_to_one):
+                return None
+            model = field.related_model
+        elif field.is_relation and field.attname != part:
+            # The relation itself would be an object, only its key is a value
+            return None
+    return '__'.join(parts)
+
+
+@lru_cache(maxsize=None)
+def compile_values_plan(model, serialiser_class):
+    """
+    Compile how to serialise a model from rows of values with a serialiser.
+
+    Only plain fields reading model fields, or fields of models they're related
+    to through foreign keys, can be read from values. The `id` and
+    `object_type` fields of `AppSearchSerialiser` are computed from the primary
+    key, unless they or the model's document ID are overridden.
+
+    Args:
+        model (class): The app search model class.
+        serialiser_class (class): The app search serialiser class.
+
+    Returns:
+        (list of str, list of tuple): The lookups to fetch, and for each
+            serialiser field its name, the column it's read from or None to
+            compute it, the function converting its value, and whether it's
+            required. None if the serialiser needs model instances.
+    """
+    meta = getattr(serialiser_class, 'Meta', None)
+    if not getattr(meta, 'use_values', True):
+        return None
+    if not all(_is_inherited(model, name, 'django_elastic_appsearch.orm') for name in SERIALISATION_METHODS):
+        return None
+
+    lookups, fields = ['pk'], []
+    for (name, _, to_value, call, required, pass_self) in serialiser_class._compiled_fields:
+        if pass_self:
+            # Method fields need the instance, apart from the ones computed from the primary key
+            if name not in (ID_FIELD, OBJECT_TYPE_FIELD) or not _is_inherited(
+                serialiser_class, 'get_{}'.format(name), 'django_elastic_appsearch.serialisers'
+            ):
+                return None
+            fields.append((name, None, None, required))
+            continue
+
+        field = serialiser_class._field_map[name]
+        if call or field.as_getter(name, serialiser_class) is not None:
+            return None
+        lookup = _get_lookup(model, field.attr or name)
+        if lookup is None:
+            return None
+        if lookup not in lookups:
+            lookups.append(lookup)
+        fields.append((name, lookups.index(lookup), to_value, required))
+
+    return lookups, fields
+
+
+class ValuesSerialiser:
+    """Serialises rows of values for the engines of a model."""
+
+    def __init__(self, model, plans):
+        """
+        Initialise the serialiser.
+
+        Args:
+            model (class): The app search model class.
+            plans (list of (str, list of str, list of tuple)): The engine names,
+                and the lookups and fields compiled for their serialisers.
+        """
+        self.model = model
+        self.lookups = ['pk']
+        self.plans = []
+        compiled = {}
+        for (engine_name, lookups, fields) in plans:
+            for lookup in lookups:
+                if lookup not in self.lookups:
+                    self.lookups.append(lookup)
+            # Point each field at its column among the lookups of every serialiser,
+            # once for each serialiser, so engines sharing one share its fields
+            if id(fields) not in compiled:
+                compiled[id(fields)] = [
+                    (name, None if column is None else self.lookups.index(lookups[column]), to_value, required)
+                    for (name, column, to_value, required) in fields
+                ]
+            self.plans.append((engine_name, compiled[id(fields)]))
+
+    def get_pk(self, row):
+        """Get the primary key of the object a row was fetched for."""
+        return row[0]
+
+    def slice_queryset(self, queryset, chunk_size, ordering=None):
+        """
+        Fetch the values of a queryset in chunks, using keyset pagination.
+
+        Args:
+            queryset (QuerySet): The queryset to fetch.
+            chunk_size (int): The maximum number of rows in a chunk.
+            ordering (str or tuple of str): A unique, indexed field to page
+                over, or several fields that are unique together. Defaults to
+                the model's `appsearch_ordering_key`.
+
+        Yields:
+            list of tuple: The rows in each chunk, in order.
+        """
+        ordering = ordering or self.model.get_appsearch_ordering_key()
+        field_names = [field.lstrip('-') for field in ([ordering] if isinstance(ordering, str) else ordering)]
+        lookups = list(self.lookups)
+        for field_name in field_names:
+            if field_name not in lookups:
+                lookups.append(field_name)
+        return keyset_slice_queryset(
+            queryset.values_list(*lookups),
+            chunk_size,
+            ordering=ordering,
+            key=itemgetter(*(lookups.index(field_name) for field_name in field_names))
+        )
+
+    def _serialise_fields(self, row, fields):
+        """Serialise a row of values with the fields of a serialiser."""
+        document = {}
+        for (name, column, to_value, required) in fields:
+            if column is None:
+                value = '{}_{}'.format(self.model.__name__, row[0]) if name == ID_FIELD else self.model.__name__
+            else:
+                value = row[column]
+                if to_value and (required or value is not None):
+                    value = to_value(value)
+            document[name] = value
+        return document
+
+    def serialise(self, row, engine_name):
+        """
+        Serialise a row of values for an engine.
+
+        Args:
+            row (tuple): The row of values, fetched with `slice_queryset`.
+            engine_name (str): Only serialise for this engine.
+
+        Returns:
+        list of dict: The document serialised with the serialisers of the
+            engine, in order.
+        """
+        return self.serialise_for_engines(row, [engine_name])[0]
+
+    def serialise_for_engines(self, row, engine_names):
+        """
+        Serialise a row of values for several engines, once for each serialiser.
+
+        Args:
+            row (tuple): The row of values, fetched with `slice_queryset`.
+            engine_names (list of str): The engines to serialise for.
+
+        Returns:
+        list of list of dict: The documents for each engine, in the same order
+            as the engines.
+        """
+        documents, serialised = {engine_name: [] for engine_name in engine_names}, {}
+        for (plan_engine_name, fields) in self.plans:
+            if plan_engine_name not in documents:
+                continue
+            if id(fields) not in serialised:
+                serialised[id(fields)] = self._serialise_fields(row, fields)
+            documents[plan_engine_name].append(serialised[id(fields)])
+        return [documents[engine_name] for engine_name in engine_names]
+
+
+def get_values_serialiser(model, engine_names):
+    """
+    Get a serialiser for rows of values, if the model's serialisers allow it.
+
+    Args:
+        model (class): The app search model class.
+        engine_names (list of str): The engines documents are written to.
+
+    Returns:
+        ValuesSerialiser: The serialiser, or None if any serialiser for the
+            engines needs model instances.
+    """
+    plans = []
+    for (serialiser_class, engine_name) in model.get_appsearch_write_engine_pairs():
+        if engine_name not in engine_names:
+            continue
+        plan = compile_values_plan(model, serialiser_class)
+        if plan is None:
+            return None
+        plans.append((engine_name,) + plan)
+    return ValuesSerialiser(model, plans)
+
+
+def compile_update_plan(model, serialiser_class, field_names):
+    """
+    Compile which fields of a serialiser change when some model fields are updated.
+
+    A serialiser field changes if it reads one of the model fields, or reads
+    through a foreign key that's updated to fields of the related model.
+
+    Args:
+        model (class): The app search model class.
+        serialiser_class (class): The app search serialiser class.
+        field_names (iterable of str): The names of the updated model fields.
+
+    Returns:
+        list of tuple: For each serialiser field that changes, its name, the
+            lookup it's read from, the function converting its value, and
+            whether it's required. None if the serialiser needs model
+            instances, as fields it computes could change too.
+    """
+    plan = compile_values_plan(model, serialiser_class)
+    if plan is None:
+        return None
+
+    updated = set()
+    for field_name in field_names:
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            continue
+        updated.update((field.name, field.attname))
+
+    lookups, fields = plan
+    return [
+        (name, lookups[column], to_value, required)
+        for (name, column, to_value, required) in fields
+        if column is not None and lookups[column].split('__')[0] in updated
+    ]
@@ -1,9 +1,10 @@
 """Example Django app models."""
 
 from django.db import models
+from django.utils import timezone
 from django_elastic_appsearch.orm import AppSearchModel, AppSearchMultiEngineModel
 
-from example.serialisers import CarSerialiser
+from example.serialisers import CarSerialiser, MotorbikeSerialiser, TrailerSerialiser
 from example.querysets import CustomQuerySet
 
 
@@ -30,6 +31,68 @@ class Truck(AppSearchMultiEngineModel):
     year_manufactured = models.DateTimeField()
 
 
+class Van(AppSearchModel):
+    """A van, synced to app search automatically."""
+
+    class AppsearchMeta:
+        appsearch_engine_name = 'vans'
+        appsearch_serialiser_class = CarSerialiser
+        appsearch_auto_sync = True
+
+    make = models.TextField()
+    model = models.TextField()
+    year_manufactured = models.DateTimeField()
+
+
+class Tractor(AppSearchModel):
+    """A tractor, synced by when it was last updated."""
+
+    class AppsearchMeta:
+        appsearch_engine_name = 'tractors'
+        appsearch_serialiser_class = CarSerialiser
+        appsearch_updated_field = 'updated_at'
+
+    make = models.TextField()
+    model = models.TextField()
+    year_manufactured = models.DateTimeField()
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+
+class Trailer(AppSearchModel):
+    """A trailer, deleted along with its tractor."""
+
+    class AppsearchMeta:
+        appsearch_engine_name = 'trailers'
+        appsearch_serialiser_class = TrailerSerialiser
+
+    tractor = models.ForeignKey(Tractor, on_delete=models.CASCADE)
+    model = models.TextField()
+
+
+class Manufacturer(models.Model):
+    """A manufacturer of motorbikes."""
+
+    name = models.TextField()
+
+
+class Feature(models.Model):
+    """A feature of motorbikes."""
+
+    name = models.TextField()
+
+
+class Motorbike(AppSearchModel):
+    """A motorbike, serialised with related objects."""
+
+    class AppsearchMeta:
+        appsearch_engine_name = 'motorbikes'
+        appsearch_serialiser_class = MotorbikeSerialiser
+
+    manufacturer = models.ForeignKey(Manufacturer, on_delete=models.CASCADE)
+    features = models.ManyToManyField(Feature)
+    model = models.TextField()
+
+
 class Bus(Car):
     """A bus"""
 
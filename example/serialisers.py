@@ -14,3 +14,29 @@ class CarSerialiser(serialisers.AppSearchSerialiser):
     def get_verbose_name(self, instance):
         """Verbose name of the car."""
         return '{} {}'.format(instance.make, instance.model)
+
+
+class TrailerSerialiser(serialisers.AppSearchSerialiser):
+    """Trailer serialiser."""
+
+    model = serialisers.StrField()
+
+
+class MotorbikeSerialiser(serialisers.AppSearchSerialiser):
+    """Motorbike serialiser, reading related objects."""
+
+    class Meta:
+        select_related = ['manufacturer']
+        prefetch_related = ['features']
+
+    make = serialisers.MethodField()
+    model = serialisers.StrField()
+    features = serialisers.MethodField()
+
+    def get_make(self, instance):
+        """Name of the manufacturer."""
+        return instance.manufacturer.name
+
+    def get_features(self, instance):
+        """Names of the features."""
+        return [feature.name for feature in instance.features.all()]
@@ -54,27 +54,32 @@ setup(
     url='https://github.com/infoxchange/django_elastic_appsearch',
     packages=[
         'django_elastic_appsearch',
+        'django_elastic_appsearch.management',
+        'django_elastic_appsearch.management.commands',
+        'django_elastic_appsearch.migrations',
     ],
     include_package_data=True,
+    python_requires='>=3.8',
     install_requires=[
-        'elastic-enterprise-search>=7.15.0',
+        'asgiref',
+        'elastic-enterprise-search>=8.0.0',
         'serpy',
     ],
+    extras_require={
+        'async': ['aiohttp'],
+    },
     license="MIT",
     zip_safe=False,
     keywords='django_elastic_appsearch',
     classifiers=[
         'Development Status :: 5 - Production/Stable',
-        'Framework :: Django :: 2.2',
-        'Framework :: Django :: 3.0',
-        'Framework :: Django :: 3.1',
         'Framework :: Django :: 3.2',
+        'Framework :: Django :: 4.2',
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
         'Natural Language :: English',
-        'Programming Language :: Python :: 3.6',
-        'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
     ],
 )
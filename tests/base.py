@@ -1,6 +1,6 @@
 """Elastic App Search Client base test cases."""
 
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 from django.test import TestCase
 
@@ -14,11 +14,26 @@ class BaseElasticAppSearchClientTestCase(TestCase):
         client_index = patch('elastic_enterprise_search.AppSearch.index_documents')
         client_update = patch('elastic_enterprise_search.AppSearch.put_documents')
         client_destroy = patch('elastic_enterprise_search.AppSearch.delete_documents')
+        async_client_index = patch(
+            'elastic_enterprise_search.AsyncAppSearch.index_documents', new_callable=AsyncMock
+        )
+        async_client_update = patch(
+            'elastic_enterprise_search.AsyncAppSearch.put_documents', new_callable=AsyncMock
+        )
+        async_client_destroy = patch(
+            'elastic_enterprise_search.AsyncAppSearch.delete_documents', new_callable=AsyncMock
+        )
 
         self.client_index = client_index.start()
         self.client_update = client_update.start()
         self.client_destroy = client_destroy.start()
+        self.async_client_index = async_client_index.start()
+        self.async_client_update = async_client_update.start()
+        self.async_client_destroy = async_client_destroy.start()
 
         self.addCleanup(client_index.stop)
         self.addCleanup(client_update.stop)
         self.addCleanup(client_destroy.stop)
+        self.addCleanup(async_client_index.stop)
+        self.addCleanup(async_client_update.stop)
+        self.addCleanup(async_client_destroy.stop)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for the asyncio ORM methods."""
+
+import asyncio
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django_elastic_appsearch.buffer import AppSearchBuffer
+from django_elastic_appsearch.engines import clear_engine_alias_cache
+from django_elastic_appsearch.models import EngineAlias
+from elastic_transport import ConnectionTimeout
+
+from example.models import Car, Truck
+from example.serialisers import CarSerialiser
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+class TestAsyncORM(BaseElasticAppSearchClientTestCase):
+    """Test Django Elastic App Search asyncio ORM functions."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        # Create 22 cars and trucks
+        for i in range(0, 22):
+            timezone_now = timezone.now()
+            Car(
+                make='Make {}'.format(i),
+                model='Model {}'.format(i),
+                year_manufactured=timezone_now
+            ).save()
+            Truck(
+                make='Make {}'.format(i),
+                model='Model {}'.format(i),
+                year_manufactured=timezone_now
+            ).save()
+
+        self.original_pairs = Truck.get_appsearch_serialiser_engine_pairs()
+        Truck.set_appsearch_serialiser_engine_pairs([(CarSerialiser, 'trucks'), (CarSerialiser, 'vehicles')])
+        self.addCleanup(Truck.set_appsearch_serialiser_engine_pairs, self.original_pairs)
+
+        self.car = Car.objects.first()
+        self.truck = Truck.objects.first()
+        self.truck_ids = [truck.get_appsearch_document_id() for truck in Truck.objects.order_by('pk')]
+
+    @contextmanager
+    def engine_aliases(self):
+        """Write cars through their engine alias, read from the database on first use."""
+        clear_engine_alias_cache()
+        self.addCleanup(clear_engine_alias_cache)
+        with patch.object(Car.AppsearchMeta, 'appsearch_use_engine_alias', True, create=True):
+            yield
+
+    async def test_model_object_index(self):
+        """Test indexing a model object to appsearch."""
+        car_id = self.car.get_appsearch_document_id()
+        self.async_client_index.return_value = [{'id': car_id, 'errors': []}]
+        response = await self.car.aindex_to_appsearch()
+        self.assertEqual(response, [{'id': car_id, 'errors': []}])
+        self.assertEqual(self.async_client_index.call_count, 1)
+        self.assertEqual(self.client_index.call_count, 0)
+
+    async def test_model_object_index_retries(self):
+        """Test a request that timed out is sent again, the same as when indexing synchronously."""
+        car_id = self.car.get_appsearch_document_id()
+        self.async_client_index.side_effect = [ConnectionTimeout('Timed out'), [{'id': car_id, 'errors': []}]]
+        with patch('django_elastic_appsearch.retries.asyncio.sleep'), \
+                self.assertLogs('django_elastic_appsearch.retries', 'WARNING'):
+            response = await self.car.aindex_to_appsearch()
+        self.assertEqual(response, [{'id': car_id, 'errors': []}])
+        self.assertEqual(self.async_client_index.call_count, 2)
+
+    async def test_model_object_buffered(self):
+        """Test indexing and deleting a model object joins the active buffer, the same as synchronously."""
+        buffer = AppSearchBuffer()
+        with patch('django_elastic_appsearch.orm.get_active_buffer', return_value=buffer):
+            self.assertIsNone(await self.car.aindex_to_appsearch())
+            self.assertEqual(await self.truck.adelete_from_appsearch(), [])
+        self.assertEqual(len(buffer), 3)
+        self.async_client_index.assert_not_called()
+        self.async_client_destroy.assert_not_called()
+
+    async def test_model_object_update(self):
+        """Test indexing a model object to appsearch as an update operation."""
+        await self.car.aindex_to_appsearch(update_only=True)
+        self.assertEqual(self.async_client_update.call_count, 1)
+
+    async def test_model_object_delete(self):
+        """Test deleting a model object from appsearch."""
+        await self.car.adelete_from_appsearch()
+        self.async_client_destroy.assert_called_once_with(
+            engine_name='cars', document_ids=[self.car.get_appsearch_document_id()]
+        )
+
+    async def test_multi_engine_model_object_index(self):
+        """Test indexing a multi engine model object to all its engines."""
+        self.async_client_index.side_effect = lambda engine_name, documents: [{'id': engine_name, 'errors': []}]
+        responses = await self.truck.aindex_to_appsearch()
+        self.assertEqual(responses, [[{'id': 'trucks', 'errors': []}], [{'id': 'vehicles', 'errors': []}]])
+        self.assertEqual(
+            self.async_client_index.call_args_list[0][1]['documents'],
+            [CarSerialiser(self.truck).data]
+        )
+
+    async def test_multi_engine_model_object_delete(self):
+        """Test deleting a multi engine model object from all its engines."""
+        responses = await self.truck.adelete_from_appsearch()
+        self.assertEqual(len(responses), 2)
+        self.assertEqual(self.async_client_destroy.call_count, 2)
+
+    async def test_queryset_index(self):
+        """Test indexing a queryset to appsearch."""
+        await Car.objects.all().aindex_to_appsearch()
+        # Note that the app search chunk size is set to 5 in `tests.settings`
+        # Therefore you should see 5 calls to cover 22 documents
+        self.assertEqual(self.async_client_index.call_count, 5)
+
+    async def test_queryset_update(self):
+        """Test indexing a queryset to appsearch as an update operation."""
+        await Car.objects.all().aindex_to_appsearch(update_only=True)
+        self.assertEqual(self.async_client_update.call_count, 5)
+
+    async def test_queryset_delete(self):
+        """Test deleting a queryset from appsearch."""
+        await Car.objects.all().adelete_from_appsearch()
+        self.assertEqual(self.async_client_destroy.call_count, 5)
+
+    async def test_queryset_index_engine_alias(self):
+        """Test engine aliases are resolved off the event loop when indexing a queryset."""
+        await sync_to_async(EngineAlias.objects.create)(
+            name='cars', engine_name='cars__v1', next_engine_name='cars__v2', version=2
+        )
+        with self.engine_aliases():
+            await Car.objects.all().aindex_to_appsearch()
+
+        self.assertEqual(
+            sorted({call[1]['engine_name'] for call in self.async_client_index.call_args_list}),
+            ['cars__v1', 'cars__v2']
+        )
+        self.assertEqual(self.async_client_index.call_count, 10)
+
+    async def test_queryset_delete_engine_alias(self):
+        """Test engine aliases are resolved off the event loop when deleting a queryset."""
+        with self.engine_aliases():
+            await Car.objects.all().adelete_from_appsearch()
+
+        self.assertEqual(self.async_client_destroy.call_count, 5)
+        self.assertEqual(self.async_client_destroy.call_args[1]['engine_name'], 'cars')
+
+    async def test_multi_engine_queryset_index_with_workers(self):
+        """Test indexing a multi engine queryset concurrently keeps the response order."""
+        in_flight = []
+        max_in_flight = []
+
+        async def index_documents(engine_name, documents):
+            in_flight.append(engine_name)
+            max_in_flight.append(len(in_flight))
+            # Make earlier chunks finish later than the chunks after them
+            await asyncio.sleep(0.01 * (30 - len(max_in_flight)) / 10)
+            in_flight.remove(engine_name)
+            return [{'engine': engine_name, 'id': document['id']} for document in documents]
+
+        self.async_client_index.side_effect = index_documents
+        responses = await Truck.objects.all().aindex_to_appsearch(workers=2)
+
+        self.assertEqual(self.async_client_index.call_count, 10)
+        # 2 chunks in flight, each sent to 2 engines at once
+        self.assertEqual(max(max_in_flight), 4)
+        self.assertEqual(
+            responses,
+            [
+                {'engine': engine_name, 'id': truck_id}
+                for engine_name in ['trucks', 'vehicles'] for truck_id in self.truck_ids
+            ]
+        )
+
+    async def test_empty_queryset_index(self):
+        """Test indexing an empty queryset doesn't call app search."""
+        responses = await Car.objects.filter(make='Unknown').aindex_to_appsearch()
+        self.assertEqual(responses, [])
+        self.assertEqual(self.async_client_index.call_count, 0)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for packing documents under the payload size limit."""
+
+from django.test import TestCase
+from django.utils import timezone
+from django_elastic_appsearch.batching import DocumentPacker, get_document_size, pack_documents
+
+from example.models import Car
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+class TestPackDocuments(TestCase):
+    """Test packing documents into batches."""
+
+    def setUp(self):
+        """Setup the documents, of 22 bytes each."""
+        self.documents = [{'id': 'Car_{}'.format(i), 'm': 'x'} for i in range(1, 10)]
+        self.hashes = {document['id']: 'hash' for document in self.documents}
+
+    def test_get_document_size(self):
+        """Test documents are measured as compact JSON."""
+        self.assertEqual(get_document_size(self.documents[0]), 22)
+        self.assertEqual(get_document_size({'make': 'Škoda'}), 17)
+
+    def test_no_payload_size(self):
+        """Test batches are left as they are without a byte budget."""
+        batches = [(self.documents[:7], {}), (self.documents[7:], {})]
+        self.assertEqual(
+            list(pack_documents(batches, 5)), [(self.documents[:7], {}, []), (self.documents[7:], {}, [])]
+        )
+
+    def test_split_and_pack(self):
+        """Test batches are split over the byte budget, and packed up to the document count."""
+        batches = [
+            (self.documents[:5], {key: self.hashes[key] for key in ['Car_1', 'Car_2', 'Car_3', 'Car_4', 'Car_5']}),
+            (self.documents[5:6], {'Car_6': 'hash'}),
+            (self.documents[6:], {}),
+        ]
+        packed = list(pack_documents(batches, 4, max_payload_size=70))
+        # Three 22 byte documents and the list brackets and commas come to 70 bytes
+        self.assertEqual([[document['id'] for document in documents] for (documents, _, _) in packed], [
+            ['Car_1', 'Car_2', 'Car_3'], ['Car_4', 'Car_5', 'Car_6'], ['Car_7', 'Car_8', 'Car_9'],
+        ])
+        self.assertEqual([sorted(hashes) for (_, hashes, _) in packed], [
+            ['Car_1', 'Car_2', 'Car_3'], ['Car_4', 'Car_5', 'Car_6'], [],
+        ])
+
+        packed = list(pack_documents([(self.documents, {})], 4, max_payload_size=1000))
+        self.assertEqual([len(documents) for (documents, _, _) in packed], [4, 4, 1])
+
+    def test_packer_returns_full_batches(self):
+        """Test the packer holds on to documents until a batch is full or it's flushed."""
+        packer = DocumentPacker(4, max_payload_size=1000)
+        self.assertEqual(packer.add(self.documents[:3], {}), [])
+        batches = packer.add(self.documents[3:6], {'Car_4': 'hash', 'Car_6': 'hash'})
+        self.assertEqual(batches, [(self.documents[:4], {'Car_4': 'hash'}, [])])
+        self.assertEqual(packer.flush(), [(self.documents[4:6], {'Car_6': 'hash'}, [])])
+        self.assertEqual(packer.flush(), [])
+
+    def test_oversized_documents(self):
+        """Test documents over the byte budget on their own are reported rather than sent."""
+        large = {'id': 'Car_10', 'm': 'x' * 100}
+        with self.assertLogs('django_elastic_appsearch', 'WARNING') as logs:
+            packed = list(pack_documents([([self.documents[0], large], dict(self.hashes, Car_10='hash'))], 4, 64))
+        self.assertEqual(logs.output, [
+            'WARNING:django_elastic_appsearch.batching:'
+            'Document Car_10 is 122 bytes, over the 64 byte payload size limit, and was not sent.'
+        ])
+        self.assertEqual(len(packed), 1)
+        documents, hashes, rejected = packed[0]
+        self.assertEqual(documents, [self.documents[0]])
+        self.assertEqual(hashes, {'Car_1': 'hash'})
+        self.assertEqual(rejected[0]['id'], 'Car_10')
+        self.assertIn('over the 64 byte payload size limit', rejected[0]['errors'][0])
+
+        with self.assertLogs('django_elastic_appsearch', 'WARNING'):
+            self.assertEqual(list(pack_documents([([large], {})], 4, 64)), [([], {}, rejected)])
+
+
+class TestQuerysetPayloadSize(BaseElasticAppSearchClientTestCase):
+    """Test indexing querysets under the payload size limit."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        # Create 12 cars
+        for i in range(0, 12):
+            Car(make='Make {:02}'.format(i), model='Model {:02}'.format(i), year_manufactured=timezone.now()).save()
+        # Documents get larger with the length of their IDs
+        self.document_size = get_document_size(Car.objects.last().serialise_for_appsearch())
+
+    def test_queryset_index_splits_chunks(self):
+        """Test indexing a queryset sends chunks over the byte budget in several requests."""
+        self.client_index.return_value = []
+        with self.assertLogs('django_elastic_appsearch.batching', 'WARNING'):
+            Car.objects.create(make='Make' * 100, model='Model', year_manufactured=timezone.now())
+            responses = Car.objects.all().index_to_appsearch(max_payload_size=self.document_size * 3 + 4)
+
+        self.assertEqual([len(call[1]['documents']) for call in self.client_index.call_args_list], [3, 3, 3, 3])
+        self.assertEqual(len(responses), 1)
+        self.assertEqual(responses[0]['id'], Car.objects.last().get_appsearch_document_id())
+
+    async def test_async_queryset_index_splits_chunks(self):
+        """Test indexing a queryset from an event loop sends chunks over the byte budget in several requests."""
+        self.async_client_index.return_value = []
+        await Car.objects.all().aindex_to_appsearch(max_payload_size=self.document_size * 3 + 4)
+        self.assertEqual(
+            [len(call[1]['documents']) for call in self.async_client_index.call_args_list], [3, 2, 3, 2, 2]
+        )
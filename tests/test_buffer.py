@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for the write-behind buffer."""
+
+from unittest.mock import patch
+
+from django.apps import apps
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseServerError
+from django.test import RequestFactory
+from django.utils import timezone
+from django_elastic_appsearch.buffer import (
+    DELETE,
+    INDEX,
+    UPDATE,
+    AppSearchBufferMiddleware,
+    appsearch_buffer,
+    transaction_buffer
+)
+from django_elastic_appsearch.throttle import BULK, get_priority
+from elastic_transport import ConnectionTimeout
+
+from example.models import Car, Truck
+from example.serialisers import CarSerialiser
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+class TestAppSearchBuffer(BaseElasticAppSearchClientTestCase):
+    """Test buffering app search operations."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        # Create 12 cars
+        for i in range(0, 12):
+            timezone_now = timezone.now()
+            car = Car(
+                make='Make {}'.format(i),
+                model='Model {}'.format(i),
+                year_manufactured=timezone_now
+            )
+            car.save()
+
+    def test_buffered_index(self):
+        """Test model object indexing is sent in bulk when the block exits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with appsearch_buffer():
+                for car in Car.objects.all():
+                    self.assertIsNone(car.index_to_appsearch())
+                self.assertEqual(self.client_index.call_count, 0)
+
+        # Note that the app search chunk size is set to 5 in `tests.settings`
+        self.assertEqual(self.client_index.call_count, 3)
+        self.assertEqual(
+            [len(call[1]['documents']) for call in self.client_index.call_args_list],
+            [5, 5, 2]
+        )
+
+    def test_buffered_index_packed_and_retried(self):
+        """Test buffered operations are sent like the rest of the writes, packed, retried and at bulk priority."""
+        priorities = []
+
+        def index_documents(engine_name, documents):
+            priorities.append(get_priority())
+            if len(priorities) == 1:
+                raise ConnectionTimeout('Timed out')
+            return [{'id': document['id'], 'errors': []} for document in documents]
+
+        self.client_index.side_effect = index_documents
+        config = apps.get_app_config('django_elastic_appsearch')
+        with patch.object(config, 'max_payload_size', 400), patch('django_elastic_appsearch.retries.time.sleep'):
+            with self.assertLogs('django_elastic_appsearch.retries', 'WARNING'):
+                with self.captureOnCommitCallbacks(execute=True), appsearch_buffer():
+                    for car in Car.objects.all()[:4]:
+                        car.index_to_appsearch()
+
+        # Two documents fit in a request, and the first request is sent again after timing out
+        self.assertEqual(
+            [len(call[1]['documents']) for call in self.client_index.call_args_list],
+            [2, 2, 2]
+        )
+        self.assertEqual(self.client_index.call_args_list[0], self.client_index.call_args_list[1])
+        self.assertEqual(priorities, [BULK] * 3)
+
+    def test_buffered_operations_deduplicated(self):
+        """Test only the last write to each document is sent."""
+        car = Car.objects.first()
+        other_car = Car.objects.last()
+        with self.captureOnCommitCallbacks(execute=True):
+            with appsearch_buffer() as buffer:
+                car.index_to_appsearch()
+                car.make = 'Toyota'
+                car.index_to_appsearch(update_only=True)
+                other_car.index_to_appsearch()
+                other_car.delete_from_appsearch()
+                self.assertEqual(len(buffer), 2)
+
+        # The update is merged into the pending index
+        self.client_index.assert_called_once_with(
+            engine_name='cars', documents=[CarSerialiser(car).data]
+        )
+        self.assertEqual(self.client_update.call_count, 0)
+        self.client_destroy.assert_called_once_with(
+            engine_name='cars', document_ids=[other_car.get_appsearch_document_id()]
+        )
+
+    def test_buffered_multi_engine_model(self):
+        """Test a multi engine model object is buffered for each of its engines."""
+        truck = Truck(make='Volvo', model='FH16', year_manufactured=timezone.now())
+        truck.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            with appsearch_buffer():
+                truck.index_to_appsearch()
+
+        self.assertEqual(
+            self.client_index.call_count,
+            len(Truck.get_appsearch_serialiser_engine_pairs())
+        )
+
+    def test_buffer_dropped_on_rollback(self):
+        """Test buffered operations are dropped when the transaction rolls back."""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    with appsearch_buffer():
+                        Car.objects.first().index_to_appsearch()
+                    raise RuntimeError()
+            except RuntimeError:
+                pass
+
+        self.assertEqual(self.client_index.call_count, 0)
+
+    def test_buffer_dropped_on_exception(self):
+        """Test buffered operations are dropped when the block raises."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with appsearch_buffer():
+                    Car.objects.first().index_to_appsearch()
+                    raise RuntimeError()
+
+        self.assertEqual(self.client_index.call_count, 0)
+
+    def test_nested_buffers(self):
+        """Test nested blocks share the outermost buffer."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with appsearch_buffer() as buffer:
+                with appsearch_buffer() as nested_buffer:
+                    Car.objects.first().index_to_appsearch()
+                self.assertIs(nested_buffer, buffer)
+                self.assertEqual(self.client_index.call_count, 0)
+
+        self.assertEqual(self.client_index.call_count, 1)
+
+    def test_middleware(self):
+        """Test the middleware buffers the operations made by a view."""
+        def view(request):
+            for car in Car.objects.all():
+                car.index_to_appsearch()
+            return HttpResponse()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AppSearchBufferMiddleware(view)(RequestFactory().get('/'))
+
+        self.assertEqual(self.client_index.call_count, 3)
+
+    def test_middleware_server_error(self):
+        """Test the middleware drops the operations when the view fails."""
+        def view(request):
+            Car.objects.first().index_to_appsearch()
+            return HttpResponseServerError()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AppSearchBufferMiddleware(view)(RequestFactory().get('/'))
+
+        self.assertEqual(self.client_index.call_count, 0)
+
+
+class TestTransactionBuffer(BaseElasticAppSearchClientTestCase):
+    """Test buffering app search operations until the transaction commits."""
+
+    def add(self, *operation):
+        """Buffer an operation in the transaction's buffer."""
+        with transaction_buffer() as buffer:
+            buffer.add(*operation)
+
+    def test_savepoint_rolled_back(self):
+        """Test operations buffered within a savepoint that rolls back are dropped."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.add('cars', 'Car_1', DELETE)
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    self.add('cars', 'Car_2', DELETE)
+                    raise RuntimeError()
+                self.add('cars', 'Car_3', DELETE)
+
+        self.assertEqual(
+            [call[1]['document_ids'] for call in self.client_destroy.call_args_list], [['Car_1', 'Car_3']]
+        )
+
+    def test_newer_operations_sent_first(self):
+        """Test a savepoint's buffer sent after a newer operation on the same document doesn't undo it."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.add('cars', 'Car_2', DELETE)
+                with transaction.atomic():
+                    self.add('cars', 'Car_1', INDEX, {'id': 'Car_1', 'make': 'Make', 'model': 'Model A'})
+                    self.add('cars', 'Car_3', INDEX, {'id': 'Car_3', 'make': 'Make', 'model': 'Model A'})
+                self.add('cars', 'Car_1', UPDATE, {'id': 'Car_1', 'model': 'Model B'})
+                self.add('cars', 'Car_3', DELETE)
+
+        # The update is applied on top of the older write, and the older write of the deleted document is dropped
+        self.client_update.assert_called_once_with(engine_name='cars', documents=[{'id': 'Car_1', 'model': 'Model B'}])
+        self.client_index.assert_called_once_with(
+            engine_name='cars', documents=[{'id': 'Car_1', 'make': 'Make', 'model': 'Model B'}]
+        )
+        self.client_destroy.assert_called_once_with(engine_name='cars', document_ids=['Car_2', 'Car_3'])
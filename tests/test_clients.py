@@ -3,8 +3,15 @@
 
 """Test cases for elastic app search client."""
 
-from django.test import TestCase
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, patch
+
+from django.apps import apps
+from django.test import TestCase, override_settings
 from django_elastic_appsearch.clients import (
+    clear_client_cache,
+    get_api_v1_async_enterprise_search_client,
     get_api_v1_enterprise_search_client
 )
 from elastic_enterprise_search import AppSearch
@@ -13,8 +20,75 @@ from elastic_enterprise_search import AppSearch
 class TestClients(TestCase):
     """Test clients."""
 
+    def setUp(self):
+        """Start each test with no shared clients."""
+        super().setUp()
+        clear_client_cache()
+        self.config = apps.get_app_config('django_elastic_appsearch')
+
     def test_get_api_v1_enterprise_search_client(self):
         """Test `get_api_v1_enterprise_search_client`."""
 
         client = get_api_v1_enterprise_search_client()
         self.assertEqual(type(client), AppSearch)
+
+    def test_client_is_shared(self):
+        """Test the client is shared between calls and threads."""
+        client = get_api_v1_enterprise_search_client()
+        self.assertIs(get_api_v1_enterprise_search_client(), client)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            clients = list(executor.map(lambda _: get_api_v1_enterprise_search_client(), range(8)))
+        self.assertTrue(all(thread_client is client for thread_client in clients))
+
+    def test_client_is_keyed_on_config(self):
+        """Test a config change builds a new client."""
+        client = get_api_v1_enterprise_search_client()
+        with patch.object(self.config, 'api_key', 'another_api_key'):
+            self.assertIsNot(get_api_v1_enterprise_search_client(), client)
+        self.assertIs(get_api_v1_enterprise_search_client(), client)
+
+    def test_client_cache_cleared_on_setting_changed(self):
+        """Test changing app search settings drops the shared client."""
+        client = get_api_v1_enterprise_search_client()
+        with override_settings(APPSEARCH_CHUNK_SIZE=10):
+            self.assertIsNot(get_api_v1_enterprise_search_client(), client)
+
+    def test_client_closed_when_cache_cleared(self):
+        """Test dropping the shared client closes its connections."""
+        client = get_api_v1_enterprise_search_client()
+        with patch.object(client.transport, 'close') as close:
+            clear_client_cache()
+        close.assert_called_once_with()
+
+    def test_async_client_dropped_when_cache_cleared(self):
+        """Test the shared async clients are dropped without closing them, as they may still be in use."""
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        async def get_client():
+            return get_api_v1_async_enterprise_search_client()
+
+        client = loop.run_until_complete(get_client())
+        with patch.object(client.transport, 'close', new_callable=AsyncMock) as close:
+            clear_client_cache()
+            self.assertIsNot(loop.run_until_complete(get_client()), client)
+        close.assert_not_called()
+
+    def test_async_client_needs_running_loop(self):
+        """Test the async client can't be got outside of an event loop."""
+        with self.assertRaises(RuntimeError):
+            get_api_v1_async_enterprise_search_client()
+
+    def test_client_not_shared_with_forked_processes(self):
+        """Test a forked process builds its own client."""
+        client = get_api_v1_enterprise_search_client()
+        with patch('django_elastic_appsearch.clients.os.getpid', return_value=-1):
+            self.assertIsNot(get_api_v1_enterprise_search_client(), client)
+
+    def test_client_connections_per_node(self):
+        """Test the connection pool size is passed to the client."""
+        with patch.object(self.config, 'connections_per_node', 25), \
+                patch('django_elastic_appsearch.clients.AppSearch') as client_class:
+            get_api_v1_enterprise_search_client()
+        self.assertEqual(client_class.call_args[1]['connections_per_node'], 25)
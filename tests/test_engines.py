@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for engine aliases and rebuilds."""
+
+from datetime import datetime
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django_elastic_appsearch.engines import clear_engine_alias_cache, get_write_engine_names, rebuild_engine
+from django_elastic_appsearch.models import EngineAlias
+from elastic_enterprise_search import NotFoundError
+
+from example.models import Car
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+def not_found(*args, **kwargs):
+    """Raise an app search not found error."""
+    raise NotFoundError('Not found', meta=Mock(status=404), body={})
+
+
+class TestEngines(BaseElasticAppSearchClientTestCase):
+    """Test engine aliases and rebuilds."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        for name in (
+            'create_engine', 'delete_engine', 'get_engine', 'get_schema', 'put_schema',
+            'get_search_settings', 'put_search_settings', 'search',
+            'add_meta_engine_source', 'delete_meta_engine_source'
+        ):
+            patcher = patch('elastic_enterprise_search.AppSearch.{}'.format(name))
+            setattr(self, 'client_{}'.format(name), patcher.start())
+            self.addCleanup(patcher.stop)
+
+        self.client_get_schema.return_value = {'year_manufactured': 'date'}
+        self.client_get_search_settings.return_value = {
+            'search_fields': {'make': {'weight': 2}},
+            'result_fields': {},
+            'boosts': {},
+            'precision': 2,
+        }
+        self.client_search.return_value = {'meta': {'page': {'total_results': 22}}}
+
+        config = apps.get_app_config('django_elastic_appsearch')
+        for patcher in (
+            patch.object(config, 'engine_alias_timeout', 0),
+            patch.object(Car.AppsearchMeta, 'appsearch_use_engine_alias', True, create=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        clear_engine_alias_cache()
+        self.addCleanup(clear_engine_alias_cache)
+
+        for i in range(0, 22):
+            Car(make='Make {}'.format(i), model='Model {}'.format(i), year_manufactured=datetime(2010, 1, 1)).save()
+
+    def test_write_engine_names(self):
+        """Test resolving the engines written to through an alias."""
+        self.assertEqual(get_write_engine_names('cars'), ['cars'])
+
+        EngineAlias.objects.create(name='cars', engine_name='cars__v1', next_engine_name='cars__v2', version=2)
+        clear_engine_alias_cache()
+        self.assertEqual(get_write_engine_names('cars'), ['cars__v1', 'cars__v2'])
+
+    def test_write_engine_names_cached(self):
+        """Test aliases are cached for the alias timeout."""
+        config = apps.get_app_config('django_elastic_appsearch')
+        with patch.object(config, 'engine_alias_timeout', 60):
+            self.assertEqual(get_write_engine_names('cars'), ['cars'])
+            EngineAlias.objects.create(name='cars', engine_name='cars__v1', version=1)
+            with self.assertNumQueries(0):
+                self.assertEqual(get_write_engine_names('cars'), ['cars'])
+
+    def test_writes_follow_alias(self):
+        """Test model objects are written to the live engine and the engine being rebuilt."""
+        EngineAlias.objects.create(name='cars', engine_name='cars__v1', next_engine_name='cars__v2', version=2)
+        clear_engine_alias_cache()
+
+        car = Car.objects.first()
+        car.index_to_appsearch()
+        car.delete_from_appsearch()
+        Car.objects.all().index_to_appsearch()
+
+        # The engines are sent to concurrently, so in no particular order
+        self.assertEqual(
+            sorted(call[1]['engine_name'] for call in self.client_index.call_args_list),
+            ['cars__v1'] * 6 + ['cars__v2'] * 6
+        )
+        self.assertEqual(
+            sorted(call[1]['engine_name'] for call in self.client_destroy.call_args_list), ['cars__v1', 'cars__v2']
+        )
+        self.assertEqual(
+            [call[1]['documents'] for call in self.client_index.call_args_list[:2]],
+            [[car.serialise_for_appsearch()]] * 2
+        )
+
+    def test_rebuild_engine(self):
+        """Test rebuilding an engine and switching its alias over."""
+        self.assertEqual(rebuild_engine(Car), 'cars__v1')
+
+        self.client_create_engine.assert_called_once_with(engine_name='cars__v1')
+        self.client_put_schema.assert_called_once_with(
+            engine_name='cars__v1', schema={'year_manufactured': 'date'}
+        )
+        self.client_put_search_settings.assert_called_once_with(
+            engine_name='cars__v1', search_fields={'make': {'weight': 2}}, result_fields={}, boosts={}, precision=2
+        )
+        self.assertEqual(self.client_index.call_count, 5)
+        self.assertTrue(all(call[1]['engine_name'] == 'cars__v1' for call in self.client_index.call_args_list))
+        self.client_delete_engine.assert_called_once_with(engine_name='cars')
+
+        alias = EngineAlias.objects.get(name='cars')
+        self.assertEqual((alias.engine_name, alias.next_engine_name, alias.version), ('cars__v1', '', 1))
+        self.assertEqual(get_write_engine_names('cars'), ['cars__v1'])
+
+    def test_rebuild_engine_keep_old(self):
+        """Test rebuilding an engine without deleting the old engine."""
+        EngineAlias.objects.create(name='cars', engine_name='cars__v1', version=1)
+        self.assertEqual(rebuild_engine(Car, retire=False), 'cars__v2')
+        self.client_delete_engine.assert_not_called()
+
+    def test_rebuild_engine_verify_failed(self):
+        """Test a rebuild is abandoned when the new engine is missing documents."""
+        self.client_search.return_value = {'meta': {'page': {'total_results': 3}}}
+        with self.assertRaises(RuntimeError):
+            rebuild_engine(Car, verify_timeout=0)
+
+        self.client_delete_engine.assert_called_once_with(engine_name='cars__v1')
+        alias = EngineAlias.objects.get(name='cars')
+        self.assertEqual((alias.engine_name, alias.next_engine_name), ('cars', ''))
+        self.assertEqual(get_write_engine_names('cars'), ['cars'])
+
+    def test_rebuild_engine_rejected_documents(self):
+        """Test a rebuild is abandoned when app search rejects documents loading the new engine."""
+        self.client_index.side_effect = lambda engine_name, documents: [
+            {'id': document['id'], 'errors': ['Invalid field']} for document in documents[:1]
+        ] + [{'id': document['id'], 'errors': []} for document in documents[1:]]
+        with patch('django_elastic_appsearch.retries.time.sleep'), self.assertRaises(RuntimeError) as context:
+            rebuild_engine(Car)
+
+        self.assertEqual(str(context.exception), 'App search rejected 5 documents loading cars__v1.')
+        self.client_delete_engine.assert_called_once_with(engine_name='cars__v1')
+        alias = EngineAlias.objects.get(name='cars')
+        self.assertEqual((alias.engine_name, alias.next_engine_name), ('cars', ''))
+
+    def test_rebuild_engine_after_unfinished_rebuild(self):
+        """Test the engine left behind by an unfinished rebuild is deleted."""
+        EngineAlias.objects.create(name='cars', engine_name='cars__v1', next_engine_name='cars__v2', version=2)
+        self.assertEqual(rebuild_engine(Car), 'cars__v3')
+        self.assertEqual(
+            [call[1]['engine_name'] for call in self.client_delete_engine.call_args_list], ['cars__v2', 'cars__v1']
+        )
+
+    def test_rebuild_engine_meta_engine(self):
+        """Test a meta engine is switched over to the new engine."""
+        EngineAlias.objects.create(name='cars', engine_name='cars__v1', version=1)
+        rebuild_engine(Car, meta_engine_name='cars-search')
+        self.client_add_meta_engine_source.assert_called_once_with(
+            engine_name='cars-search', source_engines=['cars__v2']
+        )
+        self.client_delete_meta_engine_source.assert_called_once_with(
+            engine_name='cars-search', source_engines=['cars__v1']
+        )
+
+        self.client_get_engine.side_effect = not_found
+        rebuild_engine(Car, meta_engine_name='cars-search')
+        self.client_create_engine.assert_called_with(
+            engine_name='cars-search', type='meta', source_engines=['cars__v3']
+        )
+
+    def test_rebuild_engine_without_alias(self):
+        """Test models must use engine aliases to be rebuilt."""
+        with patch.object(Car.AppsearchMeta, 'appsearch_use_engine_alias', False):
+            with self.assertRaises(CommandError):
+                call_command('appsearch_rebuild', 'example.Car', stdout=StringIO())
+
+    def test_rebuild_command(self):
+        """Test the `appsearch_rebuild` command."""
+        stdout = StringIO()
+        call_command('appsearch_rebuild', 'example.Car', '--keep-old', stdout=stdout)
+        self.assertIn('cars__v1 is now live.', stdout.getvalue())
+        self.client_delete_engine.assert_not_called()
+
+    def test_rebuild_unknown_engine(self):
+        """Test rebuilding an engine the model isn't indexed to."""
+        with self.assertRaises(ValueError):
+            rebuild_engine(Car, engine_name='trucks')
+        self.assertFalse(EngineAlias.objects.exists())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for skipping unchanged documents."""
+
+from unittest.mock import patch
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django_elastic_appsearch.buffer import appsearch_buffer
+from django_elastic_appsearch.hashes import (
+    CacheHashStore,
+    DatabaseHashStore,
+    LocalMemoryHashStore,
+    clear_hash_store_cache,
+    counters,
+    get_hash_store,
+    hash_document
+)
+
+from example.models import Car
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+class SmallLocalMemoryHashStore(LocalMemoryHashStore):
+    """An in memory store that only holds two hashes."""
+
+    max_size = 2
+
+
+class TestHashStores(TestCase):
+    """Test the hash stores."""
+
+    def check_store(self, store):
+        """Check a store gets, sets and deletes hashes."""
+        store.set_many('cars', {'Car_1': 'a', 'Car_2': 'b'})
+        store.set_many('trucks', {'Car_1': 'c'})
+        store.set_many('cars', {'Car_2': 'd'})
+        self.assertEqual(store.get_many('cars', ['Car_1', 'Car_2', 'Car_3']), {'Car_1': 'a', 'Car_2': 'd'})
+
+        store.delete_many('cars', ['Car_1'])
+        self.assertEqual(store.get_many('cars', ['Car_1', 'Car_2']), {'Car_2': 'd'})
+        self.assertEqual(store.get_many('trucks', ['Car_1']), {'Car_1': 'c'})
+
+    def test_cache_hash_store(self):
+        """Test keeping hashes in a Django cache."""
+        self.check_store(CacheHashStore())
+
+    def test_database_hash_store(self):
+        """Test keeping hashes in a database table."""
+        self.check_store(DatabaseHashStore())
+
+    def test_database_hash_store_upserts(self):
+        """Test stored hashes are updated in place with a single query."""
+        if not getattr(connection.features, 'supports_update_conflicts_with_target', False):
+            self.skipTest('The database or Django version has no upserts.')
+
+        store = DatabaseHashStore()
+        store.set_many('cars', {'Car_1': 'a'})
+        with self.assertNumQueries(1):
+            store.set_many('cars', {'Car_1': 'b', 'Car_2': 'c'})
+        self.assertEqual(store.get_many('cars', ['Car_1', 'Car_2']), {'Car_1': 'b', 'Car_2': 'c'})
+
+    def test_database_hash_store_without_upserts(self):
+        """Test hashes are updated or created in turn when the database has no upserts."""
+        with patch.object(type(connection.features), 'supports_update_conflicts_with_target', False, create=True):
+            self.check_store(DatabaseHashStore())
+
+    def test_local_memory_hash_store(self):
+        """Test keeping hashes in memory."""
+        self.check_store(LocalMemoryHashStore())
+
+    def test_local_memory_hash_store_max_size(self):
+        """Test the least recently used hashes are dropped from memory."""
+        store = SmallLocalMemoryHashStore()
+        store.set_many('cars', {'Car_1': 'a', 'Car_2': 'b'})
+        store.get_many('cars', ['Car_1'])
+        store.set_many('cars', {'Car_3': 'c'})
+        self.assertEqual(store.get_many('cars', ['Car_1', 'Car_2', 'Car_3']), {'Car_1': 'a', 'Car_3': 'c'})
+
+    def test_store_cache_cleared_on_setting_changed(self):
+        """Test the shared stores are dropped when app search settings change."""
+        with patch.object(
+            apps.get_app_config('django_elastic_appsearch'),
+            'hash_store',
+            'django_elastic_appsearch.hashes.LocalMemoryHashStore'
+        ):
+            store = get_hash_store()
+            self.assertIs(get_hash_store(), store)
+            with override_settings(APPSEARCH_CHUNK_SIZE=10):
+                self.assertIsNot(get_hash_store(), store)
+
+    def test_hash_document(self):
+        """Test documents are hashed on their content, whatever the order of their fields."""
+        document = {'id': 'Car_1', 'make': 'Saab'}
+        self.assertEqual(hash_document(document), hash_document({'make': 'Saab', 'id': 'Car_1'}))
+        self.assertNotEqual(hash_document(document), hash_document({'id': 'Car_1', 'make': 'VW'}))
+
+
+class TestSkipUnchanged(BaseElasticAppSearchClientTestCase):
+    """Test unchanged documents aren't sent to app search."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        hash_store = patch.object(
+            apps.get_app_config('django_elastic_appsearch'),
+            'hash_store',
+            'django_elastic_appsearch.hashes.LocalMemoryHashStore'
+        )
+        hash_store.start()
+        self.addCleanup(hash_store.stop)
+        clear_hash_store_cache()
+        self.addCleanup(clear_hash_store_cache)
+        counters.reset()
+        self.addCleanup(counters.reset)
+
+        # Create 22 cars
+        for i in range(0, 22):
+            Car(make='Make {}'.format(i), model='Model {}'.format(i), year_manufactured=timezone.now()).save()
+        self.car = Car.objects.first()
+
+    def sent_ids(self):
+        """Return the IDs of the documents indexed, and reset the mock."""
+        ids = [document['id'] for call in self.client_index.call_args_list for document in call[1]['documents']]
+        self.client_index.reset_mock()
+        return ids
+
+    def test_queryset_skips_unchanged(self):
+        """Test indexing a queryset leaves out unchanged documents."""
+        Car.objects.all().index_to_appsearch()
+        self.assertEqual(len(self.sent_ids()), 22)
+
+        Car.objects.filter(pk=self.car.pk).update(make='Saab')
+        Car.objects.all().index_to_appsearch()
+        self.assertEqual(self.sent_ids(), [self.car.get_appsearch_document_id()])
+        self.assertEqual((counters.sent, counters.skipped), (23, 21))
+
+    def test_queryset_force(self):
+        """Test forcing unchanged documents to be sent."""
+        Car.objects.all().index_to_appsearch()
+        self.sent_ids()
+
+        Car.objects.all().index_to_appsearch(force=True)
+        self.assertEqual(len(self.sent_ids()), 22)
+
+    def test_model_skips_unchanged(self):
+        """Test indexing a model object leaves it out if it's unchanged."""
+        self.car.index_to_appsearch()
+        self.assertEqual(self.car.index_to_appsearch(), [])
+        self.assertEqual(self.client_index.call_count, 1)
+
+        self.car.index_to_appsearch(force=True)
+        self.assertEqual(self.client_index.call_count, 2)
+
+    def test_rejected_documents_are_resent(self):
+        """Test documents app search rejected are sent again."""
+        self.client_index.return_value = [{'id': self.car.get_appsearch_document_id(), 'errors': ['Invalid field']}]
+        self.car.index_to_appsearch()
+        self.car.index_to_appsearch()
+        self.assertEqual(self.client_index.call_count, 2)
+
+    def test_deleted_documents_are_resent(self):
+        """Test documents are sent again after they're deleted or partially updated."""
+        self.car.index_to_appsearch()
+        self.car.delete_from_appsearch()
+        self.car.index_to_appsearch()
+        self.assertEqual(self.client_index.call_count, 2)
+
+        Car.objects.all().index_to_appsearch(update_only=True)
+        self.car.index_to_appsearch()
+        self.assertEqual(self.client_index.call_count, 3)
+
+        self.car.index_to_appsearch()
+        Car.objects.all().delete_from_appsearch()
+        self.car.index_to_appsearch()
+        self.assertEqual(self.client_index.call_count, 4)
+
+    def test_buffer_skips_unchanged(self):
+        """Test flushing a buffer leaves out unchanged documents."""
+        self.car.index_to_appsearch()
+        with self.captureOnCommitCallbacks(execute=True), appsearch_buffer():
+            self.car.index_to_appsearch()
+            Car.objects.last().index_to_appsearch()
+        self.assertEqual(
+            self.sent_ids(), [self.car.get_appsearch_document_id(), Car.objects.last().get_appsearch_document_id()]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True), appsearch_buffer():
+            self.car.index_to_appsearch(force=True)
+            Car.objects.last().index_to_appsearch()
+        self.assertEqual(self.sent_ids(), [self.car.get_appsearch_document_id()])
+
+    async def test_async_skips_unchanged(self):
+        """Test the asyncio methods leave out unchanged documents."""
+        self.async_client_index.return_value = []
+        await Car.objects.all().aindex_to_appsearch()
+        self.assertEqual(self.async_client_index.call_count, 5)
+
+        await Car.objects.all().aindex_to_appsearch()
+        self.assertEqual(await self.car.aindex_to_appsearch(), [])
+        self.assertEqual(self.async_client_index.call_count, 5)
+
+        await self.car.aindex_to_appsearch(force=True)
+        self.assertEqual(self.async_client_index.call_count, 6)
+
+    def test_disabled_by_default(self):
+        """Test every document is sent when no hash store is set."""
+        with patch.object(apps.get_app_config('django_elastic_appsearch'), 'hash_store', None):
+            self.assertIsNone(get_hash_store())
+            self.car.index_to_appsearch()
+            self.car.index_to_appsearch()
+        self.assertEqual(self.client_index.call_count, 2)
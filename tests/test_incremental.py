@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for syncing the objects changed since the last sync."""
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from django_elastic_appsearch import serialisers
+from django_elastic_appsearch.incremental import get_sync_since, sync_model
+from django_elastic_appsearch.models import SyncWatermark
+from django_elastic_appsearch.orm import AppSearchQuerySet
+
+from example.models import Car, Tractor
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+class TractorValuesSerialiser(serialisers.AppSearchSerialiser):
+    """Tractor serialiser only reading model fields."""
+
+    make = serialisers.StrField()
+    model = serialisers.StrField()
+
+
+class TestIncrementalSync(BaseElasticAppSearchClientTestCase):
+    """Test syncing the objects changed since the last sync."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        self.now = timezone.now()
+        # Create 12 tractors, updated an hour apart, with the last 3 updated at the same time
+        self.tractors = [
+            Tractor.objects.create(
+                make='Make {}'.format(i),
+                model='Model {}'.format(i),
+                year_manufactured=self.now,
+                updated_at=self.now - timedelta(hours=12 - min(i, 9))
+            )
+            for i in range(0, 12)
+        ]
+        self.tractor_ids = [tractor.get_appsearch_document_id() for tractor in self.tractors]
+        self.client_index.side_effect = lambda engine_name, documents: [
+            {'id': document['id'], 'errors': []} for document in documents
+        ]
+
+    def indexed_ids(self):
+        """Return the document IDs sent to app search."""
+        return [
+            document['id'] for call in self.client_index.call_args_list for document in call[1]['documents']
+        ]
+
+    def test_index_changed_since(self):
+        """Test only the objects changed since are indexed, paged over when they changed."""
+        # Move the first tractor after the others, the rest are read in order of primary key
+        Tractor.objects.filter(pk=self.tractors[0].pk).update(updated_at=self.now)
+        with self.assertNumQueries(2):
+            responses = Tractor.objects.index_changed_since(self.now - timedelta(hours=6))
+        self.assertEqual(responses.succeeded, 7)
+        self.assertEqual(self.indexed_ids(), self.tractor_ids[6:] + self.tractor_ids[:1])
+
+        with self.assertRaises(ValueError):
+            Car.objects.index_changed_since(self.now)
+
+    def test_index_changed_since_values(self):
+        """Test objects changed at the same time across chunks are read from rows of values too."""
+        with patch.object(Tractor.AppsearchMeta, 'appsearch_serialiser_class', TractorValuesSerialiser):
+            Tractor.objects.index_changed_since(self.now - timedelta(hours=5))
+        self.assertEqual(self.indexed_ids(), self.tractor_ids[7:])
+
+        # Chunks of 5 split the tractors updated at the same time
+        self.client_index.reset_mock()
+        with patch.object(Tractor.AppsearchMeta, 'appsearch_serialiser_class', TractorValuesSerialiser):
+            Tractor.objects.index_changed_since(self.now - timedelta(hours=8))
+        self.assertEqual(self.indexed_ids(), self.tractor_ids[4:])
+
+    def test_sync_model(self):
+        """Test syncs after the first only send the objects changed since, allowing for a lag."""
+        counts, since = sync_model(Tractor)
+        self.assertIsNone(since)
+        self.assertEqual(counts, {'succeeded': 12, 'failed': 0, 'retried': 0})
+        watermark = SyncWatermark.objects.get(model_label='example.Tractor', engine_name='tractors')
+
+        # One tractor is updated after the sync, and one committed late with an earlier time, within the lag
+        Tractor.objects.filter(pk=self.tractors[0].pk).update(updated_at=timezone.now())
+        synced_until = watermark.synced_until
+        Tractor.objects.filter(pk=self.tractors[1].pk).update(updated_at=synced_until - timedelta(seconds=30))
+        Tractor.objects.filter(pk=self.tractors[2].pk).update(updated_at=synced_until - timedelta(hours=1))
+
+        self.client_index.reset_mock()
+        counts, since = sync_model(Tractor)
+        self.assertEqual(counts['succeeded'], 2)
+        self.assertEqual(since, watermark.synced_until - timedelta(seconds=60))
+        self.assertEqual(sorted(self.indexed_ids()), sorted(self.tractor_ids[:2]))
+        self.assertGreater(
+            SyncWatermark.objects.get(model_label='example.Tractor', engine_name='tractors').synced_until,
+            watermark.synced_until
+        )
+
+        # A full sync sends everything again
+        self.client_index.reset_mock()
+        sync_model(Tractor, incremental=False)
+        self.assertEqual(len(self.indexed_ids()), 12)
+
+    def test_sync_model_keeps_counts(self):
+        """Test syncs count the responses of each batch rather than holding them all."""
+        self.client_index.side_effect = lambda engine_name, documents: [
+            {'id': document['id'], 'errors': ['Invalid field'] if index == 0 else []}
+            for index, document in enumerate(documents)
+        ]
+        with patch.object(AppSearchQuerySet, '_merge_batch_responses') as merge_batch_responses:
+            counts, _ = sync_model(Tractor)
+            self.assertEqual(counts, {'succeeded': 9, 'failed': 3, 'retried': 0})
+            Tractor.objects.update(updated_at=timezone.now())
+            counts, since = sync_model(Tractor)
+            self.assertIsNotNone(since)
+            self.assertEqual(counts, {'succeeded': 9, 'failed': 3, 'retried': 0})
+        merge_batch_responses.assert_not_called()
+
+    def test_engines_without_watermark(self):
+        """Test an engine that hasn't been synced yet gets a full sync."""
+        self.assertIsNone(get_sync_since(Tractor, ['tractors']))
+        SyncWatermark.objects.create(model_label='example.Tractor', engine_name='tractors', synced_until=self.now)
+        self.assertEqual(get_sync_since(Tractor, ['tractors']), self.now - timedelta(seconds=60))
+        self.assertIsNone(get_sync_since(Tractor, ['tractors', 'tractors__v2']))
+
+    def test_sync_command(self):
+        """Test the `appsearch_sync` command."""
+        stdout = StringIO()
+        call_command('appsearch_sync', 'example.Tractor', stdout=stdout)
+        call_command('appsearch_sync', 'example.Tractor', '--incremental', stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(lines[0], 'Synced 12 documents of example.Tractor, 0 failed.')
+        self.assertTrue(lines[1].startswith('Synced 0 documents of example.Tractor changed since '))
+
+        with self.assertRaises(CommandError):
+            call_command('appsearch_sync', 'example.Car', stdout=StringIO())
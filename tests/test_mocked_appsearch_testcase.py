@@ -7,7 +7,7 @@ from django.test import TestCase
 from django.utils import timezone
 from django_elastic_appsearch.test import MockedAppSearchTestCase
 
-from example.models import Car, Bus
+from example.models import Car, Bus, Tractor, Trailer
 
 
 class TestMockedAppSearchWithCustomQuerySetTestCase(MockedAppSearchTestCase, TestCase):
@@ -83,3 +83,41 @@ class TestMockedAppSearchTestCase(MockedAppSearchTestCase, TestCase):
 
         Car.objects.all().delete_from_appsearch()
         self.assertAppSearchQuerySetDeleteCallCount(1)
+
+    async def test_mocked_async_index_model_object_to_appsearch(self):
+        """Test indexing a model object to App Search from an event loop is mocked."""
+
+        car = Car(make='Toyota', model='Corolla', year_manufactured=timezone.now())
+        await car.aindex_to_appsearch()
+        self.assertAppSearchModelIndexCallCount(1)
+
+    async def test_mocked_async_index_queryset_to_appsearch(self):
+        """Test indexing a queryset to App Search from an event loop is mocked."""
+
+        await Car.objects.all().aindex_to_appsearch()
+        await Car.objects.all().adelete_from_appsearch()
+        self.assertAppSearchQuerySetIndexCallCount(1)
+        self.assertAppSearchQuerySetDeleteCallCount(1)
+
+    def test_mocked_update_queryset_in_appsearch(self):
+        """Test patching a queryset in App Search is mocked, and the objects are still updated."""
+
+        rows, _ = Trailer.objects.all().update_in_appsearch(model='Flatbed')
+        self.assertAppSearchQuerySetUpdateCallCount(1)
+        self.assertEqual(rows, Trailer.objects.filter(model='Flatbed').count())
+
+    def test_mocked_delete_pks_from_appsearch(self):
+        """Test deleting documents by primary key from App Search is mocked."""
+
+        Car.delete_pks_from_appsearch([1, 2])
+        Car.delete_pk_range_from_appsearch(1, 100)
+        self.assertAppSearchModelDeletePksCallCount(2)
+
+    def test_queryset_delete_sends_nothing(self):
+        """Test deleting a queryset along with its documents doesn't reach App Search."""
+
+        tractor = Tractor.objects.create(make='John Deere', model='5E', year_manufactured=timezone.now())
+        Trailer.objects.create(tractor=tractor, model='Flatbed')
+        with self.captureOnCommitCallbacks(execute=True):
+            Tractor.objects.all().delete(appsearch=True)
+        self.assertFalse(Trailer.objects.exists())
@@ -3,16 +3,32 @@
 
 """Test cases for the ORM methods."""
 
+import threading
+import time
+from unittest.mock import patch
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django_elastic_appsearch import serialisers
 from elastic_enterprise_search import AppSearch
 
-from example.models import Car, Truck
+from example.models import Car, Tractor, Trailer, Truck
 from example.serialisers import CarSerialiser
 
 from .base import BaseElasticAppSearchClientTestCase
 
 
+class TractorValuesSerialiser(serialisers.AppSearchSerialiser):
+    """Tractor serialiser only reading model fields."""
+
+    make = serialisers.StrField()
+    model = serialisers.StrField()
+
+
 class TestORM(BaseElasticAppSearchClientTestCase):
     """Test Django Elastic App Search ORM functions."""
 
@@ -77,6 +93,82 @@ class TestORM(BaseElasticAppSearchClientTestCase):
         # Therefore you should see 5 calls to cover 22 documents
         self.assertEqual(self.client_destroy.call_count, 5)
 
+    def test_queryset_index_with_workers(self):
+        """Test indexing a queryset to appsearch with concurrent workers."""
+        def index_documents(engine_name, documents):
+            # Make earlier chunks finish later than the chunks after them
+            time.sleep(0.01 * (5 - len(self.client_index.call_args_list)))
+            return [{'id': document['id'], 'errors': []} for document in documents]
+
+        self.client_index.side_effect = index_documents
+        responses = Car.objects.all().index_to_appsearch(workers=3)
+
+        self.assertEqual(self.client_index.call_count, 5)
+        # Responses come back in chunk order regardless of completion order
+        self.assertEqual(
+            [response['id'] for response in responses],
+            [car.get_appsearch_document_id() for car in Car.objects.order_by('pk')]
+        )
+
+    def test_queryset_delete_with_workers(self):
+        """Test deleting a queryset from appsearch with concurrent workers."""
+        self.client_destroy.side_effect = lambda engine_name, document_ids: [
+            {'id': document_id, 'deleted': True} for document_id in document_ids
+        ]
+        responses = Car.objects.all().delete_from_appsearch(workers=3)
+
+        self.assertEqual(self.client_destroy.call_count, 5)
+        self.assertEqual(
+            [response['id'] for response in responses],
+            [car.get_appsearch_document_id() for car in Car.objects.order_by('pk')]
+        )
+
+    def test_queryset_delete_reads_pks_only(self):
+        """Test deleting a queryset only fetches primary keys, unless the document IDs need the objects."""
+        with CaptureQueriesContext(connection) as queries:
+            Car.objects.filter(make__startswith='Make').delete_from_appsearch()
+        self.assertEqual(len(queries), 5)
+        self.assertTrue(queries[0]['sql'].startswith('SELECT "example_car"."id" FROM'))
+        self.assertEqual(
+            [document_id for call in self.client_destroy.call_args_list for document_id in call[1]['document_ids']],
+            [car.get_appsearch_document_id() for car in Car.objects.order_by('pk')]
+        )
+
+        # Custom document IDs are worked out from the objects
+        pks = list(Car.objects.order_by('pk').values_list('pk', flat=True)[:2])
+        self.client_destroy.reset_mock()
+        with patch.object(Car, 'get_appsearch_document_id', lambda self: 'car-{}'.format(self.pk)):
+            self.assertIsNone(Car.get_appsearch_document_ids(pks[:1]))
+            Car.objects.filter(pk__in=pks).delete_from_appsearch()
+            with self.assertRaises(ValueError):
+                Car.delete_pks_from_appsearch(pks)
+        self.assertEqual(self.client_destroy.call_args[1]['document_ids'], ['car-{}'.format(pk) for pk in pks])
+
+        # Unless the model says how to work them out from primary keys
+        self.client_destroy.reset_mock()
+        with patch.object(Car, 'get_appsearch_document_id', lambda self: 'car-{}'.format(self.pk)), \
+                patch.object(Car, 'get_appsearch_document_ids', classmethod(
+                    lambda cls, pks: ['car-{}'.format(pk) for pk in pks]
+                )):
+            with self.assertNumQueries(1):
+                Car.objects.filter(pk__in=pks).delete_from_appsearch()
+        self.assertEqual(self.client_destroy.call_args[1]['document_ids'], ['car-{}'.format(pk) for pk in pks])
+
+    def test_delete_pks_without_database(self):
+        """Test deleting documents by primary key and primary key range doesn't touch the database."""
+        with self.assertNumQueries(0):
+            Car.delete_pks_from_appsearch(pk for pk in [3, 1, 100])
+            Car.delete_pk_range_from_appsearch(10, 21)
+        self.assertEqual(
+            [call[1]['document_ids'] for call in self.client_destroy.call_args_list],
+            [
+                ['Car_3', 'Car_1', 'Car_100'],
+                ['Car_{}'.format(pk) for pk in range(10, 15)],
+                ['Car_{}'.format(pk) for pk in range(15, 20)],
+                ['Car_20', 'Car_21'],
+            ]
+        )
+
     def test_set_appsearch_serialiser_class(self):
         """Test classmethod to set an appsearch serialiser class."""
 
@@ -112,7 +204,7 @@ class TestORM(BaseElasticAppSearchClientTestCase):
 
     def test_serialise_for_appsearch(self):
         car = Car.objects.first()
-        self.assertEqual('Car_1', car.serialise_for_appsearch()['id'])
+        self.assertEqual('Car_{}'.format(car.pk), car.serialise_for_appsearch()['id'])
 
 
 class TestMultipleEngineModel(BaseElasticAppSearchClientTestCase):
@@ -123,6 +215,14 @@ class TestMultipleEngineModel(BaseElasticAppSearchClientTestCase):
     class OtherSerialiserClass(serialisers.AppSearchSerialiser):
         make = serialisers.Field()
 
+    class CountingSerialiserClass(serialisers.AppSearchSerialiser):
+        calls = 0
+        model = serialisers.MethodField()
+
+        def get_model(self, instance):
+            type(self).calls += 1
+            return instance.model
+
     def setUp(self):
         """Setup the patches and test data."""
         super().setUp()
@@ -155,9 +255,11 @@ class TestMultipleEngineModel(BaseElasticAppSearchClientTestCase):
         self.assertEqual(pairs[1][1], "other_cars")
 
     def test_serialise_for_appsearch(self):
-        truck = Truck.objects.first().serialise_for_appsearch()
-        self.assertEqual({'id': 'Truck_1', 'object_type': 'Truck', 'model': 'Model 0'}, truck[0])
-        self.assertEqual({'id': 'Truck_1', 'object_type': 'Truck', 'make': 'Make 0'}, truck[1])
+        truck = Truck.objects.first()
+        documents = truck.serialise_for_appsearch()
+        truck_id = 'Truck_{}'.format(truck.pk)
+        self.assertEqual({'id': truck_id, 'object_type': 'Truck', 'model': 'Model 0'}, documents[0])
+        self.assertEqual({'id': truck_id, 'object_type': 'Truck', 'make': 'Make 0'}, documents[1])
 
     def test_model_object_index(self):
         """Test indexing a model object to appsearch."""
@@ -200,3 +302,237 @@ class TestMultipleEngineModel(BaseElasticAppSearchClientTestCase):
         # Note that the app search chunk size is set to 5 in `tests.settings`
         # Therefore you should see 5 calls to cover 22 documents, over 2 engines
         self.assertEqual(self.client_destroy.call_count, 10)
+
+    def test_queryset_iter_index(self):
+        """Test streaming the index of a queryset reads each chunk once for both engines."""
+        self.client_index.side_effect = lambda engine_name, documents: [
+            {'id': document['id'], 'errors': []} for document in documents
+        ]
+        # Note that the app search chunk size is set to 5 in `tests.settings`,
+        # so there's a query for each of the 5 chunks, shared by both engines
+        with self.assertNumQueries(5):
+            results = list(Truck.objects.all().iter_index_to_appsearch())
+
+        self.assertEqual([engine_name for (engine_name, _) in results], ['test_cars', 'other_cars'] * 5)
+        self.assertEqual([len(responses) for (_, responses) in results], [5, 5] * 4 + [2, 2])
+        self.assertEqual(sum(responses.succeeded for (_, responses) in results), 44)
+
+        # The results of the whole queryset are still by engine
+        responses = Truck.objects.all().index_to_appsearch()
+        self.assertEqual(len(responses), 44)
+        self.assertEqual(responses[:22], [response for (_, chunk) in results[::2] for response in chunk])
+
+    def test_model_object_index_to_engines_at_once(self):
+        """Test a model object is sent to all its engines at once, with the responses in engine order."""
+        # Each request waits for the other, so they have to be in flight together
+        barrier = threading.Barrier(2, timeout=5)
+
+        def index_documents(engine_name, documents):
+            barrier.wait()
+            return [{'id': documents[0]['id'], 'engine_name': engine_name}]
+
+        self.client_index.side_effect = index_documents
+        responses = Truck.objects.first().index_to_appsearch()
+        self.assertEqual(
+            [response[0]['engine_name'] for response in responses], ['test_cars', 'other_cars']
+        )
+
+        def delete_documents(engine_name, document_ids):
+            barrier.wait()
+            return [engine_name]
+
+        self.client_destroy.side_effect = delete_documents
+        self.assertEqual(Truck.objects.first().delete_from_appsearch(), [['test_cars'], ['other_cars']])
+
+    def test_shared_serialisers_run_once(self):
+        """Test a serialiser shared by several engines runs once for each object."""
+        Truck.set_appsearch_serialiser_engine_pairs([
+            (TestMultipleEngineModel.CountingSerialiserClass, 'test_cars'),
+            (TestMultipleEngineModel.OtherSerialiserClass, 'other_cars'),
+            (TestMultipleEngineModel.CountingSerialiserClass, 'more_cars'),
+        ])
+        TestMultipleEngineModel.CountingSerialiserClass.calls = 0
+
+        Truck.objects.first().index_to_appsearch()
+        self.assertEqual(TestMultipleEngineModel.CountingSerialiserClass.calls, 1)
+        documents = {call[1]['engine_name']: call[1]['documents'] for call in self.client_index.call_args_list}
+        self.assertEqual(sorted(documents), ['more_cars', 'other_cars', 'test_cars'])
+        self.assertEqual(documents['test_cars'], documents['more_cars'])
+
+        Truck.objects.all().index_to_appsearch()
+        self.assertEqual(TestMultipleEngineModel.CountingSerialiserClass.calls, 23)
+        self.assertEqual(self.client_index.call_count, 18)
+
+
+class TestQuerySetDelete(BaseElasticAppSearchClientTestCase):
+    """Test deleting querysets along with their app search documents."""
+
+    def setUp(self):
+        """Setup the test data."""
+        super().setUp()
+        # Create 3 tractors, with 2 trailers each
+        self.tractors, self.trailers = [], []
+        for i in range(0, 3):
+            tractor = Tractor.objects.create(
+                make='Make {}'.format(i), model='Model {}'.format(i), year_manufactured=timezone.now()
+            )
+            self.tractors.append(tractor)
+            for j in range(0, 2):
+                self.trailers.append(Trailer.objects.create(tractor=tractor, model='Model {}'.format(j)))
+
+    def deleted_ids(self):
+        """Return the document IDs deleted from each engine."""
+        deleted_ids = {}
+        for call in self.client_destroy.call_args_list:
+            deleted_ids.setdefault(call[1]['engine_name'], []).extend(call[1]['document_ids'])
+        return deleted_ids
+
+    def test_delete_with_cascades(self):
+        """Test the documents of the objects and their cascades are deleted once the transaction commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                deleted = Tractor.objects.exclude(pk=self.tractors[2].pk).delete(appsearch=True)
+            self.client_destroy.assert_not_called()
+
+        self.assertEqual(deleted, (6, {'example.Trailer': 4, 'example.Tractor': 2}))
+        # Each model is fetched once
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('SELECT')]), 2)
+        self.assertEqual(self.deleted_ids(), {
+            'tractors': [tractor.get_appsearch_document_id() for tractor in self.tractors[:2]],
+            'trailers': [trailer.get_appsearch_document_id() for trailer in self.trailers[:4]],
+        })
+
+    def test_delete_opt_in(self):
+        """Test querysets are only deleted from app search when asked to, or by the model."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Tractor.objects.filter(pk=self.tractors[0].pk).delete()
+        self.client_destroy.assert_not_called()
+
+        with patch.object(Tractor.AppsearchMeta, 'appsearch_sync_deletes', True, create=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                Tractor.objects.filter(pk=self.tractors[1].pk).delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                Tractor.objects.filter(pk=self.tractors[2].pk).delete(appsearch=False)
+        self.assertEqual(self.deleted_ids(), {
+            'tractors': [self.tractors[1].get_appsearch_document_id()],
+            'trailers': [trailer.get_appsearch_document_id() for trailer in self.trailers[2:4]],
+        })
+
+    def test_delete_rolled_back(self):
+        """Test nothing is deleted from app search if the transaction rolls back."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Tractor.objects.all().delete(appsearch=True)
+                raise RuntimeError
+        self.client_destroy.assert_not_called()
+        self.assertEqual(Trailer.objects.count(), 6)
+
+    def test_delete_sliced(self):
+        """Test querysets Django can't delete raise its errors."""
+        # Django raises an `AssertionError` before 4.0
+        with self.assertRaises((TypeError, AssertionError)):
+            Tractor.objects.all()[:1].delete(appsearch=True)
+
+
+class TestQuerySetUpdateInAppsearch(BaseElasticAppSearchClientTestCase):
+    """Test updating querysets and patching the changed fields of their app search documents."""
+
+    def setUp(self):
+        """Setup the test data."""
+        super().setUp()
+        # Create 3 tractors, with 2 trailers each
+        self.tractors, self.trailers = [], []
+        for i in range(0, 3):
+            tractor = Tractor.objects.create(
+                make='Make {}'.format(i), model='Model {}'.format(i), year_manufactured=timezone.now()
+            )
+            self.tractors.append(tractor)
+            for j in range(0, 2):
+                self.trailers.append(Trailer.objects.create(tractor=tractor, model='Model {}'.format(j)))
+        self.client_update.side_effect = lambda engine_name, documents: [
+            {'id': document['id'], 'errors': []} for document in documents
+        ]
+
+    def patched_documents(self):
+        """Return the partial documents sent to app search."""
+        return [document for call in self.client_update.call_args_list for document in call[1]['documents']]
+
+    def test_update_in_appsearch(self):
+        """Test only the primary keys are read, and only the changed fields are sent."""
+        with CaptureQueriesContext(connection) as queries:
+            rows, responses = Trailer.objects.filter(model='Model 0').update_in_appsearch(model='Model X')
+
+        self.assertEqual(rows, 3)
+        self.assertEqual(responses.succeeded, 3)
+        self.assertEqual(Trailer.objects.filter(model='Model X').count(), 3)
+        # The update takes the objects out of the queryset, they're read before it
+        self.assertEqual(self.patched_documents(), [
+            {'id': trailer.get_appsearch_document_id(), 'model': 'Model X'} for trailer in self.trailers[::2]
+        ])
+        selects = [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertTrue(selects[0].startswith('SELECT "example_trailer"."id" FROM'))
+
+    def test_update_in_chunks(self):
+        """Test the objects are updated and patched a chunk at a time, and each only once."""
+        updated = []
+
+        def put_documents(engine_name, documents):
+            updated.append(Trailer.objects.filter(model__endswith=' II').count())
+            return [{'id': document['id'], 'errors': []} for document in documents]
+
+        self.client_update.side_effect = put_documents
+        # Note that the app search chunk size is set to 5 in `tests.settings`
+        rows, responses = Trailer.objects.all().update_in_appsearch(model=Concat('model', Value(' II')))
+
+        self.assertEqual(rows, 6)
+        self.assertEqual(updated, [5, 6])
+        self.assertEqual(
+            sorted(Trailer.objects.values_list('model', flat=True)),
+            ['Model 0 II'] * 3 + ['Model 1 II'] * 3
+        )
+        self.assertEqual(
+            [document['model'] for document in self.patched_documents()],
+            ['Model 0 II', 'Model 1 II'] * 3
+        )
+
+    def test_update_debug_queries(self):
+        """Test the queries of each chunk are logged without counting its update."""
+        config = apps.get_app_config('django_elastic_appsearch')
+        with patch.object(config, 'debug_queries', True):
+            with self.assertLogs('django_elastic_appsearch.planner', 'DEBUG') as logs:
+                rows, responses = Trailer.objects.filter(pk=Trailer.objects.first().pk).update_in_appsearch(
+                    model='Model X'
+                )
+
+        self.assertEqual(rows, 1)
+        self.assertEqual(
+            [(record.levelname, record.getMessage()) for record in logs.records],
+            [('DEBUG', '1 queries to fetch and serialise a chunk of 1 objects.')]
+        )
+
+    def test_update_expressions(self):
+        """Test values that are expressions are read back from the updated rows."""
+        with patch.object(Tractor.AppsearchMeta, 'appsearch_serialiser_class', TractorValuesSerialiser):
+            rows, responses = Tractor.objects.exclude(pk=self.tractors[2].pk).update_in_appsearch(
+                model=Concat('model', Value(' II')), make='Make'
+            )
+
+        self.assertEqual(rows, 2)
+        self.assertEqual(self.patched_documents(), [
+            {'id': self.tractors[0].get_appsearch_document_id(), 'make': 'Make', 'model': 'Model 0 II'},
+            {'id': self.tractors[1].get_appsearch_document_id(), 'make': 'Make', 'model': 'Model 1 II'},
+        ])
+
+    def test_update_unserialised_fields(self):
+        """Test nothing is sent to app search when none of the document fields change."""
+        rows, responses = Trailer.objects.all().update_in_appsearch(tractor=self.tractors[0])
+        self.assertEqual(rows, 6)
+        self.assertEqual(responses.succeeded, 0)
+        self.client_update.assert_not_called()
+
+    def test_update_needs_instances(self):
+        """Test serialisers computing fields from model instances can't be patched."""
+        with self.assertRaises(ValueError):
+            Tractor.objects.all().update_in_appsearch(make='Make')
+        self.assertFalse(Tractor.objects.filter(make='Make').exists())
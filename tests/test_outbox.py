@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for the outbox."""
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from django_elastic_appsearch.buffer import DELETE, INDEX
+from django_elastic_appsearch.models import OutboxEntry
+from django_elastic_appsearch.outbox import drain_outbox
+
+from example.models import Van
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+class TestOutbox(BaseElasticAppSearchClientTestCase):
+    """Test the outbox processor and draining the outbox."""
+
+    def setUp(self):
+        """Setup the patches and use the outbox processor."""
+        super().setUp()
+        config = apps.get_app_config('django_elastic_appsearch')
+        processor = patch.object(config, 'sync_processor', 'django_elastic_appsearch.outbox.OutboxProcessor')
+        processor.start()
+        self.addCleanup(processor.stop)
+
+        self.vans = [
+            Van.objects.create(make='Make {}'.format(i), model='Model {}'.format(i), year_manufactured=timezone.now())
+            for i in range(0, 7)
+        ]
+        self.van_ids = [van.get_appsearch_document_id() for van in self.vans]
+
+    def test_entries_recorded(self):
+        """Test saved objects are recorded in the outbox instead of being sent."""
+        self.assertEqual(self.client_index.call_count, 0)
+        self.assertEqual(OutboxEntry.objects.filter(operation=INDEX, engine_name='vans').count(), 7)
+
+    def test_entries_deduplicated(self):
+        """Test only the last operation on a document is kept."""
+        van = self.vans[0]
+        van.save()
+        van.delete()
+
+        self.assertEqual(OutboxEntry.objects.count(), 7)
+        entry = OutboxEntry.objects.get(document_id=self.van_ids[0])
+        self.assertEqual(entry.operation, DELETE)
+
+    def test_drain(self):
+        """Test draining sends the current state of the objects in batches."""
+        Van.objects.filter(pk=self.vans[1].pk).update(model='Transit')
+        self.vans[2].delete()
+
+        self.assertEqual(drain_outbox(batch_size=10), (7, 0))
+
+        # Note that the app search chunk size is set to 5 in `tests.settings`
+        self.assertEqual(
+            [len(call[1]['documents']) for call in self.client_index.call_args_list],
+            [5, 1]
+        )
+        documents = {
+            document['id']: document for call in self.client_index.call_args_list for document in call[1]['documents']
+        }
+        self.assertEqual(documents[self.van_ids[1]]['model'], 'Transit')
+        self.client_destroy.assert_called_once_with(engine_name='vans', document_ids=[self.van_ids[2]])
+        self.assertFalse(OutboxEntry.objects.exists())
+
+    def test_drain_retries_failures(self):
+        """Test failed entries are retried with a backoff."""
+        self.client_index.side_effect = ConnectionError('App search is down')
+
+        self.assertEqual(drain_outbox(), (0, 5))
+
+        entry = OutboxEntry.objects.get(document_id=self.van_ids[0])
+        self.assertEqual(entry.attempts, 1)
+        self.assertGreater(entry.available_at, timezone.now())
+        self.assertIn('App search is down', entry.last_error)
+
+        # The failed entries aren't due yet, the rest are
+        self.client_index.side_effect = None
+        self.assertEqual(drain_outbox(), (2, 0))
+
+    def test_drain_retries_document_errors(self):
+        """Test only the documents app search reports errors for are retried."""
+        self.client_index.side_effect = lambda engine_name, documents: [
+            {'id': document['id'], 'errors': ['Invalid field'] if document['id'] == self.van_ids[1] else []}
+            for document in documents
+        ]
+
+        with patch('django_elastic_appsearch.retries.time.sleep'):
+            self.assertEqual(drain_outbox(), (4, 1))
+        self.assertEqual(
+            list(OutboxEntry.objects.filter(attempts=1).values_list('document_id', flat=True)),
+            [self.van_ids[1]]
+        )
+
+    def test_drain_retries_delete_errors(self):
+        """Test deletes app search reports errors for are retried."""
+        self.vans[0].delete()
+        self.vans[1].delete()
+        self.client_destroy.return_value = [
+            {'id': self.van_ids[0], 'deleted': False, 'errors': ['Internal server error']},
+            {'id': self.van_ids[1], 'deleted': True},
+        ]
+
+        self.assertEqual(drain_outbox(batch_size=10), (6, 1))
+        entry = OutboxEntry.objects.get()
+        self.assertEqual((entry.document_id, entry.operation), (self.van_ids[0], DELETE))
+        self.assertEqual(entry.last_error, 'Internal server error')
+
+    def test_drain_sends_outside_transaction(self):
+        """Test entries are leased while they're sent, without holding a transaction open."""
+        # The test case runs in a transaction of its own, and transactions nested in it add a savepoint
+        savepoints = len(connection.savepoint_ids)
+        sending = []
+
+        def index_documents(engine_name, documents):
+            due = OutboxEntry.objects.filter(available_at__lte=timezone.now())
+            sending.append((len(connection.savepoint_ids), list(due.values_list('document_id', flat=True))))
+            return []
+
+        self.client_index.side_effect = index_documents
+        self.assertEqual(drain_outbox(), (5, 0))
+        self.assertEqual(sending, [(savepoints, self.van_ids[5:])])
+
+    def test_drain_keeps_replaced_entries(self):
+        """Test entries replaced while they're being sent are kept for the next drain."""
+        def index_documents(engine_name, documents):
+            self.vans[0].delete()
+            return []
+
+        self.client_index.side_effect = index_documents
+        self.assertEqual(drain_outbox(), (5, 0))
+
+        entry = OutboxEntry.objects.get(document_id=self.van_ids[0])
+        self.assertEqual((entry.operation, entry.attempts), (DELETE, 0))
+        self.assertEqual(OutboxEntry.objects.count(), 3)
+
+    def test_drain_command_max_retry_delay(self):
+        """Test the `appsearch_drain` command caps the retry delay."""
+        self.client_index.side_effect = ConnectionError('App search is down')
+        call_command('appsearch_drain', '--once', '--retry-delay=60', '--max-retry-delay=2', stdout=StringIO())
+
+        entry = OutboxEntry.objects.get(document_id=self.van_ids[0])
+        self.assertLessEqual(entry.available_at, timezone.now() + timedelta(seconds=2))
+
+    def test_drain_command(self):
+        """Test the `appsearch_drain` command drains the outbox."""
+        stdout = StringIO()
+        call_command('appsearch_drain', '--once', stdout=stdout)
+
+        self.assertFalse(OutboxEntry.objects.exists())
+        self.assertEqual(self.client_index.call_count, 2)
+        self.assertIn('Sent 5 entries, 0 failed.', stdout.getvalue())
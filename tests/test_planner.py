@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for planning queries from serialisers."""
+
+from unittest.mock import patch
+
+from django.apps import apps
+from django_elastic_appsearch import serialisers
+from django_elastic_appsearch.planner import get_serialiser_plan, plan_queryset
+
+from example.models import Feature, Manufacturer, Motorbike
+from example.serialisers import CarSerialiser, MotorbikeSerialiser
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+class MotorbikeModelSerialiser(serialisers.AppSearchSerialiser):
+    """Motorbike serialiser only reading the model."""
+
+    class Meta:
+        select_related = ['manufacturer']
+        only = ['model']
+
+    model = serialisers.StrField()
+
+
+class TestPlanner(BaseElasticAppSearchClientTestCase):
+    """Test planning queries from serialisers."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        features = [Feature.objects.create(name='Feature {}'.format(i)) for i in range(0, 3)]
+        # Create 12 motorbikes
+        for i in range(0, 12):
+            motorbike = Motorbike.objects.create(
+                manufacturer=Manufacturer.objects.create(name='Manufacturer {}'.format(i)),
+                model='Model {}'.format(i)
+            )
+            motorbike.features.set(features[:i % 3])
+
+    def test_get_serialiser_plan(self):
+        """Test combining the relations and fields serialisers read."""
+        self.assertEqual(
+            get_serialiser_plan([MotorbikeSerialiser, MotorbikeModelSerialiser]),
+            (['manufacturer'], ['features'], None)
+        )
+        self.assertEqual(
+            get_serialiser_plan([MotorbikeModelSerialiser, MotorbikeModelSerialiser]),
+            (['manufacturer'], [], ['model'])
+        )
+        self.assertEqual(get_serialiser_plan([CarSerialiser]), ([], [], None))
+
+    def test_plan_queryset_only(self):
+        """Test limiting the fields fetched to the ones serialisers read."""
+        with patch.object(Motorbike.AppsearchMeta, 'appsearch_serialiser_class', MotorbikeModelSerialiser):
+            motorbike = plan_queryset(Motorbike.objects.all()).first()
+        self.assertEqual(motorbike.get_deferred_fields(), set())
+        self.assertEqual(
+            [field.attname for field in Motorbike._meta.concrete_fields if field.attname in motorbike.__dict__],
+            ['id', 'manufacturer_id', 'model']
+        )
+
+    def test_queryset_index_fetches_related_objects_per_chunk(self):
+        """Test indexing a queryset fetches related objects once a chunk."""
+        # Note that the app search chunk size is set to 5 in `tests.settings`,
+        # so there's a query for each of the 3 chunks and their features
+        with self.assertNumQueries(6):
+            Motorbike.objects.all().index_to_appsearch()
+
+        documents = [document for call in self.client_index.call_args_list for document in call[1]['documents']]
+        self.assertEqual(len(documents), 12)
+        self.assertEqual(documents[2]['make'], 'Manufacturer 2')
+        self.assertEqual(documents[2]['features'], ['Feature 0', 'Feature 1'])
+
+    def test_debug_queries(self):
+        """Test a warning is logged for chunks that run a query per object."""
+        config = apps.get_app_config('django_elastic_appsearch')
+        with patch.object(config, 'debug_queries', True):
+            with self.assertLogs('django_elastic_appsearch.planner', 'DEBUG') as logs:
+                Motorbike.objects.all().index_to_appsearch()
+            self.assertEqual([record.levelname for record in logs.records], ['DEBUG'] * 3)
+
+            with patch.object(MotorbikeSerialiser, 'Meta', None):
+                with self.assertLogs('django_elastic_appsearch.planner', 'WARNING') as logs:
+                    Motorbike.objects.all().index_to_appsearch()
+            self.assertEqual(len(logs.records), 1)
+            self.assertIn('example.Motorbike', logs.output[0])
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for reconciling app search engines with the database."""
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from django_elastic_appsearch import reconcile
+from django_elastic_appsearch.reconcile import iter_engine_document_ids, reconcile_engine
+
+from example.models import Car
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+class TestReconcile(BaseElasticAppSearchClientTestCase):
+    """Test reconciling engines with the database."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        # Create 8 cars
+        self.cars = [
+            Car.objects.create(make='Make {}'.format(i), model='Model {}'.format(i), year_manufactured=timezone.now())
+            for i in range(0, 8)
+        ]
+        self.car_ids = [car.get_appsearch_document_id() for car in self.cars]
+        # The engine is missing 3 of the cars, and has 2 deleted cars, another model's document and a stray document
+        self.orphaned_pks = [self.cars[-1].pk + 1, self.cars[-1].pk + 2]
+        self.orphaned_ids = ['Car_{}'.format(pk) for pk in self.orphaned_pks]
+        self.documents = [
+            {'id': self.car_ids[index], 'rank': index + 1} for index in [0, 1, 3, 4, 5]
+        ] + [
+            {'id': 'Car_{}'.format(pk), 'rank': rank} for (pk, rank) in zip(self.orphaned_pks, [100, 101])
+        ] + [{'id': 'Truck_1', 'rank': 1}, {'id': 'Car_abc', 'rank': 2}]
+
+        client_search = patch('elastic_enterprise_search.AppSearch.search', side_effect=self.search)
+        self.client_search = client_search.start()
+        self.addCleanup(client_search.stop)
+
+    def search(self, engine_name, query, current_page, page_size, sort=None, filters=None, result_fields=None):
+        """Respond to a search with a page of the documents, filtered and sorted by rank."""
+        documents = self.documents
+        if filters:
+            documents = [document for document in documents if document['rank'] >= filters['rank']['from']]
+        if sort:
+            documents = sorted(documents, key=lambda document: (document['rank'], document['id']))
+        hits = documents[(current_page - 1) * page_size:current_page * page_size]
+        return {
+            'meta': {'page': {
+                'current': current_page,
+                'size': page_size,
+                'total_pages': -(-len(documents) // page_size),
+                'total_results': len(documents),
+            }},
+            'results': [
+                {'id': {'raw': hit['id']}, 'rank': {'raw': hit['rank']}, '_meta': {'id': hit['id']}} for hit in hits
+            ],
+        }
+
+    def deleted_ids(self):
+        """Return the document IDs deleted from app search."""
+        return [document_id for call in self.client_destroy.call_args_list for document_id in call[1]['document_ids']]
+
+    def test_reconcile(self):
+        """Test only the missing objects are indexed, and only the orphaned documents deleted."""
+        counts = reconcile_engine(Car.objects.all(), 'cars')
+        self.assertEqual(counts, {'documents': 9, 'objects': 8, 'missing': 3, 'orphaned': 2, 'failed': 0})
+
+        self.assertEqual(
+            [document['id'] for call in self.client_index.call_args_list for document in call[1]['documents']],
+            [self.car_ids[index] for index in [2, 6, 7]]
+        )
+        self.assertEqual(sorted(self.deleted_ids()), sorted(self.orphaned_ids))
+
+    def test_reconcile_failures(self):
+        """Test documents app search fails to index or delete are counted, and fail the command."""
+        self.client_index.side_effect = lambda engine_name, documents: [
+            {'id': document['id'], 'errors': ['Invalid field']} for document in documents
+        ]
+        self.client_destroy.side_effect = lambda engine_name, document_ids: [
+            {'id': document_id, 'deleted': False, 'errors': ['Internal server error']} for document_id in document_ids
+        ]
+        with patch('django_elastic_appsearch.retries.time.sleep'):
+            counts = reconcile_engine(Car.objects.all(), 'cars')
+            self.assertEqual(counts['failed'], 5)
+
+            stdout = StringIO()
+            with self.assertRaises(CommandError) as context:
+                call_command('appsearch_reconcile', 'example.Car', stdout=stdout)
+        self.assertEqual(str(context.exception), 'App search rejected 5 documents.')
+        self.assertIn('cars: 9 documents, 8 objects, 3 missing indexed, 2 orphaned deleted.', stdout.getvalue())
+
+    def test_orphans_checked_again(self):
+        """Test documents of objects created since the database was listed aren't deleted."""
+        def iter_model_document_ids(queryset):
+            # A car is created once the cars have been listed
+            yield from original(queryset)
+            Car.objects.create(pk=self.orphaned_pks[0], make='Make', model='Model', year_manufactured=timezone.now())
+
+        original = reconcile.iter_model_document_ids
+        with patch.object(reconcile, 'iter_model_document_ids', iter_model_document_ids):
+            counts = reconcile_engine(Car.objects.all(), 'cars')
+        self.assertEqual(counts['orphaned'], 1)
+        self.assertEqual(self.deleted_ids(), self.orphaned_ids[1:])
+
+    def test_keyset_paging(self):
+        """Test paging through an engine by a field, including values shared across pages."""
+        self.documents.append({'id': 'Car_200', 'rank': 6})
+        with patch('django_elastic_appsearch.reconcile.PAGE_SIZE', 3):
+            document_ids = list(iter_engine_document_ids(Car.get_enterprise_search_appsearch_client(), 'cars', 'rank'))
+        self.assertEqual(sorted(document_ids), sorted(document['id'] for document in self.documents))
+        self.assertEqual(len(document_ids), len(self.documents))
+
+        # The first page is read from the start, and each one after from the last value read
+        self.assertNotIn('filters', self.client_search.call_args_list[0][1])
+        self.assertEqual(
+            [call[1]['filters']['rank']['from'] for call in self.client_search.call_args_list[1:]], [2, 4, 6, 100]
+        )
+
+    def test_result_window(self):
+        """Test engines too large to page through without a keyset field are refused."""
+        with patch('django_elastic_appsearch.reconcile.RESULT_WINDOW', 5):
+            with self.assertRaises(ValueError):
+                reconcile_engine(Car.objects.all(), 'cars')
+            with self.assertRaises(CommandError):
+                call_command('appsearch_reconcile', 'example.Car', stdout=StringIO())
+            counts = reconcile_engine(Car.objects.all(), 'cars', keyset_field='rank')
+        self.assertEqual(counts['missing'], 3)
+
+    def test_command_dry_run(self):
+        """Test a dry run only reports the differences."""
+        stdout = StringIO()
+        call_command('appsearch_reconcile', 'example.Car', '--dry-run', stdout=stdout)
+        self.client_index.assert_not_called()
+        self.client_destroy.assert_not_called()
+        self.assertIn('cars: 9 documents, 8 objects, 3 missing found, 2 orphaned found.', stdout.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('appsearch_reconcile', 'example.Car', '--engine', 'trucks', stdout=StringIO())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for reindexing."""
+
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from django_elastic_appsearch.reindex import partition_queryset
+
+from example.models import Car
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+class TestReindex(BaseElasticAppSearchClientTestCase):
+    """Test the `appsearch_reindex` command."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        # Create 22 cars, made a day apart
+        self.cars = [
+            Car.objects.create(
+                make='Make {}'.format(i),
+                model='Model {}'.format(i),
+                year_manufactured=timezone.now() - timedelta(days=22 - i)
+            )
+            for i in range(0, 22)
+        ]
+        self.car_ids = [car.get_appsearch_document_id() for car in self.cars]
+
+        checkpoint_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(checkpoint_dir.cleanup)
+        self.checkpoint = os.path.join(checkpoint_dir.name, 'checkpoint.json')
+
+    def indexed_ids(self):
+        """Return the document IDs sent to app search."""
+        return [
+            document['id'] for call in self.client_index.call_args_list for document in call[1]['documents']
+        ]
+
+    def test_partition_queryset(self):
+        """Test splitting a queryset into primary key ranges."""
+        # Primary keys run on from the one before the first car's
+        start = self.cars[0].pk - 1
+        self.assertEqual(
+            partition_queryset(Car.objects.all(), 3),
+            [[start, start + 8], [start + 8, start + 16], [start + 16, start + 22]]
+        )
+        self.assertEqual(partition_queryset(Car.objects.all(), 1), [[start, start + 22]])
+        self.assertEqual(partition_queryset(Car.objects.filter(make='Unknown'), 3), [])
+
+    def test_reindex(self):
+        """Test reindexing a model."""
+        stdout = StringIO()
+        call_command('appsearch_reindex', 'example.Car', '--checkpoint', self.checkpoint, stdout=stdout)
+
+        # Note that the app search chunk size is set to 5 in `tests.settings`
+        self.assertEqual(self.client_index.call_count, 5)
+        self.assertEqual(self.indexed_ids(), self.car_ids)
+        self.assertIn('Indexed 22 objects', stdout.getvalue())
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_reindex_since(self):
+        """Test reindexing the objects changed since a date."""
+        since = (timezone.now() - timedelta(days=2, hours=12)).isoformat()
+        call_command(
+            'appsearch_reindex', 'example.Car', '--since', since, '--since-field', 'year_manufactured',
+            '--checkpoint', self.checkpoint, stdout=StringIO()
+        )
+
+        self.assertEqual(self.indexed_ids(), self.car_ids[20:])
+
+    def test_reindex_unknown_engine(self):
+        """Test reindexing to an engine the model isn't indexed to."""
+        with self.assertRaises(CommandError):
+            call_command('appsearch_reindex', 'example.Car', '--engine', 'trucks', '--checkpoint', self.checkpoint)
+
+    def test_reindex_resume(self):
+        """Test a failed reindex can be resumed from its checkpoint."""
+        self.client_index.side_effect = [[], [], ConnectionError()]
+        with self.assertRaises(ConnectionError):
+            call_command('appsearch_reindex', 'example.Car', '--checkpoint', self.checkpoint, stdout=StringIO())
+
+        with open(self.checkpoint) as checkpoint_file:
+            self.assertEqual(json.load(checkpoint_file)['partitions'], [[self.cars[9].pk, self.cars[21].pk]])
+
+        self.client_index.reset_mock(side_effect=True)
+        call_command(
+            'appsearch_reindex', 'example.Car', '--checkpoint', self.checkpoint, '--resume', stdout=StringIO()
+        )
+        self.assertEqual(self.indexed_ids(), self.car_ids[10:])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_reindex_rejected_documents(self):
+        """Test documents app search rejects are reported, and fail the command."""
+        rejected_id = self.car_ids[2]
+        self.client_index.side_effect = lambda engine_name, documents: [
+            {'id': document['id'], 'errors': ['Invalid field'] if document['id'] == rejected_id else []}
+            for document in documents
+        ]
+        stderr = StringIO()
+        with patch('django_elastic_appsearch.retries.time.sleep'), self.assertRaises(CommandError) as context:
+            call_command(
+                'appsearch_reindex', 'example.Car', '--checkpoint', self.checkpoint, stdout=StringIO(), stderr=stderr
+            )
+
+        self.assertEqual(str(context.exception), 'App search rejected 1 documents.')
+        self.assertIn('App search rejected {}: Invalid field'.format(rejected_id), stderr.getvalue())
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_reindex_max_payload_size(self):
+        """Test documents over the payload size limit aren't sent, and are reported."""
+        config = apps.get_app_config('django_elastic_appsearch')
+        with patch.object(config, 'max_payload_size', 64), self.assertLogs('django_elastic_appsearch', 'WARNING'):
+            with self.assertRaises(CommandError) as context:
+                call_command(
+                    'appsearch_reindex', 'example.Car', '--checkpoint', self.checkpoint,
+                    stdout=StringIO(), stderr=StringIO()
+                )
+
+        self.assertEqual(str(context.exception), 'App search rejected 22 documents.')
+        self.client_index.assert_not_called()
+
+    def test_reindex_in_processes(self):
+        """Test reindexing a model split into partitions, each in its own process."""
+        stdout = StringIO()
+        call_command(
+            'appsearch_reindex', 'example.Car', '--processes', '3', '--checkpoint', self.checkpoint, stdout=stdout
+        )
+
+        self.assertIn('Indexed 22 objects', stdout.getvalue())
+        self.assertFalse(os.path.exists(self.checkpoint))
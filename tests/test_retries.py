@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for retrying failed app search requests."""
+
+from unittest.mock import Mock, patch
+
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from django_elastic_appsearch.retries import BulkResults, get_retry_delay, is_retryable
+from elastic_enterprise_search import BadRequestError, ServiceUnavailableError
+from elastic_transport import ConnectionTimeout
+
+from example.models import Car
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+def service_unavailable(headers=None):
+    """Return an app search error for a 503 response."""
+    return ServiceUnavailableError('Service unavailable', meta=Mock(status=503, headers=headers or {}), body={})
+
+
+class TestRetries(TestCase):
+    """Test deciding whether and when to retry requests."""
+
+    def test_is_retryable(self):
+        """Test only transient errors are retried."""
+        self.assertTrue(is_retryable(service_unavailable()))
+        self.assertTrue(is_retryable(ConnectionTimeout('Timed out')))
+        self.assertFalse(is_retryable(BadRequestError('Bad request', meta=Mock(status=400), body={})))
+        self.assertFalse(is_retryable(ValueError()))
+
+    def test_retry_after(self):
+        """Test waiting as long as app search asks to."""
+        self.assertEqual(get_retry_delay(service_unavailable({'retry-after': '7'}), 1), 7)
+        retry_at = http_date(timezone.now().timestamp() + 30)
+        self.assertAlmostEqual(get_retry_delay(service_unavailable({'retry-after': retry_at}), 1), 30, delta=2)
+
+    def test_exponential_backoff(self):
+        """Test backing off exponentially, with jitter, up to a minute."""
+        with patch('django_elastic_appsearch.retries.random.uniform', side_effect=lambda low, high: high):
+            self.assertEqual(
+                [get_retry_delay(service_unavailable(), attempt) for attempt in (1, 2, 3, 8)], [1, 2, 4, 60]
+            )
+
+    def test_bulk_results(self):
+        """Test summarising the responses for each document."""
+        results = BulkResults()
+        results.add([{'id': 'Car_1', 'errors': []}, {'id': 'Car_2', 'errors': ['Invalid field']}], retried=2)
+        results.add([{'id': 'Car_3', 'deleted': True}])
+        self.assertEqual(len(results), 3)
+        self.assertEqual((results.succeeded, results.failed, results.retried), (2, 1, 2))
+        self.assertEqual(results.failed_ids, ['Car_2'])
+        self.assertEqual(results.errors, {'Car_2': ['Invalid field']})
+
+
+class TestQuerysetRetries(BaseElasticAppSearchClientTestCase):
+    """Test retrying the failed requests of queryset operations."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        sleep = patch('django_elastic_appsearch.retries.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+        # Create 12 cars
+        for i in range(0, 12):
+            Car(make='Make {}'.format(i), model='Model {}'.format(i), year_manufactured=timezone.now()).save()
+
+    def index_responses(self, engine_name, documents):
+        """Respond to indexing documents, with an error for the first one."""
+        return [{'id': document['id'], 'errors': ['Invalid field'] if index == 0 else []}
+                for index, document in enumerate(documents)]
+
+    def test_queryset_index_retries_failed_chunk(self):
+        """Test only the chunk that failed is sent again."""
+        calls = []
+
+        def index_documents(engine_name, documents):
+            calls.append([document['id'] for document in documents])
+            if len(calls) == 2:
+                raise service_unavailable({'retry-after': '3'})
+            return [{'id': document['id'], 'errors': []} for document in documents]
+
+        self.client_index.side_effect = index_documents
+        with self.assertLogs('django_elastic_appsearch.retries', 'WARNING') as logs:
+            results = Car.objects.all().index_to_appsearch()
+        self.assertEqual(len(logs.records), 1)
+
+        self.assertEqual([len(call) for call in calls], [5, 5, 5, 2])
+        self.assertEqual(calls[1], calls[2])
+        self.sleep.assert_called_once_with(3)
+        self.assertEqual((results.succeeded, results.failed, results.retried), (12, 0, 5))
+
+    def test_rejected_documents_not_resent(self):
+        """Test documents app search rejects are counted as failed without sending them again."""
+        self.client_index.side_effect = self.index_responses
+        results = Car.objects.all().index_to_appsearch()
+
+        documents = [call[1]['documents'] for call in self.client_index.call_args_list]
+        self.assertEqual([len(chunk) for chunk in documents], [5, 5, 2])
+        self.sleep.assert_not_called()
+        self.assertEqual((results.succeeded, results.failed, results.retried), (9, 3, 0))
+        self.assertEqual(results.failed_ids, [chunk[0]['id'] for chunk in documents])
+        self.assertEqual(results.errors[documents[0][0]['id']], ['Invalid field'])
+
+    def test_gives_up(self):
+        """Test errors that can't be retried, or keep happening, are raised."""
+        self.client_index.side_effect = BadRequestError('Bad request', meta=Mock(status=400), body={})
+        with self.assertRaises(BadRequestError):
+            Car.objects.all().index_to_appsearch()
+        self.assertEqual(self.client_index.call_count, 1)
+
+        self.client_destroy.side_effect = service_unavailable()
+        with self.assertRaises(ServiceUnavailableError), self.assertLogs('django_elastic_appsearch.retries'):
+            Car.objects.all().delete_from_appsearch()
+        # The default `APPSEARCH_MAX_RETRIES` is 3
+        self.assertEqual(self.client_destroy.call_count, 4)
+
+    async def test_async_queryset_delete_retries(self):
+        """Test deleting a queryset from an event loop retries failed chunks."""
+        self.async_client_destroy.side_effect = [
+            [{'id': 'Car_1', 'deleted': True}], ConnectionTimeout('Timed out'), [{'id': 'Car_6', 'deleted': True}], []
+        ]
+        with patch('django_elastic_appsearch.retries.asyncio.sleep') as sleep, \
+                self.assertLogs('django_elastic_appsearch.retries'):
+            results = await Car.objects.all().adelete_from_appsearch()
+        sleep.assert_called_once()
+        self.assertEqual(self.async_client_destroy.call_count, 4)
+        self.assertEqual((results.succeeded, results.retried), (2, 5))
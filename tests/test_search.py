@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for searching app search and mapping the results to model objects."""
+
+import threading
+from unittest.mock import patch
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils import timezone
+from django_elastic_appsearch.cache import invalidate_search_cache
+from django_elastic_appsearch.engines import clear_engine_alias_cache
+from django_elastic_appsearch.search import search_batch
+from django_elastic_appsearch.models import EngineAlias
+
+from example.models import Car
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+def make_search_response(document_ids, engine_name, current_page, page_size):
+    """Make app search's response for a page of ranked documents."""
+    hits = document_ids[(current_page - 1) * page_size:current_page * page_size]
+    return {
+        'meta': {'page': {
+            'current': current_page,
+            'size': page_size,
+            'total_pages': -(-len(document_ids) // page_size),
+            'total_results': len(document_ids),
+        }},
+        'results': [{'id': {'raw': hit}, '_meta': {'id': hit, 'engine': engine_name}} for hit in hits],
+        'facets': {'make': [{'type': 'value', 'data': []}]},
+    }
+
+
+class TestSearch(BaseElasticAppSearchClientTestCase):
+    """Test searching app search."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        # Create 12 cars
+        self.cars = [
+            Car.objects.create(make='Make {}'.format(i), model='Model {}'.format(i), year_manufactured=timezone.now())
+            for i in range(0, 12)
+        ]
+        # Rank the cars newest first, with a deleted car and a document of another model among them
+        self.document_ids = [car.get_appsearch_document_id() for car in reversed(self.cars)]
+        self.document_ids.insert(3, 'Car_999')
+        self.document_ids.insert(6, 'Truck_1')
+
+        client_search = patch('elastic_enterprise_search.AppSearch.search', side_effect=self.search)
+        self.client_search = client_search.start()
+        self.addCleanup(client_search.stop)
+
+    def search(self, engine_name, query, current_page, page_size, **options):
+        """Respond to a search with a page of the ranked documents."""
+        return make_search_response(self.document_ids, engine_name, current_page, page_size)
+
+    def test_get_pk_from_appsearch_document_id(self):
+        """Test getting primary keys back from document IDs."""
+        car = self.cars[0]
+        self.assertEqual(Car.get_pk_from_appsearch_document_id(car.get_appsearch_document_id()), car.pk)
+        self.assertIsNone(Car.get_pk_from_appsearch_document_id('Truck_1'))
+        self.assertIsNone(Car.get_pk_from_appsearch_document_id('Car_abc'))
+
+    def test_search_is_lazy(self):
+        """Test nothing is sent to app search until the results are used."""
+        results = Car.appsearch.search('car', filters={'make': ['Make 1']}, facets={'make': {'type': 'value'}})
+        self.client_search.assert_not_called()
+
+        self.assertEqual(results.count, 14)
+        self.assertEqual(results.facets, {'make': [{'type': 'value', 'data': []}]})
+        self.client_search.assert_called_once_with(
+            engine_name='cars', query='car', current_page=1, page_size=10,
+            filters={'make': ['Make 1']}, facets={'make': {'type': 'value'}}
+        )
+
+    def test_iterate_pages(self):
+        """Test iterating fetches a page at a time, with a query a page, in ranking order."""
+        results = Car.appsearch.search('car', page_size=5)
+        iterator = iter(results)
+        with self.assertNumQueries(1):
+            self.assertEqual(next(iterator), self.cars[11])
+        self.assertEqual(self.client_search.call_count, 1)
+
+        with self.assertNumQueries(2):
+            remaining = list(iterator)
+        self.assertEqual([self.cars[11]] + remaining, list(reversed(self.cars)))
+        self.assertEqual([call[1]['current_page'] for call in self.client_search.call_args_list], [1, 2, 3])
+        self.assertEqual(len(list(results.iter_hits())), 14)
+
+    def test_queryset_search(self):
+        """Test searching from a queryset only maps hits to objects in it."""
+        results = Car.objects.filter(make__in=['Make 1', 'Make 2']).search('car')
+        self.assertEqual(list(results), [self.cars[2], self.cars[1]])
+
+    def test_slicing_and_pagination(self):
+        """Test slices only fetch the pages they cover, and work with Django's paginator."""
+        results = Car.appsearch.search('car', page_size=5)
+        # The hit for the other model's document is left out
+        self.assertEqual(results[5:8], [self.cars[7], self.cars[6]])
+        self.assertEqual([call[1]['current_page'] for call in self.client_search.call_args_list], [1, 2])
+        self.assertEqual(results[0], self.cars[11])
+        with self.assertRaises(IndexError):
+            results[3]
+
+        page = Paginator(results, 5).page(3)
+        self.assertEqual(list(page), [self.cars[3], self.cars[2], self.cars[1], self.cars[0]])
+
+    def test_search_live_engine(self):
+        """Test models using engine aliases search the live engine."""
+        EngineAlias.objects.create(name='cars', engine_name='cars__v1', next_engine_name='cars__v2', version=2)
+        clear_engine_alias_cache()
+        self.addCleanup(clear_engine_alias_cache)
+
+        with patch.object(Car.AppsearchMeta, 'appsearch_use_engine_alias', True, create=True):
+            results = Car.appsearch.search('car')
+            self.assertEqual(results.meta['page']['total_results'], 14)
+        self.assertEqual(self.client_search.call_args[1]['engine_name'], 'cars__v1')
+
+
+class TestSearchCache(TestSearch):
+    """Test caching search results."""
+
+    def setUp(self):
+        """Turn on the search cache."""
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        search_cache = patch.object(apps.get_app_config('django_elastic_appsearch'), 'search_cache', 'default')
+        search_cache.start()
+        self.addCleanup(search_cache.stop)
+
+    def test_repeated_searches_are_cached(self):
+        """Test the same search is only sent once, up to whitespace and option order."""
+        list(Car.appsearch.search('red car', filters={'make': ['Make 1'], 'model': ['Model 1']}))
+        list(Car.appsearch.search(' red  car', filters={'model': ['Model 1'], 'make': ['Make 1']}))
+        self.assertEqual(self.client_search.call_count, 2)
+
+        # Each page is cached on its own
+        Car.appsearch.search('red car', page_size=5).get_page(2)
+        self.assertEqual(self.client_search.call_count, 3)
+        Car.appsearch.search('red car', page_size=5, use_cache=False).get_page(2)
+        self.assertEqual(self.client_search.call_count, 4)
+
+    def test_writes_invalidate_engine(self):
+        """Test writing to an engine invalidates its cached searches, and only its own."""
+        Car.appsearch.search('car').count
+        invalidate_search_cache(['trucks'])
+        Car.appsearch.search('car').count
+        self.assertEqual(self.client_search.call_count, 1)
+
+        self.cars[0].index_to_appsearch()
+        Car.appsearch.search('car').count
+        self.assertEqual(self.client_search.call_count, 2)
+
+        Car.objects.filter(pk=self.cars[0].pk).delete_from_appsearch()
+        Car.appsearch.search('car').count
+        self.assertEqual(self.client_search.call_count, 3)
+
+    def test_generation_counter_evicted(self):
+        """Test searches cached before the generation counter was evicted aren't read again."""
+        Car.appsearch.search('car').count
+        cache.delete('appsearch_search_generation:cars')
+        invalidate_search_cache(['cars'])
+        Car.appsearch.search('car').count
+        self.assertEqual(self.client_search.call_count, 2)
+
+
+class TestSearchBatch(BaseElasticAppSearchClientTestCase):
+    """Test batching searches."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        self.cars = [
+            Car.objects.create(make='Make {}'.format(i), model='Model {}'.format(i), year_manufactured=timezone.now())
+            for i in range(0, 3)
+        ]
+        self.document_ids = [car.get_appsearch_document_id() for car in self.cars]
+
+        client_search = patch('elastic_enterprise_search.AppSearch.search', side_effect=self.search)
+        self.client_search = client_search.start()
+        self.addCleanup(client_search.stop)
+        client_multi_search = patch('elastic_enterprise_search.AppSearch.multi_search', side_effect=self.multi_search)
+        self.client_multi_search = client_multi_search.start()
+        self.addCleanup(client_multi_search.stop)
+
+    def search(self, engine_name, query, current_page, page_size, **options):
+        """Respond to a search with a page of the documents."""
+        return make_search_response(self.document_ids, engine_name, current_page, page_size)
+
+    def multi_search(self, engine_name, queries):
+        """Respond to each search of a multi search with a page of the documents."""
+        return [
+            make_search_response(self.document_ids, engine_name, query['page']['current'], query['page']['size'])
+            for query in queries
+        ]
+
+    def test_searches_sent_together(self):
+        """Test the first pages of batched searches are fetched together when one is used."""
+        with Car.appsearch.batch():
+            red = Car.appsearch.search('red', filters={'make': ['Make 1']})
+            blue = Car.objects.filter(pk=self.cars[0].pk).search('blue', page_size=2)
+            green = Car.appsearch.search('green', engine_name='trucks')
+        self.client_search.assert_not_called()
+        self.client_multi_search.assert_not_called()
+
+        self.assertEqual(list(blue.get_page(1)), [self.cars[0]])
+        self.client_multi_search.assert_called_once_with(engine_name='cars', queries=[
+            {'query': 'red', 'page': {'current': 1, 'size': 10}, 'filters': {'make': ['Make 1']}},
+            {'query': 'blue', 'page': {'current': 1, 'size': 2}},
+        ])
+        # A search of an engine of its own is sent on its own, at the same time
+        self.assertEqual(self.client_search.call_args[1]['engine_name'], 'trucks')
+
+        self.assertEqual(list(red), self.cars)
+        self.assertEqual(green.count, 3)
+        self.assertEqual(self.client_multi_search.call_count, 1)
+        self.assertEqual(self.client_search.call_count, 1)
+
+        # Later pages are fetched on their own
+        self.assertEqual(list(blue), [self.cars[0]])
+        self.assertEqual(self.client_search.call_args[1]['current_page'], 2)
+
+    def test_engines_searched_at_once(self):
+        """Test the searches of different engines are sent at the same time."""
+        # Each request waits for the other, so they have to be in flight together
+        barrier = threading.Barrier(2, timeout=5)
+
+        def search(**kwargs):
+            barrier.wait()
+            return self.search(**kwargs)
+
+        self.client_search.side_effect = search
+        with search_batch():
+            cars = Car.appsearch.search('red')
+            trucks = Car.appsearch.search('red', engine_name='trucks')
+        self.assertEqual(cars.count, 3)
+        self.assertEqual(trucks.count, 3)
+
+    def test_multi_search_limit(self):
+        """Test at most 10 searches are sent in a multi search."""
+        with search_batch():
+            searches = [Car.appsearch.search('car {}'.format(i)) for i in range(0, 12)]
+            # Nested blocks share the batch
+            with search_batch():
+                searches.append(Car.appsearch.search('car'))
+        self.assertEqual([search.count for search in searches], [3] * 13)
+        self.assertEqual(
+            [len(call[1]['queries']) for call in self.client_multi_search.call_args_list], [10, 3]
+        )
+
+    def test_failed_searches_sent_alone(self):
+        """Test searches app search couldn't run in a multi search are sent again on their own."""
+        self.client_multi_search.side_effect = lambda engine_name, queries: [
+            {'errors': ['Invalid filter']}, self.search(engine_name, 'car', 1, 10)
+        ]
+        with search_batch():
+            invalid = Car.appsearch.search('car', filters={'invalid': ['filter']})
+            valid = Car.appsearch.search('car')
+        self.assertEqual(valid.count, 3)
+        self.client_search.assert_not_called()
+        self.assertEqual(invalid.count, 3)
+        self.assertEqual(self.client_search.call_count, 1)
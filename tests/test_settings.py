@@ -74,6 +74,23 @@ class TestDjangoElasticAppSearchSettings(BaseElasticAppSearchClientTestCase):
         )
         self.assertFalse(config.use_https)
 
+    @override_settings(APPSEARCH_CONNECTIONS_PER_NODE=25)
+    def test_appsearch_connections_per_node_setting(self):
+        """Test `APPSEARCH_CONNECTIONS_PER_NODE` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.connections_per_node, 25)
+
+    def test_appsearch_connections_per_node_default(self):
+        """Test when `APPSEARCH_CONNECTIONS_PER_NODE` is not set, defaults to None."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertIsNone(config.connections_per_node)
+
     @override_settings(APPSEARCH_CHUNK_SIZE=25)
     def test_appsearch_chunk_size_setting(self):
         """Test `APPSEARCH_CHUNK_SIZE` setting."""
@@ -93,6 +110,227 @@ class TestDjangoElasticAppSearchSettings(BaseElasticAppSearchClientTestCase):
         )
         self.assertEqual(config.chunk_size, 100)
 
+    @override_settings(APPSEARCH_MAX_WORKERS=8)
+    def test_appsearch_max_workers_setting(self):
+        """Test `APPSEARCH_MAX_WORKERS` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.max_workers, 8)
+
+    def test_appsearch_max_workers_default(self):
+        """Test when `APPSEARCH_MAX_WORKERS` is not set, defaults to 1."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.max_workers, 1)
+
+    @override_settings(APPSEARCH_MAX_PAYLOAD_SIZE=1024)
+    def test_appsearch_max_payload_size_setting(self):
+        """Test `APPSEARCH_MAX_PAYLOAD_SIZE` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.max_payload_size, 1024)
+
+    def test_appsearch_max_payload_size_default(self):
+        """Test when `APPSEARCH_MAX_PAYLOAD_SIZE` is not set, defaults to None."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertIsNone(config.max_payload_size)
+
+    @override_settings(APPSEARCH_MAX_RETRIES=5)
+    def test_appsearch_max_retries_setting(self):
+        """Test `APPSEARCH_MAX_RETRIES` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.max_retries, 5)
+
+    def test_appsearch_max_retries_default(self):
+        """Test when `APPSEARCH_MAX_RETRIES` is not set, defaults to 3."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.max_retries, 3)
+
+    @override_settings(APPSEARCH_RETRY_BACKOFF=0.5)
+    def test_appsearch_retry_backoff_setting(self):
+        """Test `APPSEARCH_RETRY_BACKOFF` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.retry_backoff, 0.5)
+
+    def test_appsearch_retry_backoff_default(self):
+        """Test when `APPSEARCH_RETRY_BACKOFF` is not set, defaults to 1."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.retry_backoff, 1)
+
+    @override_settings(APPSEARCH_RATE_LIMITS={'default': {'requests_per_second': 10}})
+    def test_appsearch_rate_limits_setting(self):
+        """Test `APPSEARCH_RATE_LIMITS` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.rate_limits, {'default': {'requests_per_second': 10}})
+
+    def test_appsearch_rate_limits_default(self):
+        """Test when `APPSEARCH_RATE_LIMITS` is not set, defaults to None."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertIsNone(config.rate_limits)
+
+    @override_settings(APPSEARCH_RATE_LIMIT_CACHE='default')
+    def test_appsearch_rate_limit_cache_setting(self):
+        """Test `APPSEARCH_RATE_LIMIT_CACHE` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.rate_limit_cache, 'default')
+
+    def test_appsearch_rate_limit_cache_default(self):
+        """Test when `APPSEARCH_RATE_LIMIT_CACHE` is not set, defaults to None."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertIsNone(config.rate_limit_cache)
+
+    @override_settings(APPSEARCH_SEARCH_CACHE='default')
+    def test_appsearch_search_cache_setting(self):
+        """Test `APPSEARCH_SEARCH_CACHE` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.search_cache, 'default')
+
+    def test_appsearch_search_cache_default(self):
+        """Test when `APPSEARCH_SEARCH_CACHE` is not set, defaults to None."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertIsNone(config.search_cache)
+
+    @override_settings(APPSEARCH_SEARCH_CACHE_TIMEOUT=300)
+    def test_appsearch_search_cache_timeout_setting(self):
+        """Test `APPSEARCH_SEARCH_CACHE_TIMEOUT` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.search_cache_timeout, 300)
+
+    def test_appsearch_search_cache_timeout_default(self):
+        """Test when `APPSEARCH_SEARCH_CACHE_TIMEOUT` is not set, defaults to 60."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.search_cache_timeout, 60)
+
+    @override_settings(APPSEARCH_SYNC_LAG=300)
+    def test_appsearch_sync_lag_setting(self):
+        """Test `APPSEARCH_SYNC_LAG` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.sync_lag, 300)
+
+    def test_appsearch_sync_lag_default(self):
+        """Test when `APPSEARCH_SYNC_LAG` is not set, defaults to 60."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.sync_lag, 60)
+
+    @override_settings(APPSEARCH_SYNC_PROCESSOR='django_elastic_appsearch.sync.ImmediateProcessor')
+    def test_appsearch_sync_processor_setting(self):
+        """Test `APPSEARCH_SYNC_PROCESSOR` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.sync_processor, 'django_elastic_appsearch.sync.ImmediateProcessor')
+
+    def test_appsearch_sync_processor_default(self):
+        """Test when `APPSEARCH_SYNC_PROCESSOR` is not set, defaults to the on commit processor."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.sync_processor, 'django_elastic_appsearch.sync.OnCommitProcessor')
+
+    @override_settings(APPSEARCH_HASH_STORE='django_elastic_appsearch.hashes.CacheHashStore')
+    def test_appsearch_hash_store_setting(self):
+        """Test `APPSEARCH_HASH_STORE` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.hash_store, 'django_elastic_appsearch.hashes.CacheHashStore')
+
+    def test_appsearch_hash_store_default(self):
+        """Test when `APPSEARCH_HASH_STORE` is not set, defaults to None."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertIsNone(config.hash_store)
+
+    @override_settings(APPSEARCH_ENGINE_ALIAS_TIMEOUT=30)
+    def test_appsearch_engine_alias_timeout_setting(self):
+        """Test `APPSEARCH_ENGINE_ALIAS_TIMEOUT` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.engine_alias_timeout, 30)
+
+    def test_appsearch_engine_alias_timeout_default(self):
+        """Test when `APPSEARCH_ENGINE_ALIAS_TIMEOUT` is not set, defaults to 5."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertEqual(config.engine_alias_timeout, 5)
+
+    @override_settings(APPSEARCH_DEBUG_QUERIES=True)
+    def test_appsearch_debug_queries_setting(self):
+        """Test `APPSEARCH_DEBUG_QUERIES` setting."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertTrue(config.debug_queries)
+
+    def test_appsearch_debug_queries_default(self):
+        """Test when `APPSEARCH_DEBUG_QUERIES` is not set, defaults to False."""
+        config = DjangoAppSearchConfig(
+            app_name=self.original_config.name,
+            app_module=self.original_config.module
+        )
+        self.assertFalse(config.debug_queries)
+
     @override_settings(APPSEARCH_INDEXING_ENABLED=False)
     def test_appsearch_indexing_enabled_setting(self):
         """Test `APPSEARCH_INDEXING_ENABLED` setting."""
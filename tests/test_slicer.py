@@ -5,7 +5,7 @@
 
 from django.test import TestCase
 from django.utils import timezone
-from django_elastic_appsearch.slicer import slice_queryset
+from django_elastic_appsearch.slicer import keyset_slice_queryset, slice_queryset
 
 from example.models import Car
 
@@ -55,3 +55,58 @@ class TestSlicer(TestCase):
         # First slice should have all 22 cars
         for queryset in slices:
             self.assertEqual(queryset.count(), 22)
+
+    def test_keyset_slice_queryset(self):
+        """Test if the `keyset_slice_queryset` works as expected."""
+        queryset = Car.objects.all()
+
+        # One query per chunk, the short last chunk ends the iteration
+        with self.assertNumQueries(5):
+            chunks = list(keyset_slice_queryset(queryset, 5))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 5, 5, 5, 2])
+        self.assertEqual(
+            [car.pk for chunk in chunks for car in chunk],
+            list(queryset.order_by('pk').values_list('pk', flat=True))
+        )
+
+    def test_keyset_slicing_queryset_multiple_of_chunk_size(self):
+        """Test keyset slicing a queryset that fills every chunk."""
+        pks = list(Car.objects.order_by('pk').values_list('pk', flat=True))
+        queryset = Car.objects.filter(pk__in=pks[:20])
+
+        # The last full chunk needs one more query to find the end
+        with self.assertNumQueries(5):
+            chunks = list(keyset_slice_queryset(queryset, 5))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 5, 5, 5])
+
+    def test_keyset_slicing_queryset_with_ordering(self):
+        """Test keyset slicing a queryset over a custom ordering key."""
+        queryset = Car.objects.all()
+
+        chunks = keyset_slice_queryset(queryset, 5, ordering='-make')
+
+        self.assertEqual(
+            [car.make for chunk in chunks for car in chunk],
+            sorted(queryset.values_list('make', flat=True), reverse=True)
+        )
+
+    def test_keyset_slicing_queryset_over_several_fields(self):
+        """Test keyset slicing a queryset over fields that are only unique together."""
+        Car.objects.filter(pk__lte=12).update(make='Make')
+        queryset = Car.objects.all()
+
+        chunks = list(keyset_slice_queryset(queryset, 5, ordering=('make', '-pk')))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 5, 5, 5, 2])
+        self.assertEqual(
+            [car.pk for chunk in chunks for car in chunk],
+            list(queryset.order_by('make', '-pk').values_list('pk', flat=True))
+        )
+
+    def test_keyset_slicing_empty_queryset(self):
+        """Test keyset slicing an empty queryset."""
+        with self.assertNumQueries(1):
+            chunks = list(keyset_slice_queryset(Car.objects.filter(make='Unknown'), 5))
+        self.assertEqual(chunks, [])
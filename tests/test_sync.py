@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for automatic syncing."""
+
+from unittest.mock import patch
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.utils import timezone
+from django_elastic_appsearch.buffer import DELETE, INDEX
+from django_elastic_appsearch.sync import QueuedProcessor, process_queued
+from elastic_transport import ConnectionTimeout
+
+from example.models import Car, Van
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+class RecordingQueuedProcessor(QueuedProcessor):
+    """A queued processor that records the work it's handed."""
+
+    queue = []
+
+    def enqueue(self, model_label, operation, identifiers):
+        """Record the work."""
+        self.queue.append((model_label, operation, identifiers))
+
+
+class TestAutoSync(BaseElasticAppSearchClientTestCase):
+    """Test automatic syncing of models with `appsearch_auto_sync` turned on."""
+
+    def setUp(self):
+        """Setup the patches."""
+        super().setUp()
+        self.config = apps.get_app_config('django_elastic_appsearch')
+
+    def create_vans(self, count):
+        """Create some vans."""
+        return [
+            Van.objects.create(make='Make {}'.format(i), model='Model {}'.format(i), year_manufactured=timezone.now())
+            for i in range(0, count)
+        ]
+
+    def create_synced_vans(self, count):
+        """Create some vans, and forget about syncing them."""
+        with self.captureOnCommitCallbacks(execute=True):
+            vans = self.create_vans(count)
+        self.client_index.reset_mock()
+        return vans
+
+    def test_save_synced_on_commit(self):
+        """Test saved objects are sent in bulk once the transaction commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.create_vans(7)
+            self.assertEqual(self.client_index.call_count, 0)
+
+        # Note that the app search chunk size is set to 5 in `tests.settings`
+        self.assertEqual(self.client_index.call_count, 2)
+        self.assertEqual(self.client_index.call_args[1]['engine_name'], 'vans')
+
+    def test_save_rolled_back(self):
+        """Test nothing is sent when the transaction rolls back."""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.create_vans(3)
+                    raise RuntimeError()
+            except RuntimeError:
+                pass
+
+        self.assertEqual(self.client_index.call_count, 0)
+
+    def test_savepoint_rolled_back(self):
+        """Test objects saved within a savepoint that rolls back aren't sent when the transaction commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                van = Van.objects.create(make='Make A', model='Model A', year_manufactured=timezone.now())
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    Van.objects.create(make='Make B', model='Model B', year_manufactured=timezone.now())
+                    raise RuntimeError()
+
+        self.assertEqual(Van.objects.count(), 1)
+        self.assertEqual(
+            [document['id'] for call in self.client_index.call_args_list for document in call[1]['documents']],
+            [van.get_appsearch_document_id()]
+        )
+
+    def test_delete_synced(self):
+        """Test deleted objects are deleted from app search."""
+        vans = self.create_synced_vans(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Van.objects.all().delete()
+
+        self.assertEqual(self.client_destroy.call_count, 1)
+        self.assertEqual(
+            sorted(self.client_destroy.call_args[1]['document_ids']),
+            sorted(van.get_appsearch_document_id() for van in vans)
+        )
+
+    def test_bulk_create_synced(self):
+        """Test bulk created objects are synced."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Van.objects.bulk_create([
+                Van(make='Make {}'.format(i), model='Model', year_manufactured=timezone.now()) for i in range(3)
+            ])
+
+        self.assertEqual(self.client_index.call_count, 1)
+        self.assertEqual(len(self.client_index.call_args[1]['documents']), 3)
+
+    def test_bulk_create_read_back(self):
+        """Test bulk created objects are read back when the database doesn't return their primary keys."""
+        self.create_synced_vans(2)
+        self.client_index.reset_mock()
+        with patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            with self.captureOnCommitCallbacks(execute=True):
+                vans = Van.objects.bulk_create([
+                    Van(make='Make {}'.format(i), model='Model', year_manufactured=timezone.now()) for i in range(3)
+                ])
+
+        self.assertTrue(all(van.pk is None for van in vans))
+        self.assertEqual(self.client_index.call_count, 1)
+        self.assertEqual(
+            [document['id'] for document in self.client_index.call_args[1]['documents']],
+            [van.get_appsearch_document_id() for van in Van.objects.order_by('pk')[2:]]
+        )
+
+    def test_bulk_create_without_primary_keys_logged(self):
+        """Test bulk created objects that can't be read back are logged."""
+        with patch.object(Van._meta, 'pk', Van._meta.get_field('make')):
+            with self.assertLogs('django_elastic_appsearch.orm', 'WARNING') as logs:
+                with patch('django.db.models.query.QuerySet.bulk_create', side_effect=lambda objs, **kwargs: objs):
+                    Van.objects.bulk_create([Van(make=None, model='Model', year_manufactured=timezone.now())])
+
+        self.assertIn('1 bulk created example.Van objects', logs.output[0])
+        self.assertEqual(self.client_index.call_count, 0)
+
+    def test_queryset_update_synced(self):
+        """Test objects changed with `QuerySet.update` are synced."""
+        self.create_synced_vans(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Van.objects.filter(make='Make 1').update(model='Transit')
+
+        documents = self.client_index.call_args[1]['documents']
+        self.assertEqual([document['model'] for document in documents], ['Transit'])
+
+    def test_queryset_update_chunked(self):
+        """Test objects updated with `QuerySet.update` are paged over a chunk at a time, as they leave the queryset."""
+        self.create_synced_vans(7)
+        queryset = Van.objects.filter(model__startswith='Model')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(queryset.update(model='Transit'), 7)
+
+        self.assertFalse(queryset.exists())
+        documents = [
+            document for call in self.client_index.call_args_list for document in call[1]['documents']
+        ]
+        self.assertEqual(
+            sorted(document['id'] for document in documents),
+            sorted(van.get_appsearch_document_id() for van in Van.objects.all())
+        )
+        self.assertEqual({document['model'] for document in documents}, {'Transit'})
+
+    def test_models_without_auto_sync(self):
+        """Test models without auto sync aren't synced."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Car(make='Toyota', model='Corolla', year_manufactured=timezone.now()).save()
+            Car.objects.update(model='Camry')
+
+        self.assertEqual(self.client_index.call_count, 0)
+
+    def test_immediate_processor(self):
+        """Test the immediate processor sends each object as it's saved."""
+        with patch.object(self.config, 'sync_processor', 'django_elastic_appsearch.sync.ImmediateProcessor'):
+            self.create_vans(3)
+
+        self.assertEqual(self.client_index.call_count, 3)
+
+    def test_queued_processor(self):
+        """Test the queued processor hands the work to a queue on commit."""
+        RecordingQueuedProcessor.queue = []
+        processor_path = 'tests.test_sync.RecordingQueuedProcessor'
+        with patch.object(self.config, 'sync_processor', processor_path):
+            with self.captureOnCommitCallbacks(execute=True):
+                vans = self.create_vans(2)
+                pks = [van.pk for van in vans]
+                van_id = vans[0].get_appsearch_document_id()
+                vans[0].delete()
+
+        self.assertEqual(self.client_index.call_count, 0)
+        self.assertEqual(RecordingQueuedProcessor.queue, [
+            ('example.Van', INDEX, [pks[0]]),
+            ('example.Van', INDEX, [pks[1]]),
+            ('example.Van', DELETE, [van_id]),
+        ])
+
+        for work in RecordingQueuedProcessor.queue:
+            process_queued(*work)
+        self.client_index.assert_called_once()
+        self.client_destroy.assert_called_once_with(engine_name='vans', document_ids=[van_id])
+
+    def test_process_queued_delete_retried(self):
+        """Test queued deletes are retried on transient errors, in chunks."""
+        self.client_destroy.side_effect = [
+            ConnectionTimeout('Timed out'),
+            [{'id': 'Van_{}'.format(pk), 'deleted': True} for pk in range(1, 6)],
+            [{'id': 'Van_6', 'deleted': True}],
+        ]
+        with patch('django_elastic_appsearch.retries.time.sleep'), \
+                self.assertLogs('django_elastic_appsearch.retries', 'WARNING'):
+            responses = process_queued('example.Van', DELETE, ['Van_{}'.format(pk) for pk in range(1, 7)])
+
+        # Note that the app search chunk size is set to 5 in `tests.settings`
+        self.assertEqual(
+            [len(call[1]['document_ids']) for call in self.client_destroy.call_args_list],
+            [5, 5, 1]
+        )
+        self.assertEqual((responses.succeeded, responses.retried), (6, 5))
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for rate limiting app search requests."""
+
+from unittest.mock import Mock, patch
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.apps import apps
+from django.test import TestCase
+from django.utils import timezone
+from django_elastic_appsearch.clients import (
+    clear_client_cache,
+    get_api_v1_async_enterprise_search_client,
+    get_api_v1_enterprise_search_client
+)
+from elastic_enterprise_search import AppSearch
+from django_elastic_appsearch.throttle import (
+    BULK,
+    INTERACTIVE,
+    CacheRateLimiter,
+    InFlightGovernor,
+    LocalRateLimiter,
+    ThrottledAppSearch,
+    ThrottledAsyncAppSearch,
+    bulk_priority,
+    clear_throttle_cache,
+    get_priority,
+    get_throttle
+)
+
+from example.models import Car
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+class TestLimiters(TestCase):
+    """Test the rate limiters and the in flight governor."""
+
+    def test_local_rate_limiter(self):
+        """Test the token bucket refills at its rate, and holds back a reserve from bulk requests."""
+        with patch('django_elastic_appsearch.throttle.time.monotonic', return_value=100):
+            limiter = LocalRateLimiter(10)
+            self.assertEqual(limiter.try_acquire(8, 0.2), 0)
+            self.assertAlmostEqual(limiter.try_acquire(1, 0.2), 0.1)
+            self.assertEqual(limiter.try_acquire(2, 0), 0)
+            self.assertAlmostEqual(limiter.try_acquire(1, 0), 0.1)
+            limiter.refund(1)
+            self.assertEqual(limiter.try_acquire(1, 0), 0)
+
+        with patch('django_elastic_appsearch.throttle.time.monotonic', return_value=101):
+            # Requests larger than the bucket go through once it's full
+            self.assertEqual(limiter.try_acquire(50, 0), 0)
+            self.assertAlmostEqual(limiter.try_acquire(1, 0), 4.1)
+
+    def test_cache_rate_limiter(self):
+        """Test rates are counted in windows shared through a cache."""
+        self.addCleanup(cache.clear)
+        with patch('django_elastic_appsearch.throttle.time.time', return_value=100.75):
+            limiter = CacheRateLimiter(4, 'default', 'cars:requests')
+            self.assertEqual([limiter.try_acquire(1, 0.5) for _ in range(3)], [0, 0, 0.25])
+            other_process = CacheRateLimiter(4, 'default', 'cars:requests')
+            self.assertEqual([other_process.try_acquire(1, 0) for _ in range(3)], [0, 0, 0.25])
+
+        with patch('django_elastic_appsearch.throttle.time.time', return_value=101.5):
+            self.assertEqual(limiter.try_acquire(10, 0), 0)
+
+    def test_in_flight_governor(self):
+        """Test bulk requests leave slots for, and wait behind, interactive requests."""
+        governor = InFlightGovernor(4, 0.5)
+        self.assertEqual([governor.try_acquire(BULK) for _ in range(3)], [True, True, False])
+        self.assertEqual([governor.try_acquire(INTERACTIVE) for _ in range(3)], [True, True, False])
+
+        governor.release()
+        governor.set_waiting(INTERACTIVE, 1)
+        self.assertFalse(governor.try_acquire(BULK))
+        self.assertTrue(governor.try_acquire(INTERACTIVE))
+
+
+class TestThrottledClient(TestCase):
+    """Test the client waits for room under the rate limits."""
+
+    def setUp(self):
+        """Start each test with no shared clients or throttles."""
+        super().setUp()
+        self.config = apps.get_app_config('django_elastic_appsearch')
+        rate_limits = patch.object(self.config, 'rate_limits', {
+            'cars': {'requests_per_second': 2},
+            'default': {'requests_per_second': 10, 'max_in_flight': 4},
+        })
+        rate_limits.start()
+        self.addCleanup(rate_limits.stop)
+        for clear_cache in (clear_client_cache, clear_throttle_cache):
+            clear_cache()
+            self.addCleanup(clear_cache)
+
+    def test_throttles(self):
+        """Test engines have their own limits, or share the default ones."""
+        self.assertIs(get_throttle('cars'), get_throttle('cars'))
+        self.assertIsNone(get_throttle('cars').governor)
+        self.assertIs(get_throttle('trucks'), get_throttle('vans'))
+        self.assertEqual(get_throttle('trucks').governor.max_in_flight, 4)
+        with patch.object(self.config, 'rate_limits', None):
+            self.assertIsNone(get_throttle('cars'))
+            self.assertIs(type(get_api_v1_enterprise_search_client()), AppSearch)
+
+    def test_client_waits_for_room(self):
+        """Test requests over the engine's rate wait for it."""
+        client = get_api_v1_enterprise_search_client()
+        self.assertIsInstance(client, ThrottledAppSearch)
+
+        with patch('elastic_enterprise_search.AppSearch.perform_request', return_value=[]) as perform_request, \
+                patch('django_elastic_appsearch.throttle.time.sleep') as sleep, \
+                patch('django_elastic_appsearch.throttle.time.monotonic', return_value=100):
+            sleep.side_effect = lambda seconds: get_throttle('cars').requests.refund(2)
+            for _ in range(3):
+                client.index_documents(engine_name='cars', documents=[{'id': 'Car_1'}])
+            client.index_documents(engine_name='trucks', documents=[{'id': 'Truck_1'}])
+
+        self.assertEqual(perform_request.call_count, 4)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(get_throttle('trucks').governor.in_flight, 0)
+
+    async def test_async_client_waits_for_room(self):
+        """Test requests over the engine's rate wait for it from an event loop."""
+        client = get_api_v1_async_enterprise_search_client()
+        self.assertIsInstance(client, ThrottledAsyncAppSearch)
+
+        with patch('elastic_enterprise_search.AsyncAppSearch.perform_request', return_value=[]) as perform_request, \
+                patch('django_elastic_appsearch.throttle.asyncio.sleep') as sleep, \
+                patch('django_elastic_appsearch.throttle.time.monotonic', return_value=100):
+            sleep.side_effect = lambda seconds: get_throttle('cars').requests.refund(2)
+            for _ in range(3):
+                await client.index_documents(engine_name='cars', documents=[{'id': 'Car_1'}])
+            await client.index_documents(engine_name='trucks', documents=[{'id': 'Truck_1'}])
+
+        self.assertEqual(perform_request.call_count, 4)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(get_throttle('trucks').governor.in_flight, 0)
+
+
+class TestPriority(BaseElasticAppSearchClientTestCase):
+    """Test queryset operations are sent at bulk priority."""
+
+    def test_bulk_priority(self):
+        """Test querysets are sent at bulk priority, and model objects at interactive priority."""
+        Car(make='Saab', model='9000', year_manufactured=timezone.now()).save()
+        priorities = []
+        self.client_index.side_effect = lambda **kwargs: priorities.append(get_priority()) or []
+
+        Car.objects.all().index_to_appsearch(workers=2)
+        Car.objects.first().index_to_appsearch()
+        self.assertEqual(priorities, [BULK, INTERACTIVE])
+
+        with bulk_priority():
+            self.assertEqual(get_priority(), BULK)
+        self.assertEqual(get_priority(), INTERACTIVE)
+
+    async def test_async_bulk_priority(self):
+        """Test querysets are sent at bulk priority from an event loop."""
+        self.async_client_index.side_effect = Mock(side_effect=lambda **kwargs: [{'id': get_priority()}])
+        await sync_to_async(Car.objects.create)(make='Saab', model='9000', year_manufactured=timezone.now())
+        self.assertEqual(await Car.objects.all().aindex_to_appsearch(), [{'id': BULK}])
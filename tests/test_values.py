@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test cases for serialising querysets from rows of values."""
+
+from unittest.mock import patch
+
+from django_elastic_appsearch import serialisers
+from django_elastic_appsearch.values import compile_values_plan, get_values_serialiser
+
+from example.models import Car, Feature, Manufacturer, Motorbike
+from example.serialisers import CarSerialiser, MotorbikeSerialiser
+
+from .base import BaseElasticAppSearchClientTestCase
+
+
+class MotorbikeValuesSerialiser(serialisers.AppSearchSerialiser):
+    """Motorbike serialiser only reading model fields."""
+
+    make = serialisers.StrField(attr='manufacturer.name')
+    manufacturer_id = serialisers.IntField()
+    model = serialisers.StrField()
+
+
+class MotorbikeRelationSerialiser(serialisers.AppSearchSerialiser):
+    """Motorbike serialiser reading a related object."""
+
+    manufacturer = serialisers.Field()
+
+
+class MotorbikeInstanceSerialiser(MotorbikeValuesSerialiser):
+    """Motorbike serialiser opting out of values."""
+
+    class Meta:
+        use_values = False
+
+
+class TestValuesSerialisation(BaseElasticAppSearchClientTestCase):
+    """Test serialising querysets from rows of values."""
+
+    def setUp(self):
+        """Setup the patches and test data."""
+        super().setUp()
+        features = [Feature.objects.create(name='Feature {}'.format(i)) for i in range(0, 3)]
+        # Create 12 motorbikes
+        for i in range(0, 12):
+            motorbike = Motorbike.objects.create(
+                manufacturer=Manufacturer.objects.create(name='Manufacturer {}'.format(i)),
+                model='Model {}'.format(i)
+            )
+            motorbike.features.set(features[:i % 3])
+
+        serialiser_class = patch.object(
+            Motorbike.AppsearchMeta, 'appsearch_serialiser_class', MotorbikeValuesSerialiser
+        )
+        serialiser_class.start()
+        self.addCleanup(serialiser_class.stop)
+
+    def test_compile_values_plan(self):
+        """Test only serialisers reading model fields are compiled to read values."""
+        lookups, fields = compile_values_plan(Motorbike, MotorbikeValuesSerialiser)
+        self.assertEqual(lookups, ['pk', 'manufacturer__name', 'manufacturer_id', 'model'])
+        self.assertEqual([field[:2] for field in fields], [
+            ('id', None), ('object_type', None), ('make', 1), ('manufacturer_id', 2), ('model', 3)
+        ])
+
+        # Method fields, related objects, and serialisers opting out need instances
+        self.assertIsNone(compile_values_plan(Car, CarSerialiser))
+        self.assertIsNone(compile_values_plan(Motorbike, MotorbikeSerialiser))
+        self.assertIsNone(compile_values_plan(Motorbike, MotorbikeRelationSerialiser))
+        self.assertIsNone(compile_values_plan(Motorbike, MotorbikeInstanceSerialiser))
+
+    def test_custom_document_id_needs_instances(self):
+        """Test models with their own document IDs are serialised from instances."""
+        with patch.object(Motorbike, 'get_appsearch_document_id', lambda self: 'bike-{}'.format(self.pk)):
+            compile_values_plan.cache_clear()
+            self.addCleanup(compile_values_plan.cache_clear)
+            self.assertIsNone(get_values_serialiser(Motorbike, ['motorbikes']))
+
+    def test_values_match_instances(self):
+        """Test serialising values gives the same documents as serialising instances."""
+        values_serialiser = get_values_serialiser(Motorbike, ['motorbikes'])
+        rows = [row for chunk in values_serialiser.slice_queryset(Motorbike.objects.all(), 5) for row in chunk]
+        self.assertEqual(
+            [document for row in rows for document in values_serialiser.serialise(row, 'motorbikes')],
+            [motorbike.serialise_for_appsearch() for motorbike in Motorbike.objects.order_by('pk')]
+        )
+        self.assertEqual(values_serialiser.serialise(rows[0], 'cars'), [])
+
+    def test_queryset_index_reads_values(self):
+        """Test indexing a queryset serialises values with a query for each chunk."""
+        # Note that the app search chunk size is set to 5 in `tests.settings`,
+        # so there's a query for each of the 3 chunks
+        with self.assertNumQueries(3):
+            Motorbike.objects.all().index_to_appsearch()
+
+        documents = [document for call in self.client_index.call_args_list for document in call[1]['documents']]
+        self.assertEqual(len(documents), 12)
+        self.assertEqual(documents[2], {
+            'id': 'Motorbike_{}'.format(Motorbike.objects.get(model='Model 2').pk),
+            'object_type': 'Motorbike',
+            'make': 'Manufacturer 2',
+            'manufacturer_id': Manufacturer.objects.get(name='Manufacturer 2').pk,
+            'model': 'Model 2',
+        })
+
+    async def test_async_queryset_index_reads_values(self):
+        """Test indexing a queryset from an event loop serialises values."""
+        self.async_client_index.return_value = []
+        with patch('django_elastic_appsearch.orm.plan_queryset') as plan_queryset:
+            await Motorbike.objects.all().aindex_to_appsearch()
+        plan_queryset.assert_not_called()
+
+        documents = [document for call in self.async_client_index.call_args_list for document in call[1]['documents']]
+        self.assertEqual(len(documents), 12)
+        self.assertEqual(documents[0]['make'], 'Manufacturer 0')